@@ -1,150 +1,259 @@
-from typing import Any
-import os
+from typing import Any, AsyncIterator, Optional
 
 from src.core.config import settings
+from src.core.log import get_logger
+from src.services.llm_scheduler import get_scheduler
+from src.services.metrics import record_llm_usage, span
+
+log = get_logger("llm")
 
 try:
-    # openai-agents package imports as 'agents'
-    from agents import Agent as OpenAIAgent, Runner as AgentsRunner
-    AGENTS_AVAILABLE = True
+    import httpx
+    from openai import APIConnectionError, AsyncOpenAI
+    OPENAI_AVAILABLE = True
 except ImportError as e:
-    print(f"Warning: Could not import openai-agents: {e}")
-    print("Please install: pip install openai-agents")
-    OpenAIAgent = None
-    AgentsRunner = None
-    AGENTS_AVAILABLE = False
+    log.warning("Could not import openai (pip install openai httpx): %s", e)
+    httpx = None
+    AsyncOpenAI = None
+    APIConnectionError = None
+    OPENAI_AVAILABLE = False
 
+# Failures without an HTTP response worth retrying (APITimeoutError is an APIConnectionError)
+_TRANSIENT_ERRORS = tuple(t for t in (TimeoutError, ConnectionError, APIConnectionError) if t is not None)
 
-class Agent:
+
+class LLMError(RuntimeError):
     """
-    Wrapper around openai-agents Agent class.
-    Used by RAG and personalization services.
+    User-facing LLM failure. Keeps the HTTP status of the API error (None when
+    there was no response) and whether retrying can help: rate limits, 5xx and
+    timeouts can; bad requests, auth errors and exhausted quota cannot.
     """
 
-    def __init__(self, name: str, instructions: str, model: str = "gpt-3.5-turbo"):
-        if not AGENTS_AVAILABLE:
-            raise RuntimeError(
-                "openai-agents package is not installed. Please run: pip install openai-agents"
-            )
+    def __init__(self, message: str, status_code: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
 
-        if not settings.OPENAI_API_KEY:
-            raise RuntimeError(
-                "OPENAI_API_KEY is not set. Please configure it in your environment."
-            )
 
-        # Set OpenAI API key as environment variable for openai-agents
-        os.environ["OPENAI_API_KEY"] = settings.OPENAI_API_KEY
+# Shared async OpenAI client (one keep-alive connection pool for every service)
+_client = None
+_http_client = None
+
 
-        # Create agent using openai-agents package
-        self._agent = OpenAIAgent(
-            name=name,
-            instructions=instructions,
-            model=model,
+def configure_credentials() -> bool:
+    """
+    Validate credentials and build the shared client once, at application startup.
+    Returns True when the LLM is usable.
+    """
+    if not OPENAI_AVAILABLE:
+        log.warning("openai package not installed; LLM features disabled")
+        return False
+    if not settings.OPENAI_API_KEY:
+        log.warning("OPENAI_API_KEY not set; LLM features disabled")
+        return False
+    get_openai_client()
+    return True
+
+
+def get_openai_client():
+    """Get the shared AsyncOpenAI client, creating its HTTP connection pool on first use."""
+    global _client, _http_client
+    if _client is not None:
+        return _client
+
+    if not OPENAI_AVAILABLE:
+        raise RuntimeError(
+            "openai package is not installed. Please run: pip install openai httpx"
+        )
+    if not settings.OPENAI_API_KEY:
+        raise RuntimeError(
+            "OPENAI_API_KEY is not set. Please configure it in your environment."
         )
+
+    limits = httpx.Limits(
+        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    )
+    timeout = httpx.Timeout(settings.OPENAI_TIMEOUT_SECONDS, connect=10.0)
+    try:
+        _http_client = httpx.AsyncClient(http2=True, limits=limits, timeout=timeout)
+    except ImportError:
+        # HTTP/2 needs the optional 'h2' package; keep-alive HTTP/1.1 still pools connections
+        log.warning("h2 not installed; OpenAI client using HTTP/1.1 keep-alive")
+        _http_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+
+    _client = AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=settings.OPENAI_BASE_URL or None,
+        http_client=_http_client,
+    )
+    log.info("Shared OpenAI client initialized")
+    return _client
+
+
+async def close_openai_client():
+    """Close the shared connection pool (application shutdown)."""
+    global _client, _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _client = None
+    _http_client = None
+
+
+class Agent:
+    """
+    Lightweight agent definition: instructions (system prompt), model and the
+    service whose concurrency limits its calls count against.
+    Used by RAG, translation and personalization services.
+    """
+
+    def __init__(self, name: str, instructions: str, model: str = "gpt-3.5-turbo", service: str = "chat"):
         self.name = name
         self.instructions = instructions
         self.model = model
+        self.service = service
+
+    def messages(self, input: str) -> list:
+        return [
+            {"role": "system", "content": self.instructions},
+            {"role": "user", "content": input},
+        ]
+
+
+class Result:
+    def __init__(self, final_output: str, usage: Optional[Any] = None):
+        self.final_output = final_output
+        self.usage = usage
 
 
 class Runner:
     """
-    Wrapper around openai-agents Runner class.
-    Provides async-compatible interface.
+    Runs agents with the shared AsyncOpenAI client (no executor threads).
+    Calls are limited per service by src.services.llm_scheduler.
     """
 
     @staticmethod
-    async def run(agent: Agent, input: str) -> Any:
-        if not AGENTS_AVAILABLE:
-            raise RuntimeError(
-                "openai-agents package is not installed. Please run: pip install openai-agents"
-            )
-
-        if not settings.OPENAI_API_KEY:
-            raise RuntimeError(
-                "OPENAI_API_KEY is not set. Please configure it in your environment."
-            )
-
+    async def run(agent: Agent, input: str) -> Result:
+        client = get_openai_client()
         try:
-            print(f"Making OpenAI Agents API call with model: {agent.model}")
-            print(f"API key preview: {settings.OPENAI_API_KEY[:8]}...{settings.OPENAI_API_KEY[-4:] if len(settings.OPENAI_API_KEY) > 12 else '***'}")
-
-            # Set API key for this run
-            os.environ["OPENAI_API_KEY"] = settings.OPENAI_API_KEY
-
-            # Use openai-agents Runner
-            runner = AgentsRunner(agent._agent)
-            
-            # Run the agent (openai-agents Runner.run is synchronous, so we run it in executor)
-            import asyncio
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(None, runner.run, input)
-
-            # Extract content from result
-            if hasattr(result, 'final_output'):
-                content = str(result.final_output)
-            elif hasattr(result, 'content'):
-                content = str(result.content)
-            elif isinstance(result, str):
-                content = result
-            else:
-                content = str(result)
-            
+            async with get_scheduler(agent.service).slot():
+                with span(f"llm.{agent.service}"):
+                    response = await client.chat.completions.create(
+                        model=agent.model,
+                        messages=agent.messages(input),
+                    )
+            record_llm_usage(agent.service, agent.model, response.usage)
+            content = response.choices[0].message.content if response.choices else None
             if not content:
-                raise RuntimeError("Empty response from OpenAI Agents API")
-
-            class Result:
-                def __init__(self, final_output: str):
-                    self.final_output = final_output
+                raise RuntimeError("Empty response from OpenAI API")
+            return Result(content, usage=response.usage)
+        except Exception as e:
+            raise _translate_error(e)
 
-            return Result(content)
+    @staticmethod
+    async def stream(agent: Agent, input: str) -> AsyncIterator[str]:
+        """
+        Yield text deltas as the model generates them. A scheduler slot is held
+        until the generator finishes or is closed, so callers that may stop
+        early must aclose() it.
+        """
+        client = get_openai_client()
+        scheduler = get_scheduler(agent.service)
+        stream = None
+        try:
+            await scheduler.acquire_slot()
         except Exception as e:
-            error_msg = str(e)
-            error_type = type(e).__name__
-            
-            print(f"OpenAI Agents Error - Type: {error_type}, Message: {error_msg}")
-            
-            # Check for specific OpenAI API errors
-            if hasattr(e, 'status_code'):
-                status_code = e.status_code
-                print(f"OpenAI API Status Code: {status_code}")
-                
-                if status_code == 401:
-                    raise RuntimeError(
-                        "Invalid OpenAI API key. Please verify your OPENAI_API_KEY in the .env file. "
-                        "Make sure the key starts with 'sk-' and is correct."
-                    )
-                elif status_code == 429:
-                    if "quota" in error_msg.lower() or "insufficient_quota" in error_msg.lower():
-                        raise RuntimeError(
-                            "OpenAI API quota exceeded. Please check:\n"
-                            "1. Visit https://platform.openai.com/account/billing to verify credits\n"
-                            "2. Check if you're using the correct API key for the account with credits\n"
-                            "3. Verify the account has available credits/usage limits"
-                        )
-                    else:
-                        raise RuntimeError(
-                            "OpenAI API rate limit exceeded. Please wait a moment and try again."
-                        )
-                elif status_code == 500:
-                    raise RuntimeError(
-                        "OpenAI API server error. Please try again later."
-                    )
-            
-            # Fallback error handling
-            if "insufficient_quota" in error_msg.lower() or "quota" in error_msg.lower():
-                raise RuntimeError(
-                    "OpenAI API quota exceeded. Please check:\n"
-                    "1. Visit https://platform.openai.com/account/billing\n"
-                    "2. Verify you're using the correct API key\n"
-                    "3. Check account has available credits"
+            raise _translate_error(e)
+        try:
+            with span(f"llm.{agent.service}.stream"):
+                stream = await client.chat.completions.create(
+                    model=agent.model,
+                    messages=agent.messages(input),
+                    stream=True,
+                    # Final chunk carries token usage (with empty choices)
+                    stream_options={"include_usage": True},
                 )
-            elif "invalid_api_key" in error_msg.lower() or "401" in error_msg:
-                raise RuntimeError(
-                    "Invalid OpenAI API key. Please check your OPENAI_API_KEY in the .env file."
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+                    if getattr(chunk, "usage", None) is not None:
+                        record_llm_usage(agent.service, agent.model, chunk.usage)
+        except Exception as e:
+            raise _translate_error(e)
+        finally:
+            try:
+                if stream is not None:
+                    # Abandoned mid-answer: drop the HTTP response instead of leaving it open
+                    await stream.close()
+            finally:
+                scheduler.release_slot()
+
+
+def _is_retryable(e: Exception, status_code: Optional[int]) -> bool:
+    if status_code is not None:
+        if status_code == 429:
+            return "quota" not in str(e).lower()
+        return status_code in (408, 409) or status_code >= 500
+    return isinstance(e, _TRANSIENT_ERRORS)
+
+
+def _translate_error(e: Exception) -> Exception:
+    """Map OpenAI errors to LLMErrors (RuntimeErrors raised here pass through unchanged)."""
+    if isinstance(e, RuntimeError):
+        return e
+    status_code = getattr(e, "status_code", None)
+    return LLMError(str(_describe_error(e)), status_code=status_code, retryable=_is_retryable(e, status_code))
+
+
+def _describe_error(e: Exception) -> RuntimeError:
+    """User-facing message for an OpenAI error."""
+
+    error_msg = str(e)
+    error_type = type(e).__name__
+
+    status_code = getattr(e, "status_code", None)
+    log.warning("OpenAI error: %s", error_msg, extra={"error_type": error_type, "status_code": status_code})
+
+    # Check for specific OpenAI API errors
+    if status_code is not None:
+
+        if status_code == 401:
+            return RuntimeError(
+                "Invalid OpenAI API key. Please verify your OPENAI_API_KEY in the .env file. "
+                "Make sure the key starts with 'sk-' and is correct."
+            )
+        elif status_code == 429:
+            if "quota" in error_msg.lower() or "insufficient_quota" in error_msg.lower():
+                return RuntimeError(
+                    "OpenAI API quota exceeded. Please check:\n"
+                    "1. Visit https://platform.openai.com/account/billing to verify credits\n"
+                    "2. Check if you're using the correct API key for the account with credits\n"
+                    "3. Verify the account has available credits/usage limits"
                 )
-            elif "rate_limit" in error_msg.lower() or "429" in error_msg:
-                raise RuntimeError(
+            else:
+                return RuntimeError(
                     "OpenAI API rate limit exceeded. Please wait a moment and try again."
                 )
-            else:
-                raise RuntimeError(f"OpenAI Agents error ({error_type}): {error_msg}")
+        elif status_code == 500:
+            return RuntimeError(
+                "OpenAI API server error. Please try again later."
+            )
+
+    # Fallback error handling
+    if "insufficient_quota" in error_msg.lower() or "quota" in error_msg.lower():
+        return RuntimeError(
+            "OpenAI API quota exceeded. Please check:\n"
+            "1. Visit https://platform.openai.com/account/billing\n"
+            "2. Verify you're using the correct API key\n"
+            "3. Check account has available credits"
+        )
+    elif "invalid_api_key" in error_msg.lower() or "401" in error_msg:
+        return RuntimeError(
+            "Invalid OpenAI API key. Please check your OPENAI_API_KEY in the .env file."
+        )
+    elif "rate_limit" in error_msg.lower() or "429" in error_msg:
+        return RuntimeError(
+            "OpenAI API rate limit exceeded. Please wait a moment and try again."
+        )
+    else:
+        return RuntimeError(f"OpenAI error ({error_type}): {error_msg}")
@@ -0,0 +1,93 @@
+"""
+Store benchmark results and compare a run against a stored baseline.
+
+Results are {benchmark: {metric: number}}, saved as JSON. A metric's name
+says which way is better: throughput ("rps", "*_per_s") should not drop,
+latencies ("*_ms") and error rates ("error_rate") should not rise. Other
+metrics are shown but never fail the comparison.
+
+    python -m benchmarks.loadtest --save-baseline benchmarks/baselines/loadtest.json
+    python -m benchmarks.loadtest --baseline benchmarks/baselines/loadtest.json --tolerance 0.15
+
+A run is a regression when a metric is worse than the baseline by more than
+--tolerance (relative). Error rates use an absolute tolerance of 1 percentage
+point instead, since the baseline is usually 0.
+"""
+import json
+import platform
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+Results = Dict[str, Dict[str, float]]
+
+ERROR_RATE_TOLERANCE = 0.01
+
+
+def direction(metric: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if informational."""
+    if metric == "rps" or metric.endswith("_per_s"):
+        return 1
+    if metric.endswith("_ms") or metric == "error_rate":
+        return -1
+    return 0
+
+
+def save(results: Results, path: Path, meta: Optional[dict] = None):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpu": platform.processor()},
+        "meta": meta or {},
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2, sort_keys=True, default=str), encoding="utf-8")
+    print(f"\nBaseline written to {path}")
+
+
+def load(path: Path) -> Results:
+    return json.loads(Path(path).read_text(encoding="utf-8"))["results"]
+
+
+def compare(results: Results, baseline: Results, tolerance: float) -> List[str]:
+    """Print a comparison table; return the regressions (empty when the run is within tolerance)."""
+    regressions = []
+    print(f"\n{'benchmark':<32}{'metric':<16}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name in sorted(results):
+        base_metrics = baseline.get(name)
+        if base_metrics is None:
+            print(f"{name:<32}{'(not in baseline)':<16}")
+            continue
+        for metric, value in sorted(results[name].items()):
+            base = base_metrics.get(metric)
+            if base is None:
+                continue
+            change = (value - base) / base if base else 0.0
+            sign = direction(metric)
+            if metric == "error_rate":
+                worse = value - base > ERROR_RATE_TOLERANCE
+            else:
+                worse = sign != 0 and base > 0 and -sign * change > tolerance
+            flag = "  REGRESSION" if worse else ""
+            print(f"{name:<32}{metric:<16}{base:>12.2f}{value:>12.2f}{change * 100:>9.1f}%{flag}")
+            if worse:
+                regressions.append(f"{name} {metric}: {base:.2f} -> {value:.2f}")
+    return regressions
+
+
+def check(results: Results, baseline_path: Optional[Path], save_path: Optional[Path], tolerance: float,
+          meta: Optional[dict] = None) -> int:
+    """Shared --baseline / --save-baseline handling; returns the process exit code."""
+    if save_path:
+        save(results, save_path, meta)
+    if not baseline_path:
+        return 0
+    regressions = compare(results, load(baseline_path), tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {tolerance * 100:.0f}%:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {tolerance * 100:.0f}%")
+    return 0
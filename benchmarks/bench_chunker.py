@@ -0,0 +1,86 @@
+"""
+Chunking speed and chunk quality: the old paragraph splitter vs the
+structure-aware chunker (src/ingestion/chunker.py) over the whole docs tree.
+
+Usage:
+    python -m benchmarks.bench_chunker [--docs-path PATH] [--chunk-tokens 300]
+                                       [--chunk-overlap 40] [--repeat 5]
+
+Reports wall time to chunk every file (best of --repeat, files already read
+into memory), chunk count, token-size percentiles, chunks under 100 characters,
+chunks the old 1000-character payload limit would have truncated, and chunks
+with an unbalanced code fence (a code block torn apart).
+"""
+import argparse
+import re
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from src.ingestion.chunker import chunk_markdown, count_tokens
+from src.ingestion.pipeline import discover_files
+
+DOCS_PATH = Path(__file__).resolve().parent.parent.parent / "my-ai-book" / "docs"
+_FENCE_LINE_RE = re.compile(r"^\s*(```|~~~)", re.MULTILINE)
+
+
+def legacy_chunks(content: str) -> List[str]:
+    """The original ingest_simple.py splitter: blank-line paragraphs longer than 10 characters."""
+    return [p.strip() for p in content.split("\n\n") if p.strip() and len(p.strip()) > 10]
+
+
+def measure(name: str, docs: List[str], chunker: Callable[[str], List[str]], repeat: int) -> dict:
+    best = float("inf")
+    chunks: List[str] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = [text for doc in docs for text in chunker(doc)]
+        best = min(best, time.perf_counter() - start)
+
+    tokens = sorted(count_tokens(c) for c in chunks) or [0]
+    return {
+        "name": name,
+        "seconds": best,
+        "chunks": len(chunks),
+        "p5": tokens[int(len(tokens) * 0.05)],
+        "p50": statistics.median(tokens),
+        "p95": tokens[min(len(tokens) - 1, int(len(tokens) * 0.95))],
+        "tiny": sum(1 for c in chunks if len(c) < 100),
+        "truncated": sum(1 for c in chunks if len(c) > 1000),
+        "torn_code": sum(1 for c in chunks if len(_FENCE_LINE_RE.findall(c)) % 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs-path", type=Path, default=DOCS_PATH)
+    parser.add_argument("--chunk-tokens", type=int, default=300)
+    parser.add_argument("--chunk-overlap", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = [path.read_text(encoding="utf-8") for path in discover_files(args.docs_path)]
+    if not docs:
+        print(f"No markdown files under {args.docs_path}")
+        return
+    print(f"{len(docs)} files, {sum(len(d) for d in docs) / 1e6:.2f} MB\n")
+
+    rows = [
+        measure("paragraphs", docs, legacy_chunks, args.repeat),
+        measure(
+            f"structured/{args.chunk_tokens}",
+            docs,
+            lambda doc: [c.text for c in chunk_markdown(doc, args.chunk_tokens, args.chunk_overlap)],
+            args.repeat,
+        ),
+    ]
+    print(f"{'chunker':<16}{'ms':>9}{'chunks':>8}{'p5 tok':>8}{'p50 tok':>9}{'p95 tok':>9}"
+          f"{'<100ch':>8}{'>1000ch':>9}{'torn code':>11}")
+    for r in rows:
+        print(f"{r['name']:<16}{r['seconds'] * 1000:>9.1f}{r['chunks']:>8}{r['p5']:>8}{r['p50']:>9.0f}"
+              f"{r['p95']:>9}{r['tiny']:>8}{r['truncated']:>9}{r['torn_code']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Recall@k and retrieval latency: dense-only vs hybrid (dense + BM25, RRF-fused).
+
+Usage:
+    python -m benchmarks.bench_hybrid [--samples 200] [--k 1 3 5 10] [--seed 0]
+    python -m benchmarks.bench_hybrid --queries queries.jsonl
+
+Runs against the configured collection (QDRANT_* settings), which must have
+been ingested with `python ingest_simple.py --sparse`. No LLM is involved.
+
+Without --queries, queries are synthesized from randomly sampled chunks: the
+chunk's technical tokens (snake_case / CamelCase names, paths, CLI flags,
+package names) when it has some, otherwise a short span of its words. The chunk
+the query came from is the single relevant result. A --queries file holds one
+JSON object per line: {"query": str, "source_file": str, "chunk_index": int};
+omit chunk_index to count any chunk of source_file as a hit.
+
+Latency is measured around RAGService._retrieve only; query embeddings are
+computed up front so both modes see the same (warm) dense vector. The hybrid
+figure therefore includes BM25 query encoding and the concurrent sparse search.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import time
+from typing import List, Optional
+
+_TECH_TOKEN_RE = re.compile(
+    r"--?[a-zA-Z][\w-]+"                 # CLI flags
+    r"|\b\w+(?:[_./:]\w+)+\b"            # snake_case, dotted.api, paths, pkg::names
+    r"|\b[a-z]+[A-Z]\w*\b"               # camelCase
+    r"|\b[A-Z][a-z]+(?:[A-Z][a-z0-9]+)+\b"  # CamelCase
+)
+
+
+def synthesize_query(content: str, rng: random.Random) -> Optional[str]:
+    tokens = list(dict.fromkeys(_TECH_TOKEN_RE.findall(content)))
+    if tokens:
+        return " ".join(rng.sample(tokens, min(3, len(tokens))))
+    words = re.findall(r"[A-Za-z][\w-]*", content)
+    if len(words) < 6:
+        return None
+    start = rng.randrange(0, len(words) - 5)
+    return " ".join(words[start:start + rng.randint(4, 8)])
+
+
+def sample_queries(client, collection: str, samples: int, seed: int) -> List[dict]:
+    points = []
+    offset = None
+    while True:
+        batch, offset = client.scroll(
+            collection_name=collection, limit=256, offset=offset,
+            with_payload=["content", "source_file", "chunk_index"], with_vectors=False,
+        )
+        points.extend(batch)
+        if offset is None:
+            break
+
+    rng = random.Random(seed)
+    rng.shuffle(points)
+    queries = []
+    for point in points:
+        payload = point.payload or {}
+        query = synthesize_query(payload.get("content", ""), rng)
+        if query:
+            queries.append({
+                "query": query,
+                "source_file": payload.get("source_file", ""),
+                "chunk_index": payload.get("chunk_index"),
+            })
+        if len(queries) >= samples:
+            break
+    return queries
+
+
+def load_queries(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _is_hit(chunk: dict, target: dict) -> bool:
+    if chunk["source_file"] != target["source_file"]:
+        return False
+    return target.get("chunk_index") is None or chunk["chunk_index"] == target["chunk_index"]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, int(round(len(ordered) * pct)) - 1)]
+
+
+async def evaluate(service, queries: List[dict], vectors, ks: List[int], hybrid: bool) -> dict:
+    top_k = max(ks)
+    hits = {k: 0 for k in ks}
+    latencies = []
+    for target, vector in zip(queries, vectors):
+        start = time.perf_counter()
+        chunks = await service._retrieve(target["query"], vector, top_k, hybrid)
+        latencies.append((time.perf_counter() - start) * 1000)
+        for k in ks:
+            if any(_is_hit(c, target) for c in chunks[:k]):
+                hits[k] += 1
+    return {
+        "recall": {k: hits[k] / len(queries) for k in ks},
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": _percentile(latencies, 0.95),
+    }
+
+
+async def main_async(args):
+    from src.services.rag_service import QDRANT_COLLECTION_NAME, _get_sparse_embedder, get_rag_service
+
+    service = get_rag_service()
+    if args.queries:
+        queries = load_queries(args.queries)
+    else:
+        queries = sample_queries(service.qdrant, QDRANT_COLLECTION_NAME, args.samples, args.seed)
+    if not queries:
+        print("No queries to evaluate (empty collection?)")
+        return
+    print(f"Evaluating {len(queries)} queries on '{QDRANT_COLLECTION_NAME}'")
+
+    vectors = [v.tolist() for v in service.embedder.embed([q["query"] for q in queries])]
+    _get_sparse_embedder()
+    # Warm both paths (HTTP connections, BM25 tokenizer)
+    await service._retrieve(queries[0]["query"], vectors[0], max(args.k), False)
+    await service._retrieve(queries[0]["query"], vectors[0], max(args.k), True)
+
+    header = f"{'mode':<8}" + "".join(f"{'R@' + str(k):>8}" for k in args.k) + f"{'p50 ms':>9}{'p95 ms':>9}"
+    print(header)
+    for name, hybrid in (("dense", False), ("hybrid", True)):
+        r = await evaluate(service, queries, vectors, args.k, hybrid)
+        print(f"{name:<8}" + "".join(f"{r['recall'][k]:>8.3f}" for k in args.k)
+              + f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=200, help="Synthesized queries (ignored with --queries)")
+    parser.add_argument("--queries", help="JSONL file of labelled queries")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
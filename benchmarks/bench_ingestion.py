@@ -0,0 +1,111 @@
+"""
+Microbenchmarks for the ingestion hot paths: chunking and embedding.
+
+Usage:
+    python -m benchmarks.bench_ingestion [--docs-path PATH] [--repeat 5]
+                                         [--batch-sizes 32 256] [--skip-embed]
+                                         [--baseline PATH] [--save-baseline PATH] [--tolerance 0.1]
+
+Runs over a synthetic docs tree (benchmarks/synthetic_docs.py) unless
+--docs-path is given, so results are comparable across machines and commits.
+Measures (best of --repeat):
+  - chunk_file() over every file: MB/s and chunks/s;
+  - FastEmbed passage embedding of those chunks at each --batch-sizes;
+  - single-query embedding latency (p50/p95), what a chat request pays.
+
+Results can be stored and compared like benchmarks/loadtest.py results
+(see benchmarks/baseline.py).
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from benchmarks import baseline
+from benchmarks.synthetic_docs import generate, sample_queries
+from src.ingestion.pipeline import EMBEDDING_MODEL_NAME, chunk_file, discover_files
+
+
+def bench_chunking(docs: List[tuple], repeat: int) -> tuple:
+    best = float("inf")
+    chunks = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = [chunk for name, content in docs for chunk in chunk_file(name, content)]
+        best = min(best, time.perf_counter() - start)
+    return best, chunks
+
+
+def bench_embedding(model, texts: List[str], batch_size: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _vector in model.embed(texts, batch_size=batch_size):
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_query_latency(model, queries: List[str]) -> List[float]:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        list(model.query_embed(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs-path", type=Path, help="Real docs tree (default: synthetic)")
+    parser.add_argument("--modules", type=int, default=4)
+    parser.add_argument("--chapters", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 256])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--skip-embed", action="store_true", help="Chunking only (no model download)")
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="book-bench-") as tmp:
+        docs_path = args.docs_path or Path(tmp)
+        if args.docs_path is None:
+            generate(docs_path, args.modules, args.chapters)
+        docs = [(str(path.relative_to(docs_path)), path.read_text(encoding="utf-8")) for path in discover_files(docs_path)]
+    if not docs:
+        sys.exit(f"No markdown files under {args.docs_path}")
+    size_mb = sum(len(content.encode("utf-8")) for _, content in docs) / 1e6
+    print(f"{len(docs)} files, {size_mb:.2f} MB\n")
+
+    results = {}
+    seconds, chunks = bench_chunking(docs, args.repeat)
+    results["chunking"] = {"mb_per_s": size_mb / seconds, "chunks_per_s": len(chunks) / seconds, "chunks": len(chunks)}
+    print(f"chunking:        {seconds * 1000:8.1f} ms  {size_mb / seconds:7.2f} MB/s  "
+          f"{len(chunks) / seconds:9.0f} chunks/s  ({len(chunks)} chunks)")
+
+    if not args.skip_embed:
+        from fastembed import TextEmbedding
+
+        model = TextEmbedding(model_name=EMBEDDING_MODEL_NAME)
+        texts = [chunk.embed_text for chunk in chunks]
+        list(model.embed(texts[:8]))  # load / warm up
+        for batch_size in args.batch_sizes:
+            seconds = bench_embedding(model, texts, batch_size, min(args.repeat, 3))
+            results[f"embed.batch{batch_size}"] = {"chunks_per_s": len(texts) / seconds}
+            print(f"embed batch {batch_size:<4}: {seconds * 1000:8.1f} ms  {len(texts) / seconds:9.0f} chunks/s")
+
+        latencies = bench_query_latency(model, sample_queries(args.queries))
+        p50, p95 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+        results["embed.query"] = {"p50_ms": p50, "p95_ms": p95}
+        print(f"query embed:     p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  ({len(latencies)} queries, one at a time)")
+
+    meta = {"files": len(docs), "mb": size_mb, "synthetic": args.docs_path is None}
+    sys.exit(baseline.check(results, args.baseline, args.save_baseline, args.tolerance, meta))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Overhead of the Prometheus instrumentation (src/services/metrics.py).
+
+Usage:
+    python -m benchmarks.bench_metrics [--spans 200000] [--requests 5000] [--repeat 5]
+
+Measures (best of --repeat):
+  - one span() around a no-op, against the bare loop;
+  - one HTTP request through a minimal FastAPI app in-process (httpx
+    ASGITransport, no network) with and without MetricsMiddleware, which
+    is the worst case because the handler itself does nothing;
+  - a /metrics scrape after the runs above.
+
+A chat request runs ~10 spans and takes hundreds of milliseconds (LLM wait), so
+the per-request overhead is reported as a share of a 500 ms request too.
+"""
+import argparse
+import asyncio
+import time
+
+
+def bench_spans(n: int, repeat: int) -> tuple:
+    from src.services.metrics import span
+
+    def bare():
+        start = time.perf_counter()
+        for _ in range(n):
+            pass
+        return time.perf_counter() - start
+
+    def spanned():
+        start = time.perf_counter()
+        for _ in range(n):
+            with span("bench.noop"):
+                pass
+        return time.perf_counter() - start
+
+    base = min(bare() for _ in range(repeat))
+    timed = min(spanned() for _ in range(repeat))
+    return base / n * 1e9, timed / n * 1e9
+
+
+def build_app(instrumented: bool):
+    from fastapi import FastAPI
+    from src.services.metrics import MetricsMiddleware
+
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"item_id": item_id}
+
+    return app
+
+
+async def bench_requests(app, n: int, repeat: int) -> float:
+    import httpx
+
+    best = float("inf")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for i in range(n):
+                await client.get(f"/items/{i}")
+            best = min(best, time.perf_counter() - start)
+    return best / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spans", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from src.services.metrics import METRICS_ENABLED, render_metrics
+
+    if not METRICS_ENABLED:
+        print("Metrics are disabled (METRICS_ENABLED=false or prometheus-client missing); nothing to measure")
+        return
+
+    bare_ns, span_ns = bench_spans(args.spans, args.repeat)
+    print(f"span():        {span_ns - bare_ns:8.0f} ns per span ({args.spans} spans)")
+
+    plain_us = asyncio.run(bench_requests(build_app(False), args.requests, args.repeat))
+    metered_us = asyncio.run(bench_requests(build_app(True), args.requests, args.repeat))
+    overhead_us = metered_us - plain_us
+    print(f"request:       {plain_us:8.1f} us without middleware, {metered_us:.1f} us with "
+          f"(+{overhead_us:.1f} us, {overhead_us / plain_us * 100:.1f}% of an empty handler)")
+
+    per_chat_us = overhead_us + 10 * (span_ns - bare_ns) / 1000
+    print(f"chat request:  ~{per_chat_us:.1f} us for middleware + 10 spans = "
+          f"{per_chat_us / 500_000 * 100:.4f}% of a 500 ms request")
+
+    start = time.perf_counter()
+    body = render_metrics()
+    print(f"/metrics:      {(time.perf_counter() - start) * 1000:8.2f} ms to render {len(body) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
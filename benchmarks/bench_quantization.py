@@ -0,0 +1,193 @@
+"""
+RAM, p50/p99 search latency and recall@k for collection layouts
+(float32 in RAM vs scalar / binary quantization with on-disk originals).
+
+Usage:
+    docker run -p 6333:6333 qdrant/qdrant     # local instance, not the cloud cluster
+    python -m benchmarks.bench_quantization [--url http://localhost:6333] [--scale 4]
+                                            [--queries 200] [--k 10] [--oversampling 2.0]
+                                            [--layouts baseline scalar binary]
+
+Vectors are the docs tree chunks embedded with bge-small (as ingest_simple.py
+does); --scale adds jittered copies to simulate more books and languages.
+Queries are synthesized from sampled chunks (see bench_hybrid.py) and embedded
+the same way as chat queries. Ground truth is an exact numpy top-k over the
+float32 vectors; each layout is loaded into a throwaway `bench_q_*`
+collection, searched with and without rescoring, and then deleted.
+
+RAM is the Qdrant process resident-memory delta (from /metrics) while the
+collection is loaded, next to an estimate from the layout (vectors kept in RAM
+plus the HNSW graph).
+"""
+import argparse
+import random
+import statistics
+import time
+import urllib.request
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from benchmarks.bench_hybrid import synthesize_query
+
+DOCS_PATH = Path(__file__).resolve().parent.parent.parent / "my-ai-book" / "docs"
+
+LAYOUTS = {
+    "baseline": dict(quantization="none", on_disk=False),
+    "scalar": dict(quantization="scalar", on_disk=True),
+    "binary": dict(quantization="binary", on_disk=True),
+}
+
+
+def load_chunks(docs_path: Path) -> List[str]:
+    from src.ingestion.pipeline import chunk_file, discover_files
+
+    chunks = []
+    for md_file in discover_files(docs_path):
+        source_file = str(md_file.relative_to(docs_path))
+        chunks.extend(c.content for c in chunk_file(source_file, md_file.read_text(encoding="utf-8")))
+    return chunks
+
+
+def embed(texts: List[str]) -> np.ndarray:
+    from fastembed import TextEmbedding
+    from src.ingestion.pipeline import EMBEDDING_MODEL_NAME
+
+    model = TextEmbedding(model_name=EMBEDDING_MODEL_NAME)
+    return np.asarray(list(model.embed(texts, batch_size=256)), dtype=np.float32)
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def scale_up(vectors: np.ndarray, factor: int, rng: np.random.Generator, noise: float = 0.05) -> np.ndarray:
+    copies = [vectors]
+    for _ in range(factor - 1):
+        copies.append(normalize(vectors + rng.normal(0, noise, vectors.shape).astype(np.float32)))
+    return np.vstack(copies)
+
+
+def qdrant_rss_bytes(url: str) -> Optional[int]:
+    try:
+        with urllib.request.urlopen(f"{url.rstrip('/')}/metrics", timeout=5) as response:
+            for line in response.read().decode().splitlines():
+                if line.startswith("memory_resident_bytes"):
+                    return int(float(line.split()[-1]))
+    except Exception:
+        pass
+    return None
+
+
+def estimate_ram_bytes(n: int, dim: int, layout, hnsw_m: int) -> int:
+    ram = 0 if layout.on_disk else n * dim * 4
+    if layout.quantization == "scalar":
+        ram += n * dim
+    elif layout.quantization == "binary":
+        ram += n * dim // 8
+    # Level-0 HNSW links: 2 * m neighbors per node, 4-byte ids
+    return ram + n * hnsw_m * 2 * 4
+
+
+def wait_indexed(client, name: str, n: int, timeout: float = 600.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = client.get_collection(name)
+        if str(info.status).lower().endswith("green") and (info.indexed_vectors_count or 0) >= n:
+            return
+        time.sleep(1.0)
+    print(f"  (indexing of {name} not finished after {timeout:.0f}s; measuring anyway)")
+
+
+def run_layout(client, url: str, name: str, layout, vectors: np.ndarray, queries: np.ndarray,
+               truth: List[set], k: int, oversampling: float) -> List[dict]:
+    from qdrant_client import models
+    from src.ingestion.collection import create_collection
+
+    collection = f"bench_q_{name}"
+    if client.collection_exists(collection):
+        client.delete_collection(collection)
+    rss_before = qdrant_rss_bytes(url)
+    create_collection(client, collection, layout)
+    client.upload_points(
+        collection_name=collection,
+        points=(models.PointStruct(id=i, vector=v.tolist(), payload={}) for i, v in enumerate(vectors)),
+        batch_size=256,
+        wait=True,
+    )
+    wait_indexed(client, collection, len(vectors))
+    rss_after = qdrant_rss_bytes(url)
+
+    rows = []
+    variants = [("", True)] if layout.quantization == "none" else [("", True), ("/no-rescore", False)]
+    for suffix, rescore in variants:
+        params = models.SearchParams(
+            quantization=models.QuantizationSearchParams(rescore=rescore, oversampling=oversampling),
+        )
+        latencies, hits = [], 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            response = client.query_points(
+                collection_name=collection, query=query.tolist(), limit=k, search_params=params,
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(expected & {p.id for p in response.points})
+        latencies.sort()
+        rows.append({
+            "layout": name + suffix,
+            "rss_mb": (rss_after - rss_before) / 2**20 if rss_before is not None and rss_after is not None else None,
+            "est_mb": estimate_ram_bytes(len(vectors), vectors.shape[1], layout, layout.hnsw_m) / 2**20,
+            "p50_ms": statistics.median(latencies),
+            "p99_ms": latencies[max(0, int(len(latencies) * 0.99) - 1)],
+            "recall": hits / (len(queries) * k),
+        })
+    client.delete_collection(collection)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:6333", help="Local Qdrant instance")
+    parser.add_argument("--docs-path", type=Path, default=DOCS_PATH)
+    parser.add_argument("--scale", type=int, default=1, help="Jittered copies of the corpus")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--hnsw-m", type=int, default=16)
+    parser.add_argument("--hnsw-ef-construct", type=int, default=100)
+    parser.add_argument("--layouts", nargs="+", choices=sorted(LAYOUTS), default=list(LAYOUTS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from qdrant_client import QdrantClient
+    from src.ingestion.collection import CollectionLayout
+
+    chunks = load_chunks(args.docs_path)
+    if not chunks:
+        print(f"No chunks found under {args.docs_path}")
+        return
+    rng = random.Random(args.seed)
+    query_texts = [q for q in (synthesize_query(c, rng) for c in rng.sample(chunks, min(args.queries, len(chunks)))) if q]
+
+    print(f"Embedding {len(chunks)} chunks and {len(query_texts)} queries...")
+    vectors = normalize(embed(chunks))
+    vectors = scale_up(vectors, max(1, args.scale), np.random.default_rng(args.seed))
+    queries = normalize(embed(query_texts))
+
+    # Exact ground truth (cosine on normalized float32 vectors)
+    scores = queries @ vectors.T
+    truth = [set(np.argsort(-row)[:args.k].tolist()) for row in scores]
+
+    client = QdrantClient(url=args.url, timeout=120.0)
+    print(f"{len(vectors)} points, {len(queries)} queries, k={args.k}, oversampling={args.oversampling}\n")
+    print(f"{'layout':<20}{'RSS MB':>9}{'est MB':>9}{'p50 ms':>9}{'p99 ms':>9}{'R@' + str(args.k):>8}")
+    for name in args.layouts:
+        layout = CollectionLayout(hnsw_m=args.hnsw_m, hnsw_ef_construct=args.hnsw_ef_construct, **LAYOUTS[name])
+        for r in run_layout(client, args.url, name, layout, vectors, queries, truth, args.k, args.oversampling):
+            rss = f"{r['rss_mb']:>9.1f}" if r["rss_mb"] is not None else f"{'n/a':>9}"
+            print(f"{r['layout']:<20}{rss}{r['est_mb']:>9.1f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['recall']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
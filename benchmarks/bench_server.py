@@ -0,0 +1,65 @@
+"""
+Run the API against an in-memory Qdrant seeded from a docs tree (used by
+benchmarks/loadtest.py, which also starts the fake LLM).
+
+Usage:
+    QDRANT_URL=:memory: OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=bench \\
+        python -m benchmarks.bench_server --docs-path DOCS [--port 8800] [--sparse]
+
+Creates the collection in-process (QdrantClient(":memory:")), ingests every
+markdown file under --docs-path with the regular ingestion pipeline, then serves
+src.main:app with uvicorn in the same process, so the app's Qdrant client is the
+seeded one.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+
+def seed(docs_path: Path, sparse: bool, workers: int) -> dict:
+    from src.ingestion.collection import CollectionLayout, create_collection
+    from src.ingestion.manifest import IngestManifest
+    from src.ingestion.pipeline import IngestionPipeline, point_layout
+    from src.services.rag_service import QDRANT_COLLECTION_NAME, _get_qdrant
+
+    client = _get_qdrant()
+    create_collection(client, QDRANT_COLLECTION_NAME, CollectionLayout(sparse=sparse))
+    pipeline = IngestionPipeline(
+        client,
+        QDRANT_COLLECTION_NAME,
+        docs_path,
+        workers=workers,
+        # The in-memory client is not meant for concurrent writers
+        upsert_concurrency=1,
+        manifest=IngestManifest(QDRANT_COLLECTION_NAME, layout=point_layout(sparse)),
+        sparse=sparse,
+    )
+    summary = pipeline.run()
+    points = client.count(QDRANT_COLLECTION_NAME).count
+    print(f"Seeded {points} points from {docs_path} in {summary['wall_seconds']:.1f}s", flush=True)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs-path", type=Path, required=True)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--sparse", action="store_true", help="Also index BM25 vectors (hybrid retrieval)")
+    parser.add_argument("--ingest-workers", type=int, default=2)
+    args = parser.parse_args()
+
+    if os.getenv("QDRANT_URL") != ":memory:":
+        sys.exit("Set QDRANT_URL=:memory: (this script seeds an in-process Qdrant)")
+
+    seed(args.docs_path, args.sparse, args.ingest_workers)
+
+    import uvicorn
+    from src.main import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+RSS and embedding throughput at 1, 2, 4 and 8 workers: one model per worker
+(plain `uvicorn --workers N`) vs one shared embedding worker (serve.py).
+
+Usage:
+    python -m benchmarks.bench_workers [--workers 1 2 4 8] [--duration 10] [--concurrency 4]
+
+Each simulated API worker is a separate process that embeds short queries from
+`--concurrency` threads for `--duration` seconds, the way RAGService does per
+chat request. Every query is unique, so the shared worker's query cache never
+hits and both modes measure model inference. No LLM or Qdrant is involved. Linux only (RSS read from /proc).
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+QUERIES = [
+    "what is ROS2",
+    "explain digital twin",
+    "how do I launch Isaac Sim headless",
+    "difference between a topic and a service",
+    "what sensors does a humanoid robot use",
+    "how does reinforcement learning train locomotion",
+    "what is URDF",
+    "ros2 launch file parameters",
+]
+
+
+def rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return 0.0
+
+
+def _worker(mode: str, socket_path: str, duration: float, concurrency: int, ready, start, results):
+    if mode == "shared":
+        from src.services.embedding_server import RemoteEmbedder
+        embedder = RemoteEmbedder(socket_path)
+    else:
+        from fastembed import TextEmbedding
+        embedder = TextEmbedding(model_name="BAAI/bge-small-en-v1.5")
+    list(embedder.embed(["warm up"]))
+    ready.set()
+    start.wait()
+
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def loop(offset: int):
+        i = offset
+        local = []
+        while time.perf_counter() < deadline:
+            # Unique text (pid, thread, counter) so no cache can answer it
+            query = f"{QUERIES[i % len(QUERIES)]} ({os.getpid()}-{offset}-{i})"
+            t0 = time.perf_counter()
+            list(embedder.embed([query]))
+            local.append(time.perf_counter() - t0)
+            i += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=loop, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.put((os.getpid(), rss_mb(os.getpid()), latencies))
+
+
+def run(mode: str, workers: int, duration: float, concurrency: int) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    server = None
+    socket_path = os.path.join(tempfile.gettempdir(), f"bench-embed-{os.getpid()}.sock")
+    if mode == "shared":
+        from serve import start_embedding_worker
+        server = start_embedding_worker(socket_path, timeout=300)
+
+    start = ctx.Event()
+    results = ctx.Queue()
+    readies = [ctx.Event() for _ in range(workers)]
+    procs = [
+        ctx.Process(target=_worker, args=(mode, socket_path, duration, concurrency, readies[i], start, results))
+        for i in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    for ready in readies:
+        ready.wait()
+
+    start.set()
+    outputs = [results.get() for _ in procs]
+    server_rss = rss_mb(server.pid) if server else 0.0
+    for p in procs:
+        p.join()
+    if server:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(l for _, _, lat in outputs for l in lat)
+    total_rss = sum(rss for _, rss, _ in outputs) + server_rss
+    return {
+        "mode": mode,
+        "workers": workers,
+        "rss_mb": total_rss,
+        "qps": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent requests per worker")
+    args = parser.parse_args()
+
+    if not sys.platform.startswith("linux"):
+        print("This benchmark reads RSS from /proc and only runs on Linux.")
+        sys.exit(1)
+
+    print(f"{'mode':<11}{'workers':>8}{'RSS MB':>10}{'emb/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for workers in args.workers:
+        for mode in ("per-worker", "shared"):
+            r = run(mode, workers, args.duration, args.concurrency)
+            print(f"{r['mode']:<11}{r['workers']:>8}{r['rss_mb']:>10.0f}{r['qps']:>10.1f}"
+                  f"{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
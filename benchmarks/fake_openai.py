@@ -0,0 +1,162 @@
+"""
+Stand-in for the OpenAI API: /v1/chat/completions (plain and streaming) and
+/v1/models, with configurable latency and error rate, so the app can be load
+tested without paying for tokens.
+
+Usage:
+    python -m benchmarks.fake_openai [--port 8900] [--ttft-ms 300] [--jitter-ms 100]
+                                     [--tokens-per-second 80] [--output-tokens 120]
+                                     [--error-rate 0.0]
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8900/v1 (any
+OPENAI_API_KEY works). A reply waits --ttft-ms (+/- --jitter-ms) before the
+first token, then emits tokens at --tokens-per-second; a non-streaming reply
+returns after the same total time. Prompts with translator batch markers
+(<<<1>>>) get every marker back with its section, so batches split cleanly.
+--error-rate answers that share of requests with 500 (the app's retry and
+error paths then show up in the load test). Usage is reported with
+prompt_tokens estimated at 4 characters per token.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+_MARKER_RE = re.compile(r"^\s*<<<(\d+)>>>\s*$", re.MULTILINE)
+_BLANK_LINE_RE = re.compile(r"\n\s*\n")
+_WORDS = "the robot publishes joint states on a topic while the controller tracks the planned trajectory".split()
+
+
+class FakeLLM:
+    def __init__(self, ttft_ms: float, jitter_ms: float, tokens_per_second: float, output_tokens: int,
+                 error_rate: float):
+        self.ttft_ms = ttft_ms
+        self.jitter_ms = jitter_ms
+        self.tokens_per_second = max(1.0, tokens_per_second)
+        self.output_tokens = max(1, output_tokens)
+        self.error_rate = error_rate
+        self.requests = 0
+
+    def first_token_delay(self) -> float:
+        return max(0.0, self.ttft_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def reply_tokens(self, messages: list) -> list:
+        prompt = messages[-1].get("content", "") if messages else ""
+        parts = _MARKER_RE.split(prompt)
+        if len(parts) > 1:
+            # parts = [preamble, "1", section, "2", section, ...]; sections hold no blank lines,
+            # so whatever follows one (the prompt's closing line) is dropped
+            text = "".join(
+                f"<<<{n}>>>\n[translated] {_BLANK_LINE_RE.split(section.strip())[0]}\n"
+                for n, section in zip(parts[1::2], parts[2::2])
+            )
+            return re.findall(r"\S+\s*", text)
+        return [f"{_WORDS[i % len(_WORDS)]} " for i in range(self.output_tokens)]
+
+    @staticmethod
+    def usage(messages: list, completion_tokens: int) -> dict:
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+
+
+def build_app(llm: FakeLLM):
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    app = FastAPI()
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model", "owned_by": "fake"}]}
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": llm.requests}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        llm.requests += 1
+        messages = body.get("messages", [])
+        model = body.get("model", "gpt-4o-mini")
+        if random.random() < llm.error_rate:
+            await asyncio.sleep(llm.first_token_delay())
+            return JSONResponse(status_code=500, content={"error": {"message": "injected failure", "type": "server_error"}})
+
+        tokens = llm.reply_tokens(messages)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(llm.first_token_delay() + len(tokens) / llm.tokens_per_second)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+                "usage": llm.usage(messages, len(tokens)),
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        def chunk(delta: dict, finish_reason=None, usage=None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if usage:
+                payload["usage"] = usage
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            await asyncio.sleep(llm.first_token_delay())
+            yield chunk({"role": "assistant", "content": ""})
+            interval = 1.0 / llm.tokens_per_second
+            for token in tokens:
+                yield chunk({"content": token})
+                await asyncio.sleep(interval)
+            yield chunk({}, finish_reason="stop")
+            if include_usage:
+                yield chunk({}, usage=llm.usage(messages, len(tokens)))
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--ttft-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--output-tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    llm = FakeLLM(args.ttft_ms, args.jitter_ms, args.tokens_per_second, args.output_tokens, args.error_rate)
+    uvicorn.run(build_app(llm), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
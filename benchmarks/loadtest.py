@@ -0,0 +1,386 @@
+"""
+Load test /chat, /chat/stream, /translate and /personalize against a local
+stack: the real app, a fake OpenAI-compatible LLM and an in-memory Qdrant
+seeded from a synthetic docs tree. No API key or network needed.
+
+Usage:
+    python -m benchmarks.loadtest [--profile mixed] [--concurrency N] [--duration S]
+                                  [--ttft-ms 300] [--tokens-per-second 80] [--error-rate 0]
+                                  [--cache-hit-ratio 0.5] [--env KEY=VALUE ...]
+                                  [--baseline PATH] [--save-baseline PATH] [--tolerance 0.1]
+    python -m benchmarks.loadtest --app-url http://127.0.0.1:8000 --profile chat
+
+Starts benchmarks/fake_openai.py and benchmarks/bench_server.py as child
+processes (or uses an app already running at --app-url), waits for /ready, then
+runs the profile's stages. A stage holds `concurrency` virtual users for
+`duration` seconds; each user sends requests back to back, picking endpoints by
+the profile's weights. Per stage and endpoint it reports requests/s,
+p50/p95/p99 latency and error rate, plus time to first token for the streaming
+endpoint. A request counts as failed on a non-2xx status, a timeout, an SSE
+`error` event, or a 2xx body that reports a failure: a /chat answer starting
+with "Error:" or a /translate output with a failed-section placeholder.
+
+--cache-hit-ratio is the share of requests that reuse a question or chapter
+from a fixed pool (so the semantic, translation and personalization caches can
+hit); the rest are unique.
+
+The fake LLM has no rate limit, so the per-service *_REQUESTS_PER_MINUTE limits
+are raised unless set with --env; the concurrency limits keep their defaults.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks import baseline
+from benchmarks.synthetic_docs import TOPICS, generate, paragraph, sample_queries
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# stages: (virtual users, seconds)
+PROFILES = {
+    "smoke": {"mix": {"chat": 1, "chat_stream": 1, "translate": 1, "personalize": 1}, "stages": [(2, 10)]},
+    "chat": {"mix": {"chat": 1, "chat_stream": 3}, "stages": [(8, 30), (32, 30)]},
+    "translate": {"mix": {"translate": 1}, "stages": [(4, 30)]},
+    "personalize": {"mix": {"personalize": 1}, "stages": [(4, 30)]},
+    "mixed": {"mix": {"chat": 2, "chat_stream": 5, "translate": 1.5, "personalize": 1.5}, "stages": [(16, 60)]},
+    "ramp": {
+        "mix": {"chat": 2, "chat_stream": 5, "translate": 1.5, "personalize": 1.5},
+        "stages": [(4, 30), (16, 30), (64, 30)],
+    },
+}
+
+# Rate limits that would otherwise cap throughput well below what the fake LLM serves
+UNLIMITED_RPM = {
+    "CHAT_REQUESTS_PER_MINUTE": "1000000",
+    "TRANSLATION_REQUESTS_PER_MINUTE": "1000000",
+    "PERSONALIZATION_REQUESTS_PER_MINUTE": "1000000",
+}
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# --- Request payloads ------------------------------------------------------------
+
+
+class Workload:
+    """Builds request bodies; a share of them repeat from a fixed pool (cache hits)."""
+
+    def __init__(self, pages: List[str], chapters: List[str], cache_hit_ratio: float, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.pages = pages
+        self.chapter_pool = chapters
+        self.query_pool = sample_queries(50, seed)
+        self.user_pool = [str(uuid.UUID(int=i + 1)) for i in range(20)]
+        self.cache_hit_ratio = cache_hit_ratio
+
+    def _reuse(self) -> bool:
+        return self.rng.random() < self.cache_hit_ratio
+
+    def query(self) -> str:
+        if self._reuse():
+            return self.rng.choice(self.query_pool)
+        return f"{sample_queries(1, self.rng.randrange(1 << 30))[0]} ({self.rng.randrange(1 << 30):x})"
+
+    def chapter(self) -> str:
+        if self._reuse():
+            return self.rng.choice(self.chapter_pool)
+        sections = [f"## {self.rng.choice(TOPICS)}\n\n{paragraph(self.rng)}\n\n{paragraph(self.rng)}" for _ in range(3)]
+        return "\n\n".join(sections)
+
+    def request(self, endpoint: str) -> tuple:
+        """(path, json body, streaming)"""
+        if endpoint in ("chat", "chat_stream"):
+            body = {"query": self.query(), "current_page": self.rng.choice(self.pages)}
+            return ("/api/v1/chat/stream" if endpoint == "chat_stream" else "/api/v1/chat"), body, endpoint == "chat_stream"
+        if endpoint == "translate":
+            return "/api/v1/translate", {"chapter_content": self.chapter()}, False
+        if endpoint == "personalize":
+            return "/api/v1/personalize", {"chapter_content": self.chapter(), "user_id": self.rng.choice(self.user_pool)}, False
+        raise ValueError(f"Unknown endpoint {endpoint!r}")
+
+
+def load_docs(docs_path: Path) -> tuple:
+    """Reader page paths and chapter bodies (three sections each) of the docs tree."""
+    pages, chapters = [], []
+    for path in sorted(docs_path.rglob("*.md")):
+        relative = path.relative_to(docs_path).with_suffix("")
+        pages.append(f"/docs/{relative.as_posix()}")
+        sections = path.read_text(encoding="utf-8").split("\n## ")
+        chapters.append("## " + "\n\n## ".join(sections[1:4]) if len(sections) > 1 else sections[0])
+    return pages, chapters
+
+
+# --- Load generation -------------------------------------------------------------
+
+
+class Sample:
+    __slots__ = ("endpoint", "seconds", "ttft", "ok", "error")
+
+    def __init__(self, endpoint: str, seconds: float, ttft: Optional[float], ok: bool, error: str = ""):
+        self.endpoint = endpoint
+        self.seconds = seconds
+        self.ttft = ttft
+        self.ok = ok
+        self.error = error
+
+
+def body_error(endpoint: str, response) -> str:
+    """Failure reported inside a 2xx body ("" if none): the app degrades instead of erroring."""
+    try:
+        data = response.json()
+    except ValueError:
+        return "invalid JSON"
+    if endpoint == "chat" and str(data.get("answer", "")).startswith("Error:"):
+        return "error answer"
+    if endpoint == "translate" and "[Translation for this section failed" in str(data.get("translated_content", "")):
+        return "failed section"
+    return ""
+
+
+async def send(client, workload: Workload, endpoint: str) -> Sample:
+    path, body, streaming = workload.request(endpoint)
+    start = time.perf_counter()
+    ttft = None
+    try:
+        if not streaming:
+            response = await client.post(path, json=body)
+            if not 200 <= response.status_code < 300:
+                return Sample(endpoint, time.perf_counter() - start, None, False, f"HTTP {response.status_code}")
+            error = body_error(endpoint, response)
+            return Sample(endpoint, time.perf_counter() - start, None, not error, error)
+        error = ""
+        async with client.stream("POST", path, json=body) as response:
+            if not 200 <= response.status_code < 300:
+                await response.aread()
+                return Sample(endpoint, time.perf_counter() - start, None, False, f"HTTP {response.status_code}")
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[7:]
+                    if ttft is None and event in ("token", "final"):
+                        ttft = time.perf_counter() - start
+                    elif event == "error":
+                        error = "SSE error event"
+        return Sample(endpoint, time.perf_counter() - start, ttft, not error, error)
+    except Exception as e:
+        return Sample(endpoint, time.perf_counter() - start, ttft, False, type(e).__name__)
+
+
+async def run_stage(base_url: str, workload: Workload, mix: Dict[str, float], concurrency: int,
+                    duration: float) -> List[Sample]:
+    import httpx
+
+    endpoints, weights = list(mix), list(mix.values())
+    samples: List[Sample] = []
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        async def user():
+            while time.perf_counter() < deadline:
+                endpoint = workload.rng.choices(endpoints, weights)[0]
+                samples.append(await send(client, workload, endpoint))
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+    return samples
+
+
+def summarize(samples: List[Sample], seconds: float) -> Dict[str, Dict[str, float]]:
+    by_endpoint: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample.endpoint].append(sample)
+    summary = {}
+    for endpoint, group in sorted(by_endpoint.items()):
+        latencies = sorted(s.seconds * 1000 for s in group if s.ok)
+        row = {
+            "requests": len(group),
+            "rps": len(group) / seconds,
+            "error_rate": sum(1 for s in group if not s.ok) / len(group),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+        }
+        ttfts = sorted(s.ttft * 1000 for s in group if s.ok and s.ttft is not None)
+        if ttfts:
+            row["ttft_p50_ms"] = percentile(ttfts, 50)
+            row["ttft_p95_ms"] = percentile(ttfts, 95)
+        summary[endpoint] = row
+    return summary
+
+
+def print_stage(title: str, summary: Dict[str, Dict[str, float]], samples: List[Sample]):
+    print(f"\n{title}")
+    print(f"{'endpoint':<14}{'requests':>9}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'errors':>8}{'ttft p50':>10}{'ttft p95':>10}")
+    for endpoint, row in summary.items():
+        ttft = (f"{row['ttft_p50_ms']:>10.0f}{row['ttft_p95_ms']:>10.0f}" if "ttft_p50_ms" in row else "")
+        print(f"{endpoint:<14}{row['requests']:>9.0f}{row['rps']:>8.1f}{row['p50_ms']:>9.0f}{row['p95_ms']:>9.0f}"
+              f"{row['p99_ms']:>9.0f}{row['error_rate'] * 100:>7.1f}%{ttft}")
+    errors: Dict[str, int] = defaultdict(int)
+    for sample in samples:
+        if not sample.ok:
+            errors[f"{sample.endpoint}: {sample.error}"] += 1
+    for error, count in sorted(errors.items(), key=lambda item: -item[1])[:5]:
+        print(f"  {count} x {error}")
+
+
+# --- Local stack -----------------------------------------------------------------
+
+
+def wait_ready(url: str, process: Optional[subprocess.Popen], timeout: float):
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            sys.exit(f"{url} exited with code {process.returncode} before becoming ready")
+        try:
+            if httpx.get(url, timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    sys.exit(f"{url} not ready after {timeout:.0f}s")
+
+
+def start_stack(args, docs_path: Path, log_dir: Path) -> tuple:
+    llm_port, app_port = free_port(), free_port()
+    llm = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_openai", "--port", str(llm_port),
+         "--ttft-ms", str(args.ttft_ms), "--jitter-ms", str(args.jitter_ms),
+         "--tokens-per-second", str(args.tokens_per_second), "--output-tokens", str(args.output_tokens),
+         "--error-rate", str(args.error_rate)],
+        cwd=ROOT, stdout=open(log_dir / "fake_openai.log", "w"), stderr=subprocess.STDOUT,
+    )
+    env = dict(os.environ)
+    env.update(UNLIMITED_RPM)
+    env.update({
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "OPENAI_API_KEY": "bench",
+        "QDRANT_URL": ":memory:",
+        "QDRANT_API_KEY": "",
+        "NEON_DB_URL": "",
+        "CONVERSATION_STORE": "memory",
+        "JOB_STORE": "memory",
+        "TRANSLATION_CACHE_PATH": "",
+        "LOG_LEVEL": "WARNING",
+    })
+    env.update(dict(item.split("=", 1) for item in args.env))
+    app = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_server", "--docs-path", str(docs_path), "--port", str(app_port)]
+        + (["--sparse"] if args.sparse else []),
+        cwd=ROOT, env=env, stdout=open(log_dir / "app.log", "w"), stderr=subprocess.STDOUT,
+    )
+    wait_ready(f"http://127.0.0.1:{llm_port}/v1/models", llm, 30)
+    # Seeding embeds every chunk (and may download the embedding model first)
+    wait_ready(f"http://127.0.0.1:{app_port}/ready", app, args.startup_timeout)
+    return f"http://127.0.0.1:{app_port}", f"http://127.0.0.1:{llm_port}", [llm, app]
+
+
+def llm_calls(llm_url: Optional[str]) -> Optional[int]:
+    if llm_url is None:
+        return None
+    import httpx
+
+    try:
+        return httpx.get(f"{llm_url}/stats", timeout=2.0).json()["requests"]
+    except (httpx.HTTPError, ValueError, KeyError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed")
+    parser.add_argument("--concurrency", type=int, help="Override the virtual users of every stage")
+    parser.add_argument("--duration", type=float, help="Override the seconds of every stage")
+    parser.add_argument("--warmup", type=float, default=10.0, help="Seconds of unrecorded load before the stages")
+    parser.add_argument("--app-url", help="Load test an app that is already running instead of a local stack")
+    parser.add_argument("--ttft-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--output-tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake LLM calls that fail")
+    parser.add_argument("--cache-hit-ratio", type=float, default=0.5)
+    parser.add_argument("--modules", type=int, default=4)
+    parser.add_argument("--chapters", type=int, default=6)
+    parser.add_argument("--sparse", action="store_true", help="Seed BM25 vectors too (for RAG_HYBRID_ENABLED)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra app settings")
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, help="Compare against this stored run")
+    parser.add_argument("--save-baseline", type=Path, help="Store this run as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression (default 10%%)")
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    stages = [(args.concurrency or c, args.duration or d) for c, d in profile["stages"]]
+
+    with tempfile.TemporaryDirectory(prefix="book-loadtest-") as tmp:
+        tmp = Path(tmp)
+        docs_path = tmp / "docs"
+        files = generate(docs_path, args.modules, args.chapters, args.seed)
+        pages, chapters = load_docs(docs_path)
+        workload = Workload(pages, chapters, args.cache_hit_ratio, args.seed)
+
+        processes = []
+        llm_url = None
+        try:
+            if args.app_url:
+                base_url = args.app_url.rstrip("/")
+                wait_ready(f"{base_url}/ready", None, args.startup_timeout)
+            else:
+                print(f"Starting fake LLM and app ({len(files)} synthetic docs; logs in {tmp})...")
+                base_url, llm_url, processes = start_stack(args, docs_path, tmp)
+
+            if args.warmup > 0:
+                print(f"Warm-up: {args.warmup:.0f}s at {stages[0][0]} users")
+                asyncio.run(run_stage(base_url, workload, profile["mix"], stages[0][0], args.warmup))
+
+            results = {}
+            for concurrency, duration in stages:
+                calls_before = llm_calls(llm_url)
+                samples = asyncio.run(run_stage(base_url, workload, profile["mix"], concurrency, duration))
+                summary = summarize(samples, duration)
+                calls = llm_calls(llm_url)
+                title = f"{args.profile}: {concurrency} users x {duration:.0f}s"
+                if calls is not None and calls_before is not None and samples:
+                    title += f" ({(calls - calls_before) / len(samples):.2f} LLM calls per request)"
+                print_stage(title, summary, samples)
+                for endpoint, row in summary.items():
+                    results[f"{args.profile}.c{concurrency}.{endpoint}"] = row
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+            if processes and any(process.returncode not in (0, -15) for process in processes):
+                print(f"\nApp log:\n{(tmp / 'app.log').read_text(errors='replace')[-4000:]}")
+
+    meta = {key: value for key, value in vars(args).items() if key not in ("baseline", "save_baseline")}
+    sys.exit(baseline.check(results, args.baseline, args.save_baseline, args.tolerance, meta))
+
+
+if __name__ == "__main__":
+    main()
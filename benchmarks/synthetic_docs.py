@@ -0,0 +1,109 @@
+"""
+Synthetic Docusaurus docs tree for benchmarks (no real book needed).
+
+Usage:
+    python -m benchmarks.synthetic_docs OUT_DIR [--modules 4] [--chapters 6] [--seed 0]
+
+Writes OUT_DIR/module-N/NN-chapter-M.md files shaped like the book: a title,
+##/### sections, prose paragraphs built from a robotics vocabulary, bullet
+lists and fenced code blocks. The same seed always gives the same tree.
+"""
+import argparse
+import random
+from pathlib import Path
+from typing import List
+
+TOPICS = [
+    "ROS 2", "Gazebo", "Isaac Sim", "URDF", "digital twin", "SLAM", "inverse kinematics",
+    "reinforcement learning", "sensor fusion", "humanoid locomotion", "motion planning",
+    "LiDAR", "depth camera", "IMU", "PID control", "vision-language-action model",
+]
+WORDS = (
+    "robot node topic service action message publisher subscriber launch parameter frame "
+    "transform joint link sensor actuator controller trajectory policy reward simulation "
+    "environment physics collision mesh pose velocity torque latency bandwidth pipeline "
+    "perception planning navigation map localization calibration camera point cloud model "
+    "training inference dataset episode observation state estimate filter noise signal"
+).split()
+CODE_SNIPPETS = [
+    ("bash", "ros2 launch my_robot bringup.launch.py use_sim_time:=true\nros2 topic echo /joint_states"),
+    ("python", "import rclpy\nfrom rclpy.node import Node\n\n\nclass Talker(Node):\n"
+               "    def __init__(self):\n        super().__init__('talker')\n"
+               "        self.pub = self.create_publisher(String, 'chatter', 10)"),
+    ("xml", "<robot name=\"arm\">\n  <link name=\"base_link\"/>\n"
+            "  <joint name=\"shoulder\" type=\"revolute\">\n    <parent link=\"base_link\"/>\n  </joint>\n</robot>"),
+    ("yaml", "controller_manager:\n  ros__parameters:\n    update_rate: 100\n    arm_controller:\n"
+             "      type: joint_trajectory_controller/JointTrajectoryController"),
+]
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+    words.insert(rng.randrange(len(words)), rng.choice(TOPICS))
+    return " ".join(words).capitalize() + "."
+
+
+def paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(3, 7)))
+
+
+def chapter(rng: random.Random, title: str, sections: int = 5) -> str:
+    parts = [f"---\ntitle: {title}\n---", f"# {title}", paragraph(rng)]
+    for s in range(1, sections + 1):
+        parts.append(f"## {rng.choice(TOPICS)} {s}")
+        for _ in range(rng.randint(2, 4)):
+            parts.append(paragraph(rng))
+        if rng.random() < 0.5:
+            parts.append("\n".join(f"- {_sentence(rng)}" for _ in range(rng.randint(3, 6))))
+        if rng.random() < 0.6:
+            lang, code = rng.choice(CODE_SNIPPETS)
+            parts.append(f"```{lang}\n{code}\n```")
+        if rng.random() < 0.4:
+            parts.append(f"### {rng.choice(TOPICS)} in practice")
+            parts.append(paragraph(rng))
+    return "\n\n".join(parts) + "\n"
+
+
+def generate(out_dir: Path, modules: int = 4, chapters: int = 6, seed: int = 0) -> List[Path]:
+    """Write the tree and return the files (sorted)."""
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    files = []
+    for m in range(1, modules + 1):
+        module_dir = out_dir / f"module-{m}"
+        module_dir.mkdir(parents=True, exist_ok=True)
+        for c in range(1, chapters + 1):
+            path = module_dir / f"{c:02d}-chapter-{c}.md"
+            path.write_text(chapter(rng, f"{rng.choice(TOPICS)} (module {m}, chapter {c})"), encoding="utf-8")
+            files.append(path)
+    return sorted(files)
+
+
+def sample_queries(n: int, seed: int = 0) -> List[str]:
+    """Reader-style questions over the same vocabulary."""
+    rng = random.Random(seed)
+    templates = [
+        "what is {t}", "how does {t} work", "explain {t} and {w}", "how do I configure the {w} in {t}",
+        "difference between {t} and {u}", "why is my {w} {x} wrong in {t}",
+    ]
+    return [
+        rng.choice(templates).format(t=rng.choice(TOPICS), u=rng.choice(TOPICS), w=rng.choice(WORDS), x=rng.choice(WORDS))
+        for _ in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--modules", type=int, default=4)
+    parser.add_argument("--chapters", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    files = generate(args.out_dir, args.modules, args.chapters, args.seed)
+    size = sum(path.stat().st_size for path in files)
+    print(f"Wrote {len(files)} files ({size / 1024:.0f} KiB) under {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
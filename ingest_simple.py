@@ -1,11 +1,27 @@
 """
 Simple, stable Qdrant ingestion script with minimal dependencies.
 Ingest Docusaurus markdown docs to Qdrant with proper error handling.
+
+Usage:
+    python ingest_simple.py [--workers N] [--batch-size N] [--upsert-concurrency N]
+                            [--manifest PATH] [--full] [--sparse]
+                            [--chunk-tokens N] [--chunk-overlap N]
+
+Re-runs are incremental: a manifest of file/chunk content hashes records what is
+already in Qdrant, so only new or changed chunks are embedded and chunks that
+disappeared are deleted. Use --full to ignore the manifest and re-embed everything.
+
+--sparse also writes a BM25 sparse vector ("bm25") next to the dense vector, for
+hybrid retrieval (RAG_HYBRID_ENABLED). Switching it on or off re-ingests everything;
+the collection must have been created with the sparse vector
+(`python manage_collection.py create --sparse`).
+
+Docs are chunked along their markdown structure (src/ingestion/chunker.py) into
+chunks of at most --chunk-tokens with --chunk-overlap tokens of overlap.
 """
+import argparse
 import os
 import sys
-import uuid
-import time
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -17,156 +33,163 @@ QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 QDRANT_COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME", "textbook_chunks")
 DOCS_PATH = Path(__file__).parent.parent / "my-ai-book" / "docs"
+MANIFEST_PATH = Path(__file__).parent / ".ingest_manifest.json"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingest Docusaurus markdown docs into Qdrant.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Embedding worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=256,
+                        help="Chunks per embedding batch / upsert request (default: 256)")
+    parser.add_argument("--upsert-concurrency", type=int, default=4,
+                        help="Maximum concurrent upsert requests (default: 4)")
+    parser.add_argument("--docs-path", type=Path, default=DOCS_PATH,
+                        help=f"Docs directory (default: {DOCS_PATH})")
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_PATH,
+                        help=f"Content-hash manifest for incremental runs (default: {MANIFEST_PATH.name})")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the manifest and re-embed every chunk")
+    parser.add_argument("--sparse", action="store_true",
+                        help="Also write BM25 sparse vectors for hybrid retrieval")
+    parser.add_argument("--chunk-tokens", type=int, default=300,
+                        help="Maximum (approximate) tokens per chunk (default: 300)")
+    parser.add_argument("--chunk-overlap", type=int, default=40,
+                        help="Tokens repeated between consecutive chunks of a section (default: 40)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
 
-print("=" * 70)
-print("Qdrant Ingestion - Simple Version")
-print("=" * 70)
-print(f"Collection: {QDRANT_COLLECTION_NAME}")
-print(f"Docs path: {DOCS_PATH}")
-print()
-
-# Try imports
-try:
-    from qdrant_client import QdrantClient, models
-    print("✓ qdrant-client imported")
-except ImportError as e:
-    print(f"✗ Failed to import qdrant-client: {e}")
-    sys.exit(1)
-
-try:
-    from fastembed import TextEmbedding
-    print("✓ fastembed imported")
-except ImportError as e:
-    print(f"✗ Failed to import fastembed: {e}")
-    sys.exit(1)
-
-print()
-
-# Connect to Qdrant
-print("Connecting to Qdrant Cloud...")
-try:
-    qdrant_client = QdrantClient(
-        url=QDRANT_URL,
-        api_key=QDRANT_API_KEY,
-        timeout=30.0,
-        prefer_grpc=False,
-        check_compatibility=False,
+    print("=" * 70)
+    print("Qdrant Ingestion - Simple Version")
+    print("=" * 70)
+    print(f"Collection: {QDRANT_COLLECTION_NAME}")
+    print(f"Docs path: {args.docs_path}")
+    print(f"Workers: {args.workers}, batch size: {args.batch_size}, upsert concurrency: {args.upsert_concurrency}")
+    print(f"Chunks: <= {args.chunk_tokens} tokens, {args.chunk_overlap} tokens overlap")
+    print()
+
+    # Try imports
+    try:
+        from qdrant_client import QdrantClient
+        print("✓ qdrant-client imported")
+    except ImportError as e:
+        print(f"✗ Failed to import qdrant-client: {e}")
+        sys.exit(1)
+
+    try:
+        import fastembed  # noqa: F401
+        print("✓ fastembed imported")
+    except ImportError as e:
+        print(f"✗ Failed to import fastembed: {e}")
+        sys.exit(1)
+
+    from src.ingestion.manifest import IngestManifest
+    from src.ingestion.pipeline import (
+        PAYLOAD_INDEX_FIELDS,
+        SPARSE_VECTOR_NAME,
+        IngestionPipeline,
+        ensure_payload_indexes,
+        point_layout,
     )
-    print("✓ Connected to Qdrant Cloud")
-except Exception as e:
-    print(f"✗ Connection failed: {e}")
-    sys.exit(1)
-
-# Check collection exists
-print(f"\nChecking collection '{QDRANT_COLLECTION_NAME}'...")
-try:
-    info = qdrant_client.get_collection(QDRANT_COLLECTION_NAME)
-    print(f"✓ Collection exists")
-except Exception as e:
-    print(f"✗ Collection not found: {e}")
-    print("\nPlease create the collection in Qdrant Cloud dashboard:")
-    print("  - Go to https://cloud.qdrant.io")
-    print("  - Create collection: textbook_chunks (384 dimensions, Cosine distance)")
-    sys.exit(1)
-
-# Load embedding model
-print("\nLoading FastEmbed model (BAAI/bge-small-en-v1.5)...")
-try:
-    embedding_model = TextEmbedding(model_name="BAAI/bge-small-en-v1.5")
-    print("✓ Model loaded")
-except Exception as e:
-    print(f"✗ Failed to load model: {e}")
-    sys.exit(1)
-
-# Find markdown files
-print(f"\nSearching for markdown files in {DOCS_PATH}...")
-md_files = sorted(list(DOCS_PATH.rglob("*.md")))
-print(f"✓ Found {len(md_files)} markdown files")
-
-if not md_files:
-    print("✗ No markdown files found")
-    sys.exit(1)
-
-print()
-
-# Ingest files
-total_chunks = 0
-total_files = 0
-
-for file_idx, md_file in enumerate(md_files, 1):
+
+    print()
+
+    # Connect to Qdrant
+    print("Connecting to Qdrant Cloud...")
     try:
-        print(f"[{file_idx}/{len(md_files)}] {md_file.relative_to(DOCS_PATH)}")
-        
-        # Read file
-        with open(md_file, "r", encoding="utf-8") as f:
-            content = f.read()
-        
-        if not content.strip():
-            print("  ⚠ Empty file, skipping")
-            continue
-        
-        # Simple chunking (split by paragraphs)
-        chunks = []
-        for para in content.split('\n\n'):
-            para = para.strip()
-            if para and len(para) > 10:  # Only chunks with meaningful content
-                chunks.append(para)
-        
-        if not chunks:
-            print("  ⚠ No content chunks, skipping")
-            continue
-        
-        print(f"  → {len(chunks)} chunks")
-        
-        # Generate embeddings and points
-        points = []
-        for chunk_idx, chunk in enumerate(chunks):
-            try:
-                # Generate embedding
-                embedding = list(embedding_model.embed([chunk]))[0]
-                
-                # Create point
-                point = models.PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=list(embedding),
-                    payload={
-                        "content": chunk[:1000],  # Limit payload size
-                        "source_file": str(md_file.relative_to(DOCS_PATH)),
-                        "chunk_index": chunk_idx,
-                    },
-                )
-                points.append(point)
-            except Exception as e:
-                print(f"    ✗ Chunk {chunk_idx}: {e}")
-                continue
-        
-        if not points:
-            print("  ⚠ No embeddings generated, skipping")
-            continue
-        
-        # Upsert to Qdrant (single batch per file)
-        try:
-            qdrant_client.upsert(
-                collection_name=QDRANT_COLLECTION_NAME,
-                points=points,
-            )
-            print(f"  ✓ Upserted {len(points)} chunks")
-            total_chunks += len(points)
-            total_files += 1
-        except Exception as e:
-            print(f"  ✗ Upsert failed: {e}")
-            continue
-        
-        # Small delay between files to avoid rate limiting
-        time.sleep(0.5)
-    
+        qdrant_client = QdrantClient(
+            url=QDRANT_URL,
+            api_key=QDRANT_API_KEY,
+            timeout=30.0,
+            prefer_grpc=False,
+            check_compatibility=False,
+        )
+        print("✓ Connected to Qdrant Cloud")
     except Exception as e:
-        print(f"  ✗ Error: {e}")
-        continue
-
-print()
-print("=" * 70)
-print(f"✓ Ingestion complete!")
-print(f"  Total files: {total_files}")
-print(f"  Total chunks: {total_chunks}")
-print("=" * 70)
+        print(f"✗ Connection failed: {e}")
+        sys.exit(1)
+
+    # Check collection exists
+    print(f"\nChecking collection '{QDRANT_COLLECTION_NAME}'...")
+    try:
+        info = qdrant_client.get_collection(QDRANT_COLLECTION_NAME)
+        print(f"✓ Collection exists")
+    except Exception as e:
+        print(f"✗ Collection not found: {e}")
+        print("\nCreate it first:")
+        print("  python manage_collection.py create [--quantization scalar] [--on-disk] [--sparse]")
+        sys.exit(1)
+
+    if args.sparse and SPARSE_VECTOR_NAME not in (info.config.params.sparse_vectors or {}):
+        # Qdrant cannot add a sparse vector to an existing (populated) collection
+        print(f"✗ Collection has no sparse vector '{SPARSE_VECTOR_NAME}'")
+        print("\nRecreate it with one (this drops every point), then re-run with --sparse:")
+        print("  python manage_collection.py create --recreate --sparse [--quantization scalar] [--on-disk]")
+        sys.exit(1)
+
+    try:
+        ensure_payload_indexes(qdrant_client, QDRANT_COLLECTION_NAME)
+        print(f"✓ Payload indexes ready ({', '.join(PAYLOAD_INDEX_FIELDS)})")
+    except Exception as e:
+        print(f"⚠ Could not create payload indexes (filtered searches/deletes will be slower): {e}")
+
+    if not args.docs_path.is_dir():
+        print(f"✗ Docs path not found: {args.docs_path}")
+        sys.exit(1)
+
+    layout = point_layout(args.sparse)
+    # Files of the previous run even if its manifest is ignored (--full) or outdated
+    # (other version or layout), so the points of the ones gone now are still deleted
+    stale_files = IngestManifest.stored_files(args.manifest)
+    if args.full:
+        manifest = IngestManifest(QDRANT_COLLECTION_NAME, layout=layout)
+        print("\nFull ingest requested; ignoring manifest")
+    else:
+        manifest = IngestManifest.load(args.manifest, QDRANT_COLLECTION_NAME, layout=layout)
+        if stale_files and not manifest.files:
+            print("\nManifest is outdated (other version or layout); re-ingesting everything")
+        else:
+            print(f"\nManifest: {len(manifest.files)} files previously ingested")
+
+    print("\nRunning ingestion pipeline...")
+    pipeline = IngestionPipeline(
+        qdrant_client,
+        QDRANT_COLLECTION_NAME,
+        args.docs_path,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        upsert_concurrency=args.upsert_concurrency,
+        manifest=manifest,
+        stale_files=stale_files,
+        sparse=args.sparse,
+        chunk_tokens=args.chunk_tokens,
+        chunk_overlap=args.chunk_overlap,
+    )
+    result = pipeline.run()
+    stages = result["stages"]
+    manifest.save(args.manifest)
+
+    if stages["discover"].items == 0:
+        print("✗ No markdown files found")
+        sys.exit(1)
+
+    print()
+    print("=" * 70)
+    print(f"✓ Ingestion complete in {result['wall_seconds']:.2f}s")
+    print(f"  Total files: {stages['discover'].items} ({result['skipped_files']} unchanged, skipped)")
+    print(f"  Chunks embedded + upserted: {stages['upsert'].items}")
+    print(f"  Chunks skipped (unchanged): {result['skipped_chunks']}")
+    print(f"  Stale chunks deleted: {stages['delete'].items}")
+    if result["failed_upserts"]:
+        print(f"  Failed chunks: {result['failed_upserts']}")
+    print("  Stage throughput:")
+    for stage in stages.values():
+        print(f"    {stage.summary()}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 """
 Initialize Neon DB tables.
-Run this script once to create the users table.
+Run this script once to create the users and conversations tables.
 """
 import asyncio
 from sqlalchemy import text
-from src.database.connection import _init_db_if_needed, engine
+from src.database import connection
 from src.database.models import Base
 from src.core.config import settings
 
@@ -15,16 +15,19 @@ async def init_db():
         return
     
     print("Initializing database...")
-    _init_db_if_needed()
+    connection._init_db_if_needed()
     
-    if engine is None:
+    if connection.engine is None:
         print("❌ Database engine not initialized. Check your NEON_DB_URL.")
         return
     
     try:
-        async with engine.begin() as conn:
+        async with connection.engine.begin() as conn:
             # Create all tables
             await conn.run_sync(Base.metadata.create_all)
+            # create_all doesn't add columns to an existing users table
+            for column in ("software_background", "hardware_background"):
+                await conn.execute(text(f"ALTER TABLE users ADD COLUMN IF NOT EXISTS {column} TEXT"))
             print("✅ Database tables created successfully!")
             
             # Verify users table exists
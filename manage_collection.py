@@ -0,0 +1,133 @@
+"""
+Create, migrate or inspect the Qdrant collection for the textbook chunks.
+
+Usage:
+    python manage_collection.py show
+    python manage_collection.py create  [--quantization none|scalar|binary] [--on-disk]
+                                        [--hnsw-m 16] [--hnsw-ef-construct 100] [--sparse]
+                                        [--recreate]
+    python manage_collection.py migrate [same options]
+
+`create` makes a new collection (384-d cosine) with the given layout and the
+keyword payload indexes (source_file, page_path, page_section). `migrate`
+applies the layout to an existing collection in place; Qdrant re-quantizes and
+re-indexes in the background while the collection keeps serving searches.
+The BM25 sparse vector (--sparse) can only be set at creation: switching an
+existing collection to hybrid means `create --recreate --sparse` (which drops
+all points) and a re-ingest with `python ingest_simple.py --sparse`.
+
+A typical low-memory layout is `--quantization scalar --on-disk`: int8 vectors
+in RAM, float32 originals and payloads on disk, searches rescored on the
+originals (QDRANT_OVERSAMPLING / QDRANT_RESCORE). Compare layouts with
+`python -m benchmarks.bench_quantization` against a local Qdrant first.
+"""
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configuration
+QDRANT_URL = os.getenv("QDRANT_URL")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+QDRANT_COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME", "textbook_chunks")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Manage the textbook chunks Qdrant collection.")
+    parser.add_argument("command", choices=("show", "create", "migrate"))
+    parser.add_argument("--collection", default=QDRANT_COLLECTION_NAME,
+                        help=f"Collection name (default: {QDRANT_COLLECTION_NAME})")
+    parser.add_argument("--quantization", choices=("none", "scalar", "binary"), default="scalar",
+                        help="Vector quantization kept in RAM (default: scalar int8)")
+    parser.add_argument("--on-disk", action="store_true",
+                        help="Store float32 originals and payloads on disk")
+    parser.add_argument("--hnsw-m", type=int, default=16, help="HNSW edges per node (default: 16)")
+    parser.add_argument("--hnsw-ef-construct", type=int, default=100,
+                        help="HNSW build-time candidate list size (default: 100)")
+    parser.add_argument("--sparse", action="store_true",
+                        help="Add the BM25 sparse vector used by hybrid retrieval (create only)")
+    parser.add_argument("--recreate", action="store_true",
+                        help="create: delete an existing collection (and all its points) first")
+    return parser.parse_args()
+
+
+def print_description(description: dict):
+    for key, value in description.items():
+        print(f"  {key:<18} {value}")
+
+
+def main():
+    args = parse_args()
+
+    try:
+        from qdrant_client import QdrantClient
+    except ImportError as e:
+        print(f"✗ Failed to import qdrant-client: {e}")
+        sys.exit(1)
+
+    from src.ingestion.collection import (
+        CollectionLayout,
+        create_collection,
+        describe_collection,
+        migrate_collection,
+    )
+
+    try:
+        qdrant_client = QdrantClient(
+            url=QDRANT_URL,
+            api_key=QDRANT_API_KEY,
+            timeout=60.0,
+            prefer_grpc=False,
+            check_compatibility=False,
+        )
+        exists = qdrant_client.collection_exists(args.collection)
+    except Exception as e:
+        print(f"✗ Connection failed: {e}")
+        sys.exit(1)
+
+    if args.command == "show":
+        if not exists:
+            print(f"✗ Collection '{args.collection}' does not exist")
+            sys.exit(1)
+        print(f"Collection '{args.collection}':")
+        print_description(describe_collection(qdrant_client, args.collection))
+        return
+
+    layout = CollectionLayout(
+        quantization=args.quantization,
+        on_disk=args.on_disk,
+        hnsw_m=args.hnsw_m,
+        hnsw_ef_construct=args.hnsw_ef_construct,
+        sparse=args.sparse,
+    )
+    print(f"Layout: {layout}")
+
+    try:
+        if args.command == "create":
+            if exists and args.recreate:
+                qdrant_client.delete_collection(args.collection)
+                print(f"✓ Deleted '{args.collection}'")
+            elif exists:
+                print(f"✗ Collection '{args.collection}' already exists; use `migrate` to change its layout")
+                sys.exit(1)
+            create_collection(qdrant_client, args.collection, layout)
+            print(f"✓ Created '{args.collection}'")
+        else:
+            if not exists:
+                print(f"✗ Collection '{args.collection}' does not exist; use `create`")
+                sys.exit(1)
+            migrate_collection(qdrant_client, args.collection, layout)
+            print(f"✓ Migration of '{args.collection}' started (optimizers run in the background)")
+    except Exception as e:
+        print(f"✗ {args.command} failed: {e}")
+        sys.exit(1)
+
+    print_description(describe_collection(qdrant_client, args.collection))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Multi-worker entry point with one shared embedding model.
+
+Usage:
+    python serve.py --workers 4 [--host 0.0.0.0] [--port 8000]
+
+Running `uvicorn src.main:app --workers N` loads a separate copy of the
+bge-small ONNX model in every worker, so RSS grows by one model per worker.
+This entry point instead starts a single embedding worker process
+(src/services/embedding_server.py) that owns the model and listens on a Unix
+socket, then starts uvicorn with N API workers that send their (micro-batched)
+query embeddings to it via EMBEDDING_SOCKET_PATH.
+
+Pre-forking a loaded model into workers was not used: onnxruntime sessions
+are not safe to share across fork(), and uvicorn spawns its workers anyway.
+
+For single-process development keep using `uvicorn src.main:app --reload`.
+Compare memory/throughput with `python -m benchmarks.bench_workers`.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve the API with N workers and a shared embedding worker.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--socket", default=os.path.join(tempfile.gettempdir(), "book-backend-embed.sock"),
+                        help="Unix socket for the embedding worker")
+    parser.add_argument("--startup-timeout", type=float, default=300.0,
+                        help="Seconds to wait for the embedding worker (model download on first run)")
+    return parser.parse_args()
+
+
+def start_embedding_worker(socket_path: str, timeout: float) -> subprocess.Popen:
+    """Start the embedding worker and wait until its socket accepts connections."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "src.services.embedding_server", "--socket", socket_path],
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Embedding worker exited with code {proc.returncode}")
+        if os.path.exists(socket_path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    probe.connect(socket_path)
+                return proc
+            except OSError:
+                pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"Embedding worker did not start within {timeout:.0f}s")
+
+
+def main():
+    args = parse_args()
+    import uvicorn
+
+    print(f"Starting shared embedding worker on {args.socket}...")
+    embed_proc = start_embedding_worker(args.socket, args.startup_timeout)
+    # Inherited by the uvicorn worker processes
+    os.environ["EMBEDDING_SOCKET_PATH"] = args.socket
+    try:
+        uvicorn.run("src.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        embed_proc.terminate()
+        embed_proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,262 @@
+import json
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
-from src.models.chat import ChatRequest, ChatResponse, Message
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from src.core.log import get_logger
+from src.models.chat import (
+    ChatRequest,
+    ChatResponse,
+    ConversationResponse,
+    Message,
+    PagePrefetchRequest,
+    Source,
+)
+from src.services.conversation_store import ConversationNotFound, get_conversation_store
+from src.services.embedding_service import EmbeddingQueueFull
 from src.services.rag_service import get_rag_service
 
 router = APIRouter()
+log = get_logger("api.chat")
+
+
+def _history_as_dicts(request: ChatRequest):
+    """Legacy client-sent history as dicts (seeds a new server-side conversation)"""
+    if not request.conversation_history:
+        return None
+    return [{"role": m.role, "content": m.content} for m in request.conversation_history]
+
+
+def _is_legacy(request: ChatRequest) -> bool:
+    """
+    Old clients send the transcript without a conversation_id and expect it echoed
+    back; their one-off conversations are not compacted (the prompt uses the tail).
+    """
+    return request.conversation_id is None and request.conversation_history is not None
+
+
+def _turn(query: str, answer: str):
+    return [Message(role="user", content=query), Message(role="assistant", content=answer)]
+
+
+async def _open_conversation(request: ChatRequest):
+    return await get_conversation_store().resolve(
+        request.conversation_id, request.user_id, _history_as_dicts(request)
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     import time
     start_time = time.time()
     try:
-        print(f"Chat request - Query: '{request.query[:50]}...', Page: {request.current_page or 'N/A'}")
+        log.debug("Chat request", extra={"page": request.current_page, "query_chars": len(request.query)})
         rag_service = get_rag_service()
-        
-        # Convert conversation history to dict format for RAG service
-        conv_history = None
-        if request.conversation_history:
-            conv_history = [{"role": m.role, "content": m.content} for m in request.conversation_history]
-        
-        result = await rag_service.generate_response(
-            query=request.query,
-            selected_text=request.selected_text,
-            current_page=request.current_page,
-            conversation_history=conv_history
-        )
-        
-        elapsed = time.time() - start_time
-        print(f"Chat response generated in {elapsed:.2f}s")
-        
-        # Build response with full conversation history
-        new_history = []
-        if request.conversation_history:
-            new_history = request.conversation_history.copy()
-        
-        # Add user message
-        new_history.append(Message(role="user", content=request.query))
-        # Add assistant response
-        new_history.append(Message(role="assistant", content=result['answer']))
-        
+        store = get_conversation_store()
+        conversation = await _open_conversation(request)
+
+        # One turn at a time per conversation, so turns are stored in order
+        async with store.lock(conversation.id):
+            result = await rag_service.generate_response(
+                query=request.query,
+                selected_text=request.selected_text,
+                current_page=request.current_page,
+                conversation_history=conversation.messages,
+                mode=request.mode,
+                hybrid=request.hybrid,
+                conversation_summary=conversation.summary,
+            )
+            if result.get("search_used") != "error":
+                conversation.add_turn(request.query, result['answer'])
+                await store.save(conversation)
+        if not _is_legacy(request):
+            store.schedule_compaction(conversation.id)
+
+        log.info("Chat response generated", extra={
+            "elapsed_ms": round((time.time() - start_time) * 1000),
+            "search_used": result.get("search_used"),
+            "cache_hit": bool(result.get("cache_hit")),
+        })
+
         return ChatResponse(
             answer=result['answer'],
-            sources=[],
-            conversation_history=new_history
+            sources=[Source(**s) for s in result.get('sources', [])],
+            conversation_id=conversation.id,
+            turn=_turn(request.query, result['answer']),
+            conversation_history=(
+                [Message(**m) for m in conversation.messages] if _is_legacy(request) else None
+            ),
         )
+    except ConversationNotFound:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    except EmbeddingQueueFull as e:
+        log.warning("Chat request shed: %s", e, extra={"elapsed_ms": round((time.time() - start_time) * 1000)})
+        raise HTTPException(status_code=503, detail="Server busy, please retry shortly.", headers={"Retry-After": "1"})
     except Exception as e:
-        elapsed = time.time() - start_time
-        print(f"Error in chat endpoint after {elapsed:.2f}s: {type(e).__name__}: {str(e)}")
+        log.error("Error in chat endpoint: %s: %s", type(e).__name__, e,
+                  extra={"elapsed_ms": round((time.time() - start_time) * 1000)})
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Server-Sent Events variant of /chat.
+
+    Emits `token` events ({"delta": str}) as the LLM generates, then a single
+    `final` event with the answer, sources, conversation_id, this turn and
+    timings (ttft_ms / total_ms). Failures are reported as an `error` event.
+    """
+    log.debug("Chat stream request", extra={"page": request.current_page, "query_chars": len(request.query)})
+    try:
+        rag_service = get_rag_service()
+        store = get_conversation_store()
+        conversation = await _open_conversation(request)
+    except ConversationNotFound:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # The conversation lock is held for the whole turn. It is taken here rather
+    # than inside a generator, and close() releases it explicitly: on the shed
+    # path, at the end of the stream, or after a client disconnect (background task)
+    lock = store.lock(conversation.id)
+    await lock.acquire()
+    events = rag_service.stream_response(
+        query=request.query,
+        selected_text=request.selected_text,
+        current_page=request.current_page,
+        conversation_history=conversation.messages,
+        mode=request.mode,
+        hybrid=request.hybrid,
+        conversation_summary=conversation.summary,
+    )
+    closed = False
+
+    async def close():
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+        try:
+            await events.aclose()
+        finally:
+            lock.release()
+
+    # Run up to the "ready" event (query embedded) before responding, so an
+    # overloaded embedder is shed with 503 + Retry-After like /chat
+    try:
+        first = await events.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except EmbeddingQueueFull as e:
+        await close()
+        log.warning("Chat stream request shed: %s", e)
+        raise HTTPException(status_code=503, detail="Server busy, please retry shortly.", headers={"Retry-After": "1"})
+    except BaseException:
+        await close()
+        raise
+
+    async def replay():
+        if first is not None:
+            yield first
+        async for event in events:
+            yield event
+
+    async def event_stream():
+        try:
+            async for event in replay():
+                if event["type"] == "ready":
+                    continue
+                if event["type"] == "token":
+                    yield _sse("token", {"delta": event["delta"]})
+                elif event["type"] == "final":
+                    conversation.add_turn(request.query, event["answer"])
+                    await store.save(conversation)
+                    data = {
+                        "answer": event["answer"],
+                        "sources": event["sources"],
+                        "conversation_id": conversation.id,
+                        "turn": [m.model_dump() for m in _turn(request.query, event["answer"])],
+                        "timings": event["timings"],
+                    }
+                    if _is_legacy(request):
+                        data["conversation_history"] = conversation.messages
+                    yield _sse("final", data)
+                else:
+                    yield _sse("error", {"message": event["message"]})
+        finally:
+            await close()
+        if not _is_legacy(request):
+            store.schedule_compaction(conversation.id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(close),
+    )
+
+
+@router.get("/chat/conversations/stats")
+async def chat_conversation_stats():
+    """Conversation store counters (size, hits, compactions, DB errors)."""
+    return get_conversation_store().stats()
+
+
+@router.get("/chat/conversations/{conversation_id}", response_model=ConversationResponse)
+async def get_conversation(conversation_id: str, user_id: Optional[str] = None):
+    """Server-side state of a conversation (rolling summary + recent messages), e.g. to restore a chat UI."""
+    try:
+        conversation = await get_conversation_store().get_for_user(conversation_id, user_id)
+    except ConversationNotFound:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return ConversationResponse(
+        conversation_id=conversation.id,
+        summary=conversation.summary,
+        messages=[Message(**m) for m in conversation.messages],
+    )
+
+
+@router.post("/chat/page/prefetch", status_code=202)
+async def chat_page_prefetch(request: PagePrefetchRequest):
+    """
+    Warm the per-page chunk cache when a reader opens a page, so questions asked
+    there are searched in memory. Returns immediately; the load runs in the background.
+    """
+    from src.ingestion.pages import normalize_page_path
+    from src.services.page_cache import get_page_cache
+
+    page_path = normalize_page_path(request.current_page)
+    if not page_path:
+        raise HTTPException(status_code=400, detail="current_page does not name a docs page")
+    scheduled = get_page_cache().schedule_prefetch(page_path)
+    return {"page_path": page_path, "status": "scheduled" if scheduled else "cached"}
+
+
+@router.get("/chat/page/stats")
+async def chat_page_stats():
+    """Per-page chunk cache counters (pages, hits, loads)."""
+    from src.services.page_cache import get_page_cache
+
+    return get_page_cache().stats()
+
+
+@router.get("/chat/cache/stats")
+async def chat_cache_stats():
+    """Semantic answer cache counters (hits, misses, evictions, size)."""
+    from src.services.semantic_cache import get_semantic_cache
+
+    return get_semantic_cache().stats()
+
+
+@router.get("/chat/embedding/stats")
+async def chat_embedding_stats():
+    """Query embedding service metrics (queue depth, batch sizes, shedding, cache)."""
+    from src.services.embedding_service import get_query_batcher
+
+    return get_query_batcher().stats()
@@ -0,0 +1,145 @@
+import asyncio
+from pathlib import Path
+from fastapi import APIRouter, HTTPException
+from src.core.config import settings
+from src.core.log import get_logger
+from src.models.job import DocsJobRequest, JobResponse, TranslationJobRequest
+from src.models.personalization import PersonalizationRequest
+from src.services.content_adaptor import split_sections
+from src.services.job_queue import Job, JobQueueFull, get_job_queue
+from src.services.user_profile_service import get_user_profile_service
+from src.api.personalization import content_adaptor
+from src.api.translation import translator
+
+router = APIRouter()
+
+log = get_logger("api.jobs")
+
+
+# --- Handlers (share the routers' Translator / ContentAdaptor and their caches) ---
+
+async def _translate_job(job: Job) -> str:
+    return await translator.translate_content(
+        job.params["chapter_content"], job.params["target_language"], progress=job.report
+    )
+
+
+async def _personalize(job: Job, chapter_content: str, user_id: str, report_sections: bool) -> str:
+    user_profile = await get_user_profile_service().get_profile_or_default(user_id)
+    total = len(split_sections(chapter_content))
+    parts = []
+    async for section in content_adaptor.stream_personalized_content(chapter_content, user_profile):
+        parts.append(section)
+        if report_sections:
+            job.report(len(parts), total, section)
+    return "\n\n".join(parts)
+
+
+async def _personalize_job(job: Job) -> str:
+    return await _personalize(job, job.params["chapter_content"], job.params["user_id"], report_sections=True)
+
+
+async def _docs_job(job: Job) -> dict:
+    """Translate or personalize every docs file; returns {"files": {path: text}, "failed": {path: error}}."""
+    from src.ingestion.pipeline import discover_files
+
+    docs_path = Path(settings.DOCS_PATH)
+    md_files = list(discover_files(docs_path))
+    job.report(0, len(md_files))
+    files, failed = {}, {}
+    semaphore = asyncio.Semaphore(max(1, settings.JOB_DOCS_CONCURRENCY))
+
+    async def run_file(md_file: Path):
+        source_file = str(md_file.relative_to(docs_path))
+        async with semaphore:
+            try:
+                content = await asyncio.to_thread(md_file.read_text, encoding="utf-8")
+                if job.params["operation"] == "translate":
+                    files[source_file] = await translator.translate_content(content, job.params["target_language"])
+                else:
+                    files[source_file] = await _personalize(job, content, job.params["user_id"], report_sections=False)
+            except Exception as e:
+                failed[source_file] = f"{type(e).__name__}: {e}"
+        job.report(len(files) + len(failed), partial=source_file)
+
+    await asyncio.gather(*(run_file(f) for f in md_files))
+    return {"files": files, "failed": failed}
+
+
+_queue = get_job_queue()
+_queue.register("translate", _translate_job)
+_queue.register("personalize", _personalize_job)
+_queue.register("docs", _docs_job)
+
+
+# --- Routes ---
+
+def _response(job: Job) -> JobResponse:
+    return JobResponse(
+        job_id=job.id,
+        kind=job.kind,
+        status=job.status,
+        done=job.done,
+        total=job.total,
+        partial=job.partial,
+        result=job.result,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+async def _submit(kind: str, params: dict) -> JobResponse:
+    try:
+        return _response(await _queue.submit(kind, params))
+    except JobQueueFull as e:
+        log.warning("%s job rejected: %s", kind, e)
+        raise HTTPException(status_code=503, detail="Job queue full, please retry later.", headers={"Retry-After": "30"})
+
+
+@router.post("/jobs/translate", response_model=JobResponse, status_code=202)
+async def submit_translation(request: TranslationJobRequest):
+    """Queue a chapter translation; poll GET /jobs/{job_id} for progress (paragraphs) and the result."""
+    return await _submit("translate", request.model_dump())
+
+
+@router.post("/jobs/personalize", response_model=JobResponse, status_code=202)
+async def submit_personalization(request: PersonalizationRequest):
+    """Queue a chapter personalization; adapted sections appear in `partial` as they finish."""
+    return await _submit("personalize", {"chapter_content": request.chapter_content, "user_id": str(request.user_id)})
+
+
+@router.post("/jobs/docs", response_model=JobResponse, status_code=202)
+async def submit_docs(request: DocsJobRequest):
+    """Queue translation (filling the translation cache) or personalization of the whole docs tree."""
+    if request.operation == "personalize" and request.user_id is None:
+        raise HTTPException(status_code=400, detail="user_id is required to personalize the docs")
+    return await _submit("docs", {
+        "operation": request.operation,
+        "target_language": request.target_language,
+        "user_id": str(request.user_id) if request.user_id else None,
+    })
+
+
+@router.get("/jobs/stats")
+async def job_stats():
+    """Queue depth, running jobs and job counts by status."""
+    return _queue.stats()
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    job = await _queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _response(job)
+
+
+@router.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job (finished jobs are returned unchanged)."""
+    job = await _queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _response(job)
@@ -1,32 +1,61 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+import json
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from src.core.log import get_logger
 from src.services.content_adaptor import ContentAdaptor
 from src.models.personalization import PersonalizationRequest, PersonalizationResponse
 from src.models.user import User
-from src.database.connection import get_db
+from src.services.user_profile_service import get_user_profile_service
 
 router = APIRouter()
+log = get_logger("api.personalization")
 content_adaptor = ContentAdaptor()
 
 
+async def _user_profile(request: PersonalizationRequest) -> User:
+    """The requesting user's stored profile (one cached lookup)"""
+    return await get_user_profile_service().get_profile_or_default(str(request.user_id))
+
+
 @router.post("/personalize", response_model=PersonalizationResponse)
 async def personalize(
     request: PersonalizationRequest,
-    db: AsyncSession = Depends(get_db)
 ):
     """
     Personalize textbook content for a user.
-    Creates a user profile based on user_id.
+    Adapts to the backgrounds stored in the user's profile (see PUT /profile).
     """
-    # Create a basic user profile from the request
-    user_profile = User(
-        username=str(request.user_id),
-        email=None,
-        full_name=None,
-    )
-
     personalized_content = await content_adaptor.personalize_content(
-        request.chapter_content, user_profile
+        request.chapter_content, await _user_profile(request)
     )
     return PersonalizationResponse(personalized_content=personalized_content)
 
+
+@router.post("/personalize/stream")
+async def personalize_stream(
+    request: PersonalizationRequest,
+):
+    """
+    Server-Sent Events variant of /personalize.
+    Emits one `section` event per adapted section, in document order, then `done`.
+    """
+    user_profile = await _user_profile(request)
+
+    async def event_stream():
+        index = 0
+        try:
+            async for section in content_adaptor.stream_personalized_content(
+                request.chapter_content, user_profile
+            ):
+                yield f"event: section\ndata: {json.dumps({'index': index, 'content': section}, ensure_ascii=False)}\n\n"
+                index += 1
+            yield f"event: done\ndata: {json.dumps({'sections': index})}\n\n"
+        except Exception as e:
+            log.error("Error in personalize stream: %s: %s", type(e).__name__, e)
+            yield f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,31 +1,29 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, HTTPException
+from ..core.log import get_logger
 from ..models.user import User, UserProfileUpdate
-from ..database.connection import get_db
+from ..services.user_profile_service import get_user_profile_service
 
 router = APIRouter()
+log = get_logger("api.profile")
+
+@router.get("/profile/stats")
+async def profile_cache_stats():
+    """Profile cache size and hit rate."""
+    return get_user_profile_service().stats()
 
 @router.get("/profile/{user_id}", response_model=User)
-async def get_profile(user_id: str, db: AsyncSession = Depends(get_db)):
-    """Get user profile by user_id (username)."""
-    # Return a default user profile
-    return User(
-        username=user_id,
-        email=None,
-        full_name=None,
-    )
+async def get_profile(user_id: str):
+    """Get user profile by user_id (username); unknown users get an empty profile."""
+    return await get_user_profile_service().get_profile_or_default(user_id)
 
 @router.put("/profile/{user_id}", response_model=User)
 async def update_profile(
     user_id: str,
     profile_update: UserProfileUpdate,
-    db: AsyncSession = Depends(get_db)
 ):
-    """Update user profile (full_name)."""
-    # Return updated user profile with the provided data
-    return User(
-        username=user_id,
-        email=None,
-        full_name=profile_update.full_name,
-    )
-
+    """Create or update a user profile (fields left out are kept)."""
+    try:
+        return await get_user_profile_service().update_profile(user_id, profile_update)
+    except Exception as e:
+        log.error("Profile update failed for %r: %s: %s", user_id, type(e).__name__, e)
+        raise HTTPException(status_code=503, detail="Profile store unavailable")
@@ -10,10 +10,124 @@ load_dotenv(dotenv_path=env_path)
 class Settings:
     PROJECT_NAME: str = "FastAPI RAG Service"
     QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY", "")
+    # Self-hosted Qdrant, used when QDRANT_URL is empty (unset: localhost, not health-checked)
+    QDRANT_HOST: str = os.getenv("QDRANT_HOST", "")
+    QDRANT_PORT: int = int(os.getenv("QDRANT_PORT", "6333"))
+    # ":memory:" runs an in-process Qdrant (empty until something ingests into it; see benchmarks/)
     QDRANT_URL: str = os.getenv("QDRANT_URL", "")
     QDRANT_COLLECTION_NAME: str = os.getenv("QDRANT_COLLECTION_NAME", "textbook_chunks")
+    # Dense search on quantized collections: fetch oversampling x limit candidates on the
+    # quantized vectors, then rescore them on the float32 originals
+    QDRANT_OVERSAMPLING: float = float(os.getenv("QDRANT_OVERSAMPLING", "2.0"))
+    QDRANT_RESCORE: bool = os.getenv("QDRANT_RESCORE", "true").lower() == "true"
+    # HNSW search-time candidate list size (0 = server default)
+    QDRANT_HNSW_EF: int = int(os.getenv("QDRANT_HNSW_EF", "0"))
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    # OpenAI-compatible endpoint (empty = api.openai.com); e.g. benchmarks/fake_openai.py
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")
     NEON_DB_URL: str = os.getenv("NEON_DB_URL", "")
+    # Async Postgres pool. Keep pool_size + overflow well under the Neon compute's connection
+    # limit per worker, and recycle connections before Neon drops idle ones
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "240"))
+    # Ping on every checkout (an extra round trip; only needed if stale connections still show up)
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+    # Connections opened at startup
+    DB_POOL_WARM_CONNECTIONS: int = int(os.getenv("DB_POOL_WARM_CONNECTIONS", "2"))
+    # asyncpg prepared-statement cache per connection (0 for PgBouncer transaction pooling)
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    # Shared OpenAI HTTP connection pool (keep-alive, HTTP/2 when the h2 package is installed)
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "64"))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "32"))
+    OPENAI_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+    # Chat answering mode: "retrieval" grounds answers in Qdrant chunks, "direct" sends the query straight to the LLM
+    RAG_MODE: str = os.getenv("RAG_MODE", "retrieval")
+    # Approximate token budget for retrieved chunks packed into the prompt
+    RAG_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "1200"))
+    # Token budgets of the other prompt sections (see src/services/prompt_builder.py);
+    # the conversation summary is bounded by CONVERSATION_SUMMARY_MAX_TOKENS
+    PROMPT_BUDGET_HISTORY: int = int(os.getenv("PROMPT_BUDGET_HISTORY", "600"))
+    PROMPT_BUDGET_SELECTED_TEXT: int = int(os.getenv("PROMPT_BUDGET_SELECTED_TEXT", "400"))
+    # Longer selections skip relevance trimming (one embedding per sentence) and keep their head
+    PROMPT_SELECTED_TEXT_MAX_SENTENCES: int = int(os.getenv("PROMPT_SELECTED_TEXT_MAX_SENTENCES", "64"))
+    PROMPT_BUDGET_QUERY: int = int(os.getenv("PROMPT_BUDGET_QUERY", "300"))
+    # Hybrid retrieval: fuse dense and BM25 sparse results with reciprocal rank fusion
+    # (needs `python ingest_simple.py --sparse`; can be overridden per request)
+    RAG_HYBRID_ENABLED: bool = os.getenv("RAG_HYBRID_ENABLED", "false").lower() == "true"
+    RAG_RRF_K: int = int(os.getenv("RAG_RRF_K", "60"))
+    # Candidates fetched per retriever before fusion, as a multiple of the requested limit
+    RAG_HYBRID_CANDIDATES: int = int(os.getenv("RAG_HYBRID_CANDIDATES", "4"))
+    # Page-aware retrieval: search the reader's current page and its section first,
+    # widening to the whole collection when the best page match is below this similarity
+    RAG_PAGE_AWARE_ENABLED: bool = os.getenv("RAG_PAGE_AWARE_ENABLED", "true").lower() == "true"
+    RAG_PAGE_MIN_SCORE: float = float(os.getenv("RAG_PAGE_MIN_SCORE", "0.7"))
+    # Per-page chunk cache filled when a reader opens a page
+    PAGE_CACHE_MAX_PAGES: int = int(os.getenv("PAGE_CACHE_MAX_PAGES", "256"))
+    PAGE_CACHE_TTL_SECONDS: float = float(os.getenv("PAGE_CACHE_TTL_SECONDS", "600"))
+    PAGE_PREFETCH_MAX_CHUNKS: int = int(os.getenv("PAGE_PREFETCH_MAX_CHUNKS", "200"))
+    # Query embedding micro-batching (concurrent requests share one TextEmbedding.embed call)
+    EMBED_BATCH_MAX_SIZE: int = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+    EMBED_BATCH_MAX_WAIT_MS: float = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+    # Queued + in-flight queries before new ones are shed with 503
+    EMBED_QUEUE_MAX_SIZE: int = int(os.getenv("EMBED_QUEUE_MAX_SIZE", "1024"))
+    EMBED_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "10000"))
+    EMBED_WORKER_THREADS: int = int(os.getenv("EMBED_WORKER_THREADS", "1"))
+    # Unix socket of the shared embedding worker (set by serve.py); empty = load the model in-process
+    EMBEDDING_SOCKET_PATH: str = os.getenv("EMBEDDING_SOCKET_PATH", "")
+    # Semantic answer cache (reuse answers for near-identical questions)
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    SEMANTIC_CACHE_TTL_SECONDS: float = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000"))
+    # Paragraph-level translation cache (in-memory LRU + SQLite file; empty path disables the disk tier)
+    TRANSLATION_CACHE_PATH: str = os.getenv("TRANSLATION_CACHE_PATH", str(backend_dir / ".translation_cache.sqlite3"))
+    TRANSLATION_CACHE_MEMORY_ENTRIES: int = int(os.getenv("TRANSLATION_CACHE_MEMORY_ENTRIES", "5000"))
+    # Per-service LLM limits (concurrent calls and requests per minute), shared by all requests
+    CHAT_MAX_CONCURRENCY: int = int(os.getenv("CHAT_MAX_CONCURRENCY", "32"))
+    CHAT_REQUESTS_PER_MINUTE: float = float(os.getenv("CHAT_REQUESTS_PER_MINUTE", "600"))
+    TRANSLATION_MAX_CONCURRENCY: int = int(os.getenv("TRANSLATION_MAX_CONCURRENCY", "8"))
+    TRANSLATION_REQUESTS_PER_MINUTE: float = float(os.getenv("TRANSLATION_REQUESTS_PER_MINUTE", "300"))
+    # Small adjacent paragraphs are packed into one LLM call up to these limits
+    TRANSLATION_BATCH_TOKEN_BUDGET: int = int(os.getenv("TRANSLATION_BATCH_TOKEN_BUDGET", "600"))
+    TRANSLATION_BATCH_MAX_PARAGRAPHS: int = int(os.getenv("TRANSLATION_BATCH_MAX_PARAGRAPHS", "8"))
+    TRANSLATION_MAX_RETRIES: int = int(os.getenv("TRANSLATION_MAX_RETRIES", "3"))
+    # Personalization: sections adapted concurrently, cached per (chapter, section, profile bucket)
+    PERSONALIZATION_MAX_CONCURRENCY: int = int(os.getenv("PERSONALIZATION_MAX_CONCURRENCY", "4"))
+    PERSONALIZATION_REQUESTS_PER_MINUTE: float = float(os.getenv("PERSONALIZATION_REQUESTS_PER_MINUTE", "120"))
+    PERSONALIZATION_CACHE_MAX_ENTRIES: int = int(os.getenv("PERSONALIZATION_CACHE_MAX_ENTRIES", "2000"))
+    # Background jobs for long translation / personalization runs (see src/services/job_queue.py).
+    # JOB_STORE: "memory" (per process) or "sqlite" (results survive restarts, unfinished jobs re-run)
+    JOB_STORE: str = os.getenv("JOB_STORE", "memory")
+    JOB_STORE_PATH: str = os.getenv("JOB_STORE_PATH", str(backend_dir / ".jobs.sqlite3"))
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_MAX_PENDING: int = int(os.getenv("JOB_MAX_PENDING", "100"))
+    JOB_MAX_JOBS: int = int(os.getenv("JOB_MAX_JOBS", "1000"))
+    JOB_RESULT_TTL_SECONDS: float = float(os.getenv("JOB_RESULT_TTL_SECONDS", "86400"))
+    # Files processed at the same time by a whole-docs job
+    JOB_DOCS_CONCURRENCY: int = int(os.getenv("JOB_DOCS_CONCURRENCY", "2"))
+    DOCS_PATH: str = os.getenv("DOCS_PATH", str(backend_dir.parent / "my-ai-book" / "docs"))
+    # In-process read-through cache of user profiles (updates from other workers show up after the TTL)
+    PROFILE_CACHE_MAX_ENTRIES: int = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "10000"))
+    PROFILE_CACHE_TTL_SECONDS: float = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "300"))
+    # Server-side chat conversations: "memory" (per process LRU) or "postgres" (write-through to Neon)
+    CONVERSATION_STORE: str = os.getenv("CONVERSATION_STORE", "memory")
+    CONVERSATION_CACHE_MAX_ENTRIES: int = int(os.getenv("CONVERSATION_CACHE_MAX_ENTRIES", "10000"))
+    CONVERSATION_TTL_SECONDS: float = float(os.getenv("CONVERSATION_TTL_SECONDS", "86400"))
+    # Messages kept verbatim in the prompt; older turns are folded into a rolling summary
+    CONVERSATION_RECENT_MESSAGES: int = int(os.getenv("CONVERSATION_RECENT_MESSAGES", "6"))
+    CONVERSATION_SUMMARY_MAX_TOKENS: int = int(os.getenv("CONVERSATION_SUMMARY_MAX_TOKENS", "200"))
+    # Logging (src/core/log.py): level, "json" lines or "text", share of DEBUG records kept,
+    # and records buffered for the writer thread before new ones are dropped
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_DEBUG_SAMPLE_RATE: float = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Prometheus metrics on /metrics (request latency, stage spans, LLM tokens; needs prometheus-client)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # How often the background validator re-checks OpenAI / Qdrant / Neon connectivity
+    CONFIG_CHECK_INTERVAL_SECONDS: float = float(os.getenv("CONFIG_CHECK_INTERVAL_SECONDS", "300"))
     # Allow frontend on localhost:3000 (and 127.0.0.1:3000) to talk to FastAPI on :8000
     # You can override with CORS_ORIGINS="http://localhost:3000,http://127.0.0.1:3000,https://your-domain.com"
     CORS_ORIGINS: list[str] = os.getenv(
@@ -23,9 +137,10 @@ class Settings:
 
 settings = Settings()
 
-# Log API key status (without exposing the actual key)
+# Log API key status (never the key itself; /api/v1/config/check shows a preview)
+from src.core.log import get_logger  # noqa: E402 (needs `settings` above)
+
 if settings.OPENAI_API_KEY:
-    key_preview = settings.OPENAI_API_KEY[:8] + "..." + settings.OPENAI_API_KEY[-4:] if len(settings.OPENAI_API_KEY) > 12 else "***"
-    print(f"[OK] OpenAI API key loaded: {key_preview}")
+    get_logger("config").info("OpenAI API key loaded")
 else:
-    print("[WARN] Warning: OPENAI_API_KEY not found in environment. Please add it to your .env file.")
\ No newline at end of file
+    get_logger("config").warning("OPENAI_API_KEY not found in environment. Please add it to your .env file.")
\ No newline at end of file
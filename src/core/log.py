@@ -0,0 +1,189 @@
+"""
+Structured, non-blocking logging.
+
+    from src.core.log import get_logger
+    log = get_logger("rag")
+    log.info("Retrieved chunks", extra={"chunks": 5, "scope": "page"})
+    log.debug("Query received", extra={"query_chars": len(query)})  # sampled, see LOG_DEBUG_SAMPLE_RATE
+
+Records go through a QueueHandler, so callers only enqueue them. A background
+QueueListener thread formats them and writes them to stdout, as JSON lines
+(LOG_FORMAT=json) or as text with key=value fields (LOG_FORMAT=text).
+
+Every record carries the id of the HTTP request that produced it.
+RequestIdMiddleware takes it from the X-Request-ID header or generates one,
+and echoes it on the response. DEBUG records are sampled at
+LOG_DEBUG_SAMPLE_RATE. A call can pick its own rate with
+extra={"sample_rate": 0.1}.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+from typing import Optional
+
+_ROOT = "app"
+_request_id: contextvars.ContextVar = contextvars.ContextVar("request_id", default="-")
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id", "sample_rate"}
+
+
+def get_request_id() -> str:
+    return _request_id.get()
+
+
+def set_request_id(request_id: str):
+    """Bind a correlation id to the current task (and tasks it spawns); returns a reset token."""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+def _fields(record: logging.LogRecord) -> dict:
+    return {k: v for k, v in vars(record).items() if k not in _RESERVED}
+
+
+class _ContextFilter(logging.Filter):
+    """Attach the request id and drop unsampled DEBUG records (runs in the calling thread)."""
+
+    def __init__(self, debug_sample_rate: float):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample_rate", None)
+        if rate is None:
+            rate = self.debug_sample_rate if record.levelno <= logging.DEBUG else 1.0
+        if rate < 1.0 and random.random() >= rate:
+            return False
+        record.request_id = _request_id.get()
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block the event loop on logging; shed records instead
+            _QueueHandler.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Leave formatting to the listener thread; only make args safe to pass across threads
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name[len(_ROOT) + 1:] or record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        entry.update(_fields(record))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        fields = " ".join(f"{k}={v}" for k, v in _fields(record).items())
+        line = (
+            f"{time.strftime('%H:%M:%S', time.localtime(record.created))} "
+            f"{record.levelname:<7} {record.name[len(_ROOT) + 1:] or record.name} "
+            f"[{getattr(record, 'request_id', '-')}] {record.getMessage()}"
+        )
+        if fields:
+            line += f" {fields}"
+        if record.exc_text:
+            line += f"\n{record.exc_text}"
+        return line
+
+
+def configure_logging():
+    """Install the queue handler and start the writer thread (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return
+    from src.core.config import settings
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if settings.LOG_FORMAT.lower() == "json" else TextFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(_ContextFilter(settings.LOG_DEBUG_SAMPLE_RATE))
+
+    root = logging.getLogger(_ROOT)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    root.handlers = [handler]
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=False)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    configure_logging()
+    return logging.getLogger(f"{_ROOT}.{name}")
+
+
+class RequestIdMiddleware:
+    """ASGI middleware binding a correlation id to each HTTP request (X-Request-ID in and out)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = set_request_id(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_request_id(token)
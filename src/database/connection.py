@@ -1,11 +1,69 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from src.core.config import settings
+from src.core.log import get_logger
+from src.services.metrics import span
 
 # Lazy initialization - don't create engine at import time to prevent hanging
 engine = None
 AsyncSessionLocal = None
 
+log = get_logger("db")
+
+
+class PoolStats:
+    """Checkout wait times, timeouts and new connections of the engine's pool."""
+
+    def __init__(self, window: int = 1000):
+        self.waits = deque(maxlen=window)  # seconds, most recent checkouts
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.max_wait = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        self.checkouts += 1
+        self.waits.append(seconds)
+        self.max_wait = max(self.max_wait, seconds)
+        if timed_out:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        waits = sorted(self.waits)
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "wait_ms_p50": round(waits[len(waits) // 2] * 1000, 2) if waits else 0.0,
+            "wait_ms_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 2) if waits else 0.0,
+            "wait_ms_max": round(self.max_wait * 1000, 2),
+        }
+
+
+pool_stats = PoolStats()
+
+
+class _TimedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_stats.record_wait(time.perf_counter() - start)
+        return connection
+
 
 def _make_async_url(url: str) -> tuple[str, dict]:
     """
@@ -76,14 +134,33 @@ def _init_db_if_needed():
         return
     
     try:
-        # Create engine with settings to prevent hanging
+        # asyncpg caches prepared statements per connection; set the size to 0 when
+        # going through a pooler that can't keep them (PgBouncer transaction mode)
+        connect_args["statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+        if settings.DB_STATEMENT_CACHE_SIZE == 0:
+            separator = "&" if "?" in async_db_url else "?"
+            async_db_url += f"{separator}prepared_statement_cache_size=0"
+
+        # Neon closes idle connections and suspends idle computes, so connections are
+        # recycled before that happens instead of pinging on every checkout
         engine = create_async_engine(
             async_db_url,
             echo=False,  # Disable echo to reduce startup noise
-            pool_pre_ping=True,  # Verify connections before using
+            poolclass=_TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            # Reuse the most recently returned connection so surplus ones go idle and get recycled
+            pool_use_lifo=True,
             connect_args=connect_args,  # Pass SSL and other connection args
         )
 
+        @event.listens_for(engine.sync_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            pool_stats.connects += 1
+
         # Create a sessionmaker bound to the engine for async sessions
         AsyncSessionLocal = sessionmaker(
             autocommit=False,
@@ -95,19 +172,69 @@ def _init_db_if_needed():
 
     except Exception as e:
         # If engine creation fails, log but don't crash
-        print(f"Warning: Could not initialize database connection: {e}")
-        print("Database features will be disabled. Set NEON_DB_URL to enable.")
+        log.warning("Could not initialize database connection; database features disabled (check NEON_DB_URL): %s", e)
 
 
-async def get_db():
-    """Get database session, initializing connection if needed."""
+def _require_session_factory():
     _init_db_if_needed()
-    
+
     if AsyncSessionLocal is None:
         raise RuntimeError(
             "Async database session is not configured. "
             "Please set a valid NEON_DB_URL (e.g. postgresql://... from Neon) in your .env file."
         )
+    return AsyncSessionLocal
+
+
+@asynccontextmanager
+async def db_session():
+    """
+    Open a session only where a route actually needs the database:
+        async with db_session() as session: ...
+    A pooled connection is checked out on the first query, not on entry.
+    """
+    with span("db.session"):
+        async with _require_session_factory()() as session:
+            yield session
+
 
-    async with AsyncSessionLocal() as session:
+async def get_db():
+    """Get database session, initializing connection if needed (FastAPI dependency)."""
+    async with db_session() as session:
         yield session
+
+
+async def warm_pool(connections: int = None):
+    """Open `connections` pooled connections (default DB_POOL_WARM_CONNECTIONS) so first requests skip the TLS handshake."""
+    _init_db_if_needed()
+    if engine is None:
+        raise RuntimeError("Database engine not initialized (check NEON_DB_URL)")
+    connections = min(settings.DB_POOL_WARM_CONNECTIONS if connections is None else connections, settings.DB_POOL_SIZE)
+
+    # Open them concurrently (so each is a distinct connection), then return them to the pool
+    opened = await asyncio.gather(
+        *(engine.connect().start() for _ in range(connections)), return_exceptions=True
+    )
+    errors = [c for c in opened if isinstance(c, Exception)]
+    for conn in opened:
+        if not isinstance(conn, Exception):
+            await conn.close()
+    if errors:
+        raise errors[0]
+
+
+def pool_status() -> dict:
+    """Current pool occupancy plus checkout wait statistics."""
+    if engine is None:
+        return {"configured": bool(settings.NEON_DB_URL), "initialized": False}
+    pool = engine.pool
+    return {
+        "configured": True,
+        "initialized": True,
+        "pool_size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        **pool_stats.snapshot(),
+    }
@@ -1,7 +1,7 @@
 """
 SQLAlchemy database models for Neon DB.
 """
-from sqlalchemy import Column, String
+from sqlalchemy import JSON, Column, DateTime, Integer, String, Text
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -14,7 +14,24 @@ class User(Base):
     username = Column(String(50), primary_key=True, index=True)
     email = Column(String(100), unique=True, index=True, nullable=True)
     full_name = Column(String(100), nullable=True)
-    
+    # Read by personalization (through the cached UserProfileService)
+    software_background = Column(Text, nullable=True)
+    hardware_background = Column(Text, nullable=True)
+
     def __repr__(self):
         return f"<User(username='{self.username}', email='{self.email}')>"
 
+
+class Conversation(Base):
+    """Chat conversation: rolling summary of older turns plus the recent messages."""
+    __tablename__ = "conversations"
+
+    id = Column(String(64), primary_key=True)
+    user_id = Column(String(50), nullable=True, index=True)
+    summary = Column(Text, nullable=False, default="")
+    messages = Column(JSON, nullable=False, default=list)
+    summarized_messages = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<Conversation(id='{self.id}', messages={len(self.messages or [])})>"
@@ -0,0 +1,330 @@
+"""
+Structure-aware chunker for Docusaurus markdown.
+
+The document is parsed line by line into blocks (paragraphs, lists, tables,
+fenced code, admonitions) under their heading path; frontmatter and MDX
+import/export lines are dropped. Blocks are packed into chunks of at most
+`max_tokens`, a new heading section starts a new chunk (unless the current one
+is still tiny), consecutive chunks of one section overlap by up to
+`overlap_tokens`, and blocks larger than a chunk are split along their own
+structure (sentences, list items, table rows with the header repeated, code
+lines inside re-opened fences).
+
+Token counts are approximate (words + punctuation marks, long words counted per
+12 characters and CJK per character), which tracks the WordPiece count of
+bge-small closely for English prose, stays bounded for identifiers, URLs and
+non-Latin text, and keeps chunking the whole docs tree well under a second.
+Blocks too large even for their own structure are cut on these same token
+boundaries.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from src.ingestion.pages import parse_frontmatter
+
+DEFAULT_MAX_TOKENS = 300
+DEFAULT_OVERLAP_TOKENS = 40
+# Chunks smaller than this absorb the next heading section instead of standing alone
+DEFAULT_MIN_TOKENS = 48
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"[{_CJK}]|[^\W{_CJK}]{{1,12}}|[^\w\s]")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_FENCE_RE = re.compile(r"^\s*(`{3,}|~{3,})")
+_ADMONITION_RE = re.compile(r"^\s*(:{3,})\s*([A-Za-z]*)")
+_LIST_ITEM_RE = re.compile(r"^(\s*)(?:[-*+]|\d+[.)])\s+")
+_MDX_STATEMENT_RE = re.compile(r"^(?:import|export)\s")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def count_tokens(text: str) -> int:
+    return len(_TOKEN_RE.findall(text))
+
+
+@dataclass
+class Block:
+    kind: str  # "heading", "paragraph", "list", "table", "code", "admonition"
+    text: str
+    headings: List[str]
+    tokens: int = 0
+
+    def __post_init__(self):
+        if not self.tokens:
+            self.tokens = count_tokens(self.text)
+
+
+@dataclass
+class TextChunk:
+    text: str
+    headings: List[str] = field(default_factory=list)
+    tokens: int = 0
+
+
+# --- Parsing ----------------------------------------------------------------
+
+
+def parse_blocks(content: str) -> List[Block]:
+    """Split a markdown document into structural blocks with their heading paths."""
+    meta, body = parse_frontmatter(content)
+    lines = body.split("\n")
+    stack: List[Tuple[int, str]] = []
+    if meta.get("title"):
+        # Docusaurus renders the frontmatter title as the page's H1
+        stack.append((1, meta["title"]))
+
+    blocks: List[Block] = []
+    i, n = 0, len(lines)
+
+    def path() -> List[str]:
+        return [title for _, title in stack]
+
+    while i < n:
+        line = lines[i]
+        stripped = line.strip()
+
+        if not stripped or _MDX_STATEMENT_RE.match(line):
+            i += 1
+            continue
+
+        fence = _FENCE_RE.match(line)
+        if fence:
+            marker = fence.group(1)
+            end = i + 1
+            while end < n and not lines[end].strip().startswith(marker):
+                end += 1
+            blocks.append(Block("code", "\n".join(lines[i:end + 1]).strip("\n"), path()))
+            i = end + 1
+            continue
+
+        admonition = _ADMONITION_RE.match(line)
+        if admonition and admonition.group(2):
+            colons = admonition.group(1)
+            end = i + 1
+            while end < n and lines[end].strip() != colons:
+                end += 1
+            blocks.append(Block("admonition", "\n".join(lines[i:end + 1]).strip(), path()))
+            i = end + 1
+            continue
+
+        heading = _HEADING_RE.match(stripped)
+        if heading:
+            level = len(heading.group(1))
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, heading.group(2)))
+            blocks.append(Block("heading", stripped, path()))
+            i += 1
+            continue
+
+        if stripped.startswith("|"):
+            end = i
+            while end < n and lines[end].strip().startswith("|"):
+                end += 1
+            blocks.append(Block("table", "\n".join(lines[i:end]), path()))
+            i = end
+            continue
+
+        if _LIST_ITEM_RE.match(line):
+            end = i + 1
+            while end < n:
+                current = lines[end]
+                if current.strip():
+                    if _LIST_ITEM_RE.match(current) or current.startswith((" ", "\t")):
+                        end += 1
+                        continue
+                    break
+                # Blank line: the list continues only if an item or indented line follows
+                following = end + 1
+                while following < n and not lines[following].strip():
+                    following += 1
+                if following < n and (
+                    _LIST_ITEM_RE.match(lines[following]) or lines[following].startswith((" ", "\t"))
+                ):
+                    end = following
+                    continue
+                break
+            blocks.append(Block("list", "\n".join(lines[i:end]).rstrip(), path()))
+            i = end
+            continue
+
+        end = i + 1
+        while end < n:
+            current = lines[end]
+            if (
+                not current.strip()
+                or _FENCE_RE.match(current)
+                or _HEADING_RE.match(current.strip())
+                or _LIST_ITEM_RE.match(current)
+                or current.strip().startswith("|")
+                or (_ADMONITION_RE.match(current) and _ADMONITION_RE.match(current).group(2))
+            ):
+                break
+            end += 1
+        blocks.append(Block("paragraph", "\n".join(lines[i:end]).strip(), path()))
+        i = end
+
+    return blocks
+
+
+# --- Splitting oversized blocks ---------------------------------------------
+
+
+def _split_tokens(text: str, budget: int) -> List[str]:
+    """Cut text into pieces of at most `budget` tokens, at token boundaries of count_tokens()."""
+    starts = [match.start() for match in _TOKEN_RE.finditer(text)]
+    pieces = []
+    for j in range(0, len(starts), budget):
+        end = starts[j + budget] if j + budget < len(starts) else len(text)
+        pieces.append(text[starts[j]:end].strip())
+    return pieces
+
+
+def _pack_pieces(pieces: List[str], max_tokens: int, joiner: str, prefix: str = "", suffix: str = "") -> List[str]:
+    """Greedily join pieces into texts of at most max_tokens (wrapped in prefix/suffix)."""
+    overhead = count_tokens(prefix) + count_tokens(suffix)
+    budget = max(1, max_tokens - overhead)
+    out, current, used = [], [], 0
+    for piece in pieces:
+        cost = count_tokens(piece)
+        if current and used + cost > budget:
+            out.append(prefix + joiner.join(current) + suffix)
+            current, used = [], 0
+        if cost > budget:
+            # A single piece (a very long line, sentence or URL) still too large: split on tokens
+            out.extend(prefix + part + suffix for part in _split_tokens(piece, budget))
+            continue
+        current.append(piece)
+        used += cost
+    if current:
+        out.append(prefix + joiner.join(current) + suffix)
+    return out
+
+
+def _split_block(block: Block, max_tokens: int) -> List[Block]:
+    if block.tokens <= max_tokens:
+        return [block]
+
+    lines = block.text.split("\n")
+    if block.kind == "code" and len(lines) >= 2:
+        opening = lines[0]
+        closed = _FENCE_RE.match(lines[-1]) is not None
+        closing = lines[-1].strip() if closed else _FENCE_RE.match(opening).group(1)
+        body = lines[1:-1] if closed else lines[1:]
+        texts = _pack_pieces(body, max_tokens, "\n", opening + "\n", "\n" + closing)
+    elif block.kind == "admonition" and len(lines) >= 2:
+        texts = _pack_pieces(lines[1:-1], max_tokens, "\n", lines[0] + "\n", "\n" + lines[-1])
+    elif block.kind == "table" and len(lines) > 2:
+        texts = _pack_pieces(lines[2:], max_tokens, "\n", "\n".join(lines[:2]) + "\n")
+    elif block.kind == "list":
+        items, current = [], []
+        indent = len(_LIST_ITEM_RE.match(lines[0]).group(1)) if _LIST_ITEM_RE.match(lines[0]) else 0
+        for line in lines:
+            match = _LIST_ITEM_RE.match(line)
+            if match and len(match.group(1)) <= indent and current:
+                items.append("\n".join(current))
+                current = []
+            current.append(line)
+        if current:
+            items.append("\n".join(current))
+        texts = _pack_pieces(items, max_tokens, "\n")
+    else:
+        texts = _pack_pieces(_SENTENCE_RE.split(block.text), max_tokens, " ")
+    return [Block(block.kind, text, block.headings) for text in texts]
+
+
+def _overlap_tail(blocks: List[Block], overlap_tokens: int) -> List[Block]:
+    """Trailing blocks (or trailing sentences of a prose block) within the overlap budget."""
+    if overlap_tokens <= 0:
+        return []
+    tail, used = [], 0
+    for block in reversed(blocks):
+        if block.kind == "heading":
+            break
+        if used + block.tokens <= overlap_tokens:
+            tail.insert(0, block)
+            used += block.tokens
+            continue
+        if block.kind == "paragraph":
+            sentences = []
+            for sentence in reversed(_SENTENCE_RE.split(block.text)):
+                cost = count_tokens(sentence)
+                if used + cost > overlap_tokens:
+                    break
+                sentences.insert(0, sentence)
+                used += cost
+            if sentences:
+                tail.insert(0, Block("paragraph", " ".join(sentences), block.headings))
+        break
+    return tail
+
+
+# --- Packing ----------------------------------------------------------------
+
+
+def chunk_markdown(
+    content: str,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    min_tokens: int = DEFAULT_MIN_TOKENS,
+) -> List[TextChunk]:
+    """Chunk a markdown document into token-bounded, overlapping, heading-scoped chunks."""
+    max_tokens = max(16, max_tokens)
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+
+    chunks: List[TextChunk] = []
+    current: List[Block] = []
+    used = 0
+    headings: Optional[List[str]] = None
+
+    def flush():
+        if not any(b.kind != "heading" for b in current):
+            return
+        text = "\n\n".join(b.text for b in current)
+        previous = chunks[-1] if chunks else None
+        if used < min_tokens and previous is not None and previous.tokens + used <= max_tokens:
+            # Too small to stand alone (e.g. a short trailing section): append to the previous chunk
+            previous.text += "\n\n" + text
+            previous.tokens += used
+            return
+        chunks.append(TextChunk(text, list(headings or []), used))
+
+    def has_content() -> bool:
+        return any(b.kind != "heading" for b in current)
+
+    # Leave room for the overlap carried into the next chunk
+    piece_tokens = max_tokens - overlap_tokens
+    for block in parse_blocks(content):
+        if block.kind == "heading":
+            if has_content() and used >= min_tokens:
+                flush()
+                current, used = [], 0
+            if not current:
+                headings = block.headings
+            current.append(block)
+            used += block.tokens
+            continue
+
+        # Headings waiting for their first content count against that chunk's budget
+        budget = piece_tokens if has_content() else min(piece_tokens, max_tokens - used)
+        for piece in _split_block(block, max(1, budget)):
+            # Headings alone never start a chunk of their own
+            if has_content() and used + piece.tokens > max_tokens:
+                # Headings at the end of the full chunk move to the next one
+                trailing = []
+                while current[-1].kind == "heading":
+                    trailing.insert(0, current.pop())
+                used -= sum(b.tokens for b in trailing)
+                flush()
+                current = trailing or _overlap_tail(current, overlap_tokens)
+                used = sum(b.tokens for b in current)
+                if used + piece.tokens > max_tokens:
+                    current, used = [], 0
+                headings = piece.headings
+            if not current:
+                headings = piece.headings
+            current.append(piece)
+            used += piece.tokens
+
+    flush()
+    return chunks
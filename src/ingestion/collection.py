@@ -0,0 +1,120 @@
+"""
+Collection layout for the textbook chunks: vector storage, quantization and HNSW
+settings. Used by manage_collection.py (create / migrate) and the benchmarks.
+
+Quantized layouts keep the compressed vectors in RAM and can move the float32
+originals (and payloads) to disk; searches oversample on the quantized vectors
+and rescore the candidates on the originals (see QDRANT_OVERSAMPLING).
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from qdrant_client import models
+
+from src.ingestion.pipeline import EMBEDDING_DIM, SPARSE_VECTOR_NAME, ensure_payload_indexes
+
+QUANTIZATION_KINDS = ("none", "scalar", "binary")
+
+
+@dataclass
+class CollectionLayout:
+    quantization: str = "none"   # "none", "scalar" (int8) or "binary"
+    on_disk: bool = False        # float32 originals and payloads on disk (memmap)
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    sparse: bool = False         # named BM25 sparse vector for hybrid retrieval
+
+    def __post_init__(self):
+        if self.quantization not in QUANTIZATION_KINDS:
+            raise ValueError(f"quantization must be one of {QUANTIZATION_KINDS}, got {self.quantization!r}")
+
+    def quantization_config(self) -> Optional[models.QuantizationConfig]:
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True,
+                )
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    def hnsw_config(self) -> models.HnswConfigDiff:
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def sparse_vectors_config(self) -> Optional[dict]:
+        if not self.sparse:
+            return None
+        return {SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+
+
+def create_collection(qdrant_client, collection_name: str, layout: CollectionLayout):
+    """Create the collection with `layout` and its payload indexes."""
+    qdrant_client.create_collection(
+        collection_name=collection_name,
+        vectors_config=models.VectorParams(
+            size=EMBEDDING_DIM,
+            distance=models.Distance.COSINE,
+            on_disk=layout.on_disk,
+        ),
+        sparse_vectors_config=layout.sparse_vectors_config(),
+        hnsw_config=layout.hnsw_config(),
+        quantization_config=layout.quantization_config(),
+        on_disk_payload=layout.on_disk,
+    )
+    ensure_payload_indexes(qdrant_client, collection_name)
+
+
+def has_sparse_vector(qdrant_client, collection_name: str) -> bool:
+    info = qdrant_client.get_collection(collection_name)
+    return SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
+
+
+def migrate_collection(qdrant_client, collection_name: str, layout: CollectionLayout):
+    """
+    Apply `layout` to an existing collection in place. Qdrant rebuilds the
+    quantized vectors / HNSW graph in the background; the collection stays
+    searchable (status "yellow" until the optimizers finish).
+
+    The BM25 sparse vector cannot be added to an existing collection: a
+    `sparse` layout on a collection without one raises ValueError (recreate
+    the collection instead).
+    """
+    if layout.sparse and not has_sparse_vector(qdrant_client, collection_name):
+        raise ValueError(
+            f"collection '{collection_name}' has no sparse vector '{SPARSE_VECTOR_NAME}' and Qdrant "
+            "cannot add one in place; recreate it with `python manage_collection.py create --recreate --sparse` "
+            "and re-ingest with `python ingest_simple.py --sparse`"
+        )
+    qdrant_client.update_collection(
+        collection_name=collection_name,
+        vectors_config={"": models.VectorParamsDiff(on_disk=layout.on_disk, hnsw_config=layout.hnsw_config())},
+        hnsw_config=layout.hnsw_config(),
+        quantization_config=layout.quantization_config() or models.Disabled.DISABLED,
+        collection_params=models.CollectionParamsDiff(on_disk_payload=layout.on_disk),
+    )
+    ensure_payload_indexes(qdrant_client, collection_name)
+
+
+def describe_collection(qdrant_client, collection_name: str) -> dict:
+    """Summary of the collection's current layout and size."""
+    info = qdrant_client.get_collection(collection_name)
+    params = info.config.params
+    vectors = params.vectors
+    dense = vectors.get("") if isinstance(vectors, dict) else vectors
+    return {
+        "status": str(info.status),
+        "points": info.points_count,
+        "indexed_vectors": info.indexed_vectors_count,
+        "size": dense.size if dense else None,
+        "distance": str(dense.distance) if dense else None,
+        "vectors_on_disk": bool(dense and dense.on_disk),
+        "payload_on_disk": bool(params.on_disk_payload),
+        "quantization": type(info.config.quantization_config).__name__ if info.config.quantization_config else "none",
+        "hnsw_m": info.config.hnsw_config.m,
+        "hnsw_ef_construct": info.config.hnsw_config.ef_construct,
+        "sparse_vectors": sorted((params.sparse_vectors or {}).keys()),
+        "payload_indexes": sorted((info.payload_schema or {}).keys()),
+    }
@@ -0,0 +1,107 @@
+"""
+Ingestion manifest: content hashes of every ingested file and chunk.
+
+Lets a re-run skip unchanged files, embed only new/changed chunks and delete
+points whose chunks disappeared. Stored as JSON next to the ingestion script.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.core.log import get_logger
+
+MANIFEST_VERSION = 1
+
+log = get_logger("ingestion")
+
+
+def content_hash(data) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def chunk_keys(chunks: List[str]) -> List[str]:
+    """
+    Stable key per chunk: the content hash, suffixed with an occurrence counter
+    so identical paragraphs within one file still get distinct keys.
+    """
+    seen: Dict[str, int] = {}
+    keys = []
+    for text in chunks:
+        digest = content_hash(text)[:32]
+        count = seen.get(digest, 0)
+        seen[digest] = count + 1
+        keys.append(digest if count == 0 else f"{digest}-{count}")
+    return keys
+
+
+class IngestManifest:
+    """
+    {"version": 1, "collection": str, "layout": str,
+     "files": {source_file: {"hash": str, "chunks": {chunk_key: chunk_index}}}}
+
+    `layout` describes how points were built (e.g. which vectors they carry);
+    a manifest written with a different layout is ignored, forcing a full re-ingest.
+    """
+
+    def __init__(self, collection_name: str, files: Optional[dict] = None, layout: str = "dense"):
+        self.collection_name = collection_name
+        self.layout = layout
+        self.files: Dict[str, dict] = files or {}
+
+    @classmethod
+    def load(cls, path: Path, collection_name: str, layout: str = "dense") -> "IngestManifest":
+        path = Path(path)
+        if not path.exists():
+            return cls(collection_name, layout=layout)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("Could not read manifest %s: %s; doing a full ingest", path, e)
+            return cls(collection_name, layout=layout)
+        if (
+            data.get("version") != MANIFEST_VERSION
+            or data.get("collection") != collection_name
+            or data.get("layout", "dense") != layout
+        ):
+            return cls(collection_name, layout=layout)
+        return cls(collection_name, data.get("files", {}), layout=layout)
+
+    @staticmethod
+    def stored_files(path: Path) -> List[str]:
+        """Source files recorded in a manifest file, whatever its version, collection or layout."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return list(json.load(f).get("files", {}))
+        except (OSError, ValueError, AttributeError):
+            return []
+
+    def save(self, path: Path):
+        path = Path(path)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "collection": self.collection_name,
+                    "layout": self.layout,
+                    "files": self.files,
+                },
+                f,
+                indent=1,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, path)
+
+    def get(self, source_file: str) -> Optional[dict]:
+        return self.files.get(source_file)
+
+    def set(self, source_file: str, file_hash: str, chunks: Dict[str, int]):
+        self.files[source_file] = {"hash": file_hash, "chunks": chunks}
+
+    def remove(self, source_file: str) -> Optional[dict]:
+        return self.files.pop(source_file, None)
@@ -0,0 +1,72 @@
+"""
+Page identity shared by ingestion and retrieval.
+
+Docs files ("module-1/01-intro.md") and the reader's current page
+("/docs/module-1/intro", full URLs, anchors) are normalized to the same
+page path ("module-1/intro"), following Docusaurus routing rules: number
+prefixes, extensions and index/README file names are dropped, and a
+frontmatter `id` / `slug` overrides the file name.
+"""
+import re
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+_NUMBER_PREFIX_RE = re.compile(r"^\d+[-_.\s]+")
+_FRONTMATTER_RE = re.compile(r"\A---\s*\n(.*?)\n---\s*(?:\n|\Z)", re.DOTALL)
+_DOC_EXTENSIONS = (".md", ".mdx")
+_INDEX_NAMES = ("index", "readme")
+
+
+def parse_frontmatter(content: str) -> Tuple[Dict[str, str], str]:
+    """Split YAML frontmatter (flat `key: value` lines only) from the document body."""
+    match = _FRONTMATTER_RE.match(content)
+    if not match:
+        return {}, content
+    meta = {}
+    for line in match.group(1).splitlines():
+        key, sep, value = line.partition(":")
+        if sep and key.strip() and not key.startswith((" ", "\t", "#")):
+            meta[key.strip()] = value.strip().strip("'\"")
+    return meta, content[match.end():]
+
+
+def normalize_page_path(path: Optional[str]) -> str:
+    """Normalize a docs file path, route or URL to a page path ("" if empty)."""
+    if not path:
+        return ""
+    path = unquote(urlsplit(path.strip().replace("\\", "/")).path)
+    segments = [s for s in path.split("/") if s and s != "."]
+    if "docs" in segments:
+        segments = segments[segments.index("docs") + 1:]
+    if not segments:
+        return ""
+
+    last = segments[-1]
+    for ext in _DOC_EXTENSIONS:
+        if last.lower().endswith(ext):
+            segments[-1] = last[: -len(ext)]
+            break
+    segments = [_NUMBER_PREFIX_RE.sub("", s) or s for s in segments]
+    if segments[-1].lower() in _INDEX_NAMES:
+        segments.pop()
+    return "/".join(segments).lower()
+
+
+def page_path_for_file(source_file: str, content: str = "") -> str:
+    """Page path of a docs file, honoring frontmatter `slug` and `id`."""
+    meta, _ = parse_frontmatter(content)
+    slug = meta.get("slug")
+    if slug and slug.startswith("/"):
+        return normalize_page_path(slug)
+
+    page = normalize_page_path(source_file)
+    override = slug or meta.get("id")
+    if override:
+        section = page_section(page) if page else ""
+        page = "/".join(p for p in (section, normalize_page_path(override)) if p)
+    return page
+
+
+def page_section(page_path: str) -> str:
+    """Parent section of a page ("module-1/intro" -> "module-1"); pages in it are neighbors."""
+    return page_path.rsplit("/", 1)[0] if "/" in page_path else ""
@@ -0,0 +1,460 @@
+"""
+Streaming ingestion pipeline: discover -> chunk -> embed -> upsert.
+
+Embedding runs in large batches on a process pool (one FastEmbed model per
+worker process); upserts run on a small thread pool with a bounded number of
+in-flight requests. Each stage blocks when the next one is saturated, so memory
+stays flat no matter how large the docs tree is.
+
+With a manifest (see manifest.py) the run is incremental: unchanged files are
+skipped, only new/changed chunks are embedded, and vanished chunks are deleted.
+"""
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from qdrant_client import models
+
+from src.ingestion.manifest import IngestManifest, chunk_keys, content_hash
+from src.ingestion.chunker import DEFAULT_MAX_TOKENS, DEFAULT_OVERLAP_TOKENS, chunk_markdown
+from src.ingestion.pages import page_path_for_file, page_section
+from src.core.log import get_logger
+
+EMBEDDING_MODEL_NAME = "BAAI/bge-small-en-v1.5"
+EMBEDDING_DIM = 384
+SPARSE_MODEL_NAME = "Qdrant/bm25"
+# Named sparse vector stored next to the (unnamed) dense vector
+SPARSE_VECTOR_NAME = "bm25"
+
+log = get_logger("ingestion")
+
+# Namespace for deterministic point ids (re-running ingestion overwrites instead of duplicating)
+POINT_ID_NAMESPACE = uuid.UUID("6f1c1b2e-5d4a-4f1e-9a53-2b7f0c3e8d11")
+
+DELETE_BATCH_SIZE = 512
+
+# Bump when the point payload changes: manifests written for an older payload
+# are ignored, so the next run re-ingests every file
+PAYLOAD_VERSION = 3
+
+# Keyword payload indexes: source_file for per-file deletes, the page fields for page-aware retrieval
+PAYLOAD_INDEX_FIELDS = ("source_file", "page_path", "page_section")
+
+
+@dataclass
+class Chunk:
+    source_file: str
+    chunk_index: int
+    content: str
+    key: str = ""
+    page_path: str = ""
+    headings: List[str] = field(default_factory=list)
+
+    @property
+    def embed_text(self) -> str:
+        """Text that is embedded: heading breadcrumb + chunk text."""
+        if not self.headings:
+            return self.content
+        return " > ".join(self.headings) + "\n\n" + self.content
+
+    @property
+    def point_id(self) -> str:
+        return point_id(self.source_file, self.key)
+
+
+@dataclass
+class StageStats:
+    """Item count and busy time for one pipeline stage."""
+    name: str
+    items: int = 0
+    seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, items: int, seconds: float):
+        with self._lock:
+            self.items += items
+            self.seconds += seconds
+
+    @property
+    def rate(self) -> float:
+        return self.items / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        return f"{self.name:<10} {self.items:>7} items in {self.seconds:7.2f}s busy ({self.rate:,.1f}/s)"
+
+
+def discover_files(docs_path: Path) -> Iterator[Path]:
+    """Yield markdown files under docs_path in a stable order."""
+    yield from sorted(docs_path.rglob("*.md"))
+
+
+def chunk_file(
+    source_file: str,
+    content: str,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+) -> List[Chunk]:
+    """
+    Structure-aware chunks of one docs file (see chunker.py), keyed by page path
+    and embedded text: a changed slug/id gives new keys, so the points are
+    rewritten with the new page_path/page_section payload.
+    """
+    page_path = page_path_for_file(source_file, content)
+    chunks = [
+        Chunk(source_file, idx, piece.text, "", page_path, piece.headings)
+        for idx, piece in enumerate(chunk_markdown(content, max_tokens, overlap_tokens))
+    ]
+    for chunk, key in zip(chunks, chunk_keys([f"{page_path}\n{c.embed_text}" for c in chunks])):
+        chunk.key = key
+    return chunks
+
+
+def point_layout(sparse: bool) -> str:
+    """Manifest layout tag: which vectors points carry and the payload version."""
+    return f"{'dense+bm25' if sparse else 'dense'}/payload-v{PAYLOAD_VERSION}"
+
+
+def ensure_payload_indexes(qdrant_client, collection_name: str):
+    """Create the keyword payload indexes (no-op if present)."""
+    for field_name in PAYLOAD_INDEX_FIELDS:
+        qdrant_client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=models.PayloadSchemaType.KEYWORD,
+        )
+
+
+def point_id(source_file: str, chunk_key: str) -> str:
+    """UUIDv5 of source_file + chunk content hash: same chunk, same point."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{source_file}:{chunk_key}"))
+
+
+# --- Process pool workers -------------------------------------------------
+
+_worker_model = None
+_worker_sparse_model = None
+
+
+def _init_embed_worker(model_name: str, sparse_model_name: Optional[str] = None):
+    """Load one embedding model per worker process (single ONNX thread to avoid oversubscription)."""
+    global _worker_model, _worker_sparse_model
+    from fastembed import TextEmbedding
+
+    _worker_model = TextEmbedding(model_name=model_name, threads=1)
+    if sparse_model_name:
+        from fastembed import SparseTextEmbedding
+
+        _worker_sparse_model = SparseTextEmbedding(model_name=sparse_model_name)
+
+
+def _embed_batch(texts: List[str]) -> tuple:
+    """Returns (dense vectors, sparse (indices, values) pairs or None, seconds)."""
+    start = time.perf_counter()
+    vectors = [v.tolist() for v in _worker_model.embed(texts, batch_size=len(texts))]
+    sparse = None
+    if _worker_sparse_model is not None:
+        sparse = [
+            (s.indices.tolist(), s.values.tolist())
+            for s in _worker_sparse_model.embed(texts, batch_size=len(texts))
+        ]
+    return vectors, sparse, time.perf_counter() - start
+
+
+# --- Pipeline -------------------------------------------------------------
+
+
+class IngestionPipeline:
+    """Streams markdown docs into a Qdrant collection."""
+
+    def __init__(
+        self,
+        qdrant_client,
+        collection_name: str,
+        docs_path: Path,
+        workers: int = None,
+        batch_size: int = 256,
+        upsert_concurrency: int = 4,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        manifest: Optional[IngestManifest] = None,
+        stale_files: Iterable[str] = (),
+        sparse: bool = False,
+        chunk_tokens: int = DEFAULT_MAX_TOKENS,
+        chunk_overlap: int = DEFAULT_OVERLAP_TOKENS,
+    ):
+        self.client = qdrant_client
+        self.collection_name = collection_name
+        self.docs_path = Path(docs_path)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.batch_size = max(1, batch_size)
+        self.upsert_concurrency = max(1, upsert_concurrency)
+        self.model_name = model_name
+        self.sparse_model_name = SPARSE_MODEL_NAME if sparse else None
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+
+        self.manifest = manifest or IngestManifest(collection_name)
+        # Files a previous run ingested that `manifest` does not know about (--full, outdated manifest);
+        # the ones gone from the docs tree are deleted like vanished manifest entries
+        self.stale_files = set(stale_files)
+
+        self.stats = {
+            name: StageStats(name)
+            for name in ("discover", "chunk", "embed", "upsert", "delete")
+        }
+        self.failed = StageStats("failed")
+        self.skipped_files = StageStats("skip_files")
+        self.skipped_chunks = StageStats("skip_chunk")
+        self._failed_files = set()
+        self._failed_lock = threading.Lock()
+        # (source_file, point id) of chunks that disappeared from files still in the tree
+        self._pending_deletes: List[Tuple[str, str]] = []
+        self._vanished_files: List[str] = []
+
+    # Stage 1 + 2: discovery and chunking, yielding fixed-size batches of changed chunks
+    def _chunk_batches(self) -> Iterator[List[Chunk]]:
+        batch: List[Chunk] = []
+        seen_files = set()
+        files = discover_files(self.docs_path)
+        while True:
+            start = time.perf_counter()
+            md_file = next(files, None)
+            self.stats["discover"].add(1 if md_file else 0, time.perf_counter() - start)
+            if md_file is None:
+                break
+
+            source_file = str(md_file.relative_to(self.docs_path))
+            seen_files.add(source_file)
+            start = time.perf_counter()
+            try:
+                raw = md_file.read_bytes()
+                file_hash = content_hash(raw)
+                previous = self.manifest.get(source_file)
+                if previous and previous["hash"] == file_hash:
+                    self.skipped_files.add(1, 0.0)
+                    self.skipped_chunks.add(len(previous["chunks"]), 0.0)
+                    continue
+                chunks = chunk_file(source_file, raw.decode("utf-8"), self.chunk_tokens, self.chunk_overlap)
+            except Exception as e:
+                log.error("Could not chunk %s: %s", source_file, e)
+                continue
+            self.stats["chunk"].add(len(chunks), time.perf_counter() - start)
+
+            changed = self._diff_file(source_file, file_hash, chunks, previous)
+            for chunk in changed:
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+        # Files that disappeared from the docs tree (deleted by source_file in _flush_deletes)
+        self._vanished_files = sorted((set(self.manifest.files) | self.stale_files) - seen_files)
+
+    def _diff_file(
+        self,
+        source_file: str,
+        file_hash: str,
+        chunks: List[Chunk],
+        previous: Optional[dict],
+    ) -> List[Chunk]:
+        """Record the file's new state in the manifest and return the chunks that need embedding."""
+        if not previous or not previous["hash"]:
+            # Never ingested under the manifest, or left over from a failed delete:
+            # clear every point of this file (including legacy random ids)
+            self._delete_legacy(source_file)
+            old_chunks: Dict[str, int] = {}
+        else:
+            old_chunks = previous["chunks"]
+
+        new_chunks = {chunk.key: chunk.chunk_index for chunk in chunks}
+        changed = [chunk for chunk in chunks if chunk.key not in old_chunks]
+        unchanged = [chunk for chunk in chunks if chunk.key in old_chunks]
+        self.skipped_chunks.add(len(unchanged), 0.0)
+
+        # Unchanged chunks that moved only need their chunk_index payload refreshed
+        moved = [chunk for chunk in unchanged if old_chunks[chunk.key] != chunk.chunk_index]
+        if moved:
+            updated = self._with_retries(
+                f"Payload update of {len(moved)} moved chunks in {source_file}",
+                lambda: self.client.batch_update_points(
+                    collection_name=self.collection_name,
+                    update_operations=[
+                        models.SetPayloadOperation(
+                            set_payload=models.SetPayload(
+                                payload={"chunk_index": chunk.chunk_index},
+                                points=[chunk.point_id],
+                            )
+                        )
+                        for chunk in moved
+                    ],
+                ),
+            )
+            if not updated:
+                self._mark_failed({source_file})
+
+        self._pending_deletes.extend(
+            (source_file, point_id(source_file, key)) for key in old_chunks if key not in new_chunks
+        )
+        self.manifest.set(source_file, file_hash, new_chunks)
+        return changed
+
+    def _delete_file_points(self, source_file: str) -> bool:
+        return self._with_retries(
+            f"Delete of the points of {source_file}",
+            lambda: self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.FilterSelector(
+                    filter=models.Filter(
+                        must=[models.FieldCondition(key="source_file", match=models.MatchValue(value=source_file))]
+                    )
+                ),
+            ),
+        )
+
+    def _delete_legacy(self, source_file: str):
+        if not self._delete_file_points(source_file):
+            # Orphans would stay behind: keep the file out of the manifest so the next run retries
+            self._mark_failed({source_file})
+
+    # Stage 5: batched deletes of vanished chunks and files
+    def _flush_deletes(self):
+        pending, self._pending_deletes = self._pending_deletes, []
+        for i in range(0, len(pending), DELETE_BATCH_SIZE):
+            batch = pending[i:i + DELETE_BATCH_SIZE]
+            start = time.perf_counter()
+            deleted = self._with_retries(
+                f"Delete of {len(batch)} points",
+                lambda: self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=models.PointIdsList(points=[pid for _, pid in batch]),
+                ),
+            )
+            if deleted:
+                self.stats["delete"].add(len(batch), time.perf_counter() - start)
+            else:
+                self._mark_failed({source_file for source_file, _ in batch})
+
+        vanished, self._vanished_files = self._vanished_files, []
+        for source_file in vanished:
+            start = time.perf_counter()
+            if self._delete_file_points(source_file):
+                entry = self.manifest.remove(source_file)
+                self.stats["delete"].add(len(entry["chunks"]) if entry else 0, time.perf_counter() - start)
+            else:
+                # Placeholder entry: the next run sees the file vanished again and retries
+                self.manifest.set(source_file, "", {})
+
+    # Stage 4: upsert with retries
+    def _upsert(self, points: List[models.PointStruct], source_files: set):
+        start = time.perf_counter()
+        upserted = self._with_retries(
+            f"Upsert of {len(points)} points",
+            lambda: self.client.upsert(collection_name=self.collection_name, points=points, wait=True),
+        )
+        if upserted:
+            self.stats["upsert"].add(len(points), time.perf_counter() - start)
+        else:
+            self.failed.add(len(points), 0.0)
+            self._mark_failed(source_files)
+
+    @staticmethod
+    def _with_retries(description: str, operation: Callable[[], object], attempts: int = 3) -> bool:
+        """Run a Qdrant write with exponential backoff; False once every attempt failed."""
+        for attempt in range(attempts):
+            try:
+                operation()
+                return True
+            except Exception as e:
+                if attempt == attempts - 1:
+                    log.error("%s failed: %s", description, e)
+                    return False
+                time.sleep(0.5 * 2 ** attempt)
+        return False
+
+    def _mark_failed(self, source_files: set):
+        """Reset these files in the manifest at the end of the run, so the next run re-ingests them."""
+        with self._failed_lock:
+            self._failed_files.update(source_files)
+
+    def _build_points(self, batch: List[Chunk], vectors: List[List[float]], sparse: Optional[list]) -> List[models.PointStruct]:
+        if sparse is not None:
+            # Unnamed dense vector ("") plus a named BM25 sparse vector for hybrid search
+            vectors = [
+                {"": dense, SPARSE_VECTOR_NAME: models.SparseVector(indices=indices, values=values)}
+                for dense, (indices, values) in zip(vectors, sparse)
+            ]
+        return [
+            models.PointStruct(
+                id=chunk.point_id,
+                vector=vector,
+                payload={
+                    "content": chunk.content,
+                    "source_file": chunk.source_file,
+                    "chunk_index": chunk.chunk_index,
+                    "page_path": chunk.page_path,
+                    "page_section": page_section(chunk.page_path),
+                    "headings": chunk.headings,
+                },
+            )
+            for chunk, vector in zip(batch, vectors)
+        ]
+
+    def run(self) -> dict:
+        """Run the pipeline to completion and return per-stage stats."""
+        wall_start = time.perf_counter()
+        # Bound in-flight upserts; acquiring blocks the embed stage (backpressure)
+        upsert_slots = threading.BoundedSemaphore(self.upsert_concurrency * 2)
+        max_embed_in_flight = self.workers * 2
+
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=ctx,
+            initializer=_init_embed_worker,
+            initargs=(self.model_name, self.sparse_model_name),
+        ) as embed_pool, ThreadPoolExecutor(max_workers=self.upsert_concurrency) as upsert_pool:
+
+            in_flight: deque = deque()
+
+            def drain_one():
+                batch, future = in_flight.popleft()
+                vectors, sparse, seconds = future.result()
+                self.stats["embed"].add(len(vectors), seconds)
+                upsert_slots.acquire()
+                upsert_future = upsert_pool.submit(
+                    self._upsert,
+                    self._build_points(batch, vectors, sparse),
+                    {chunk.source_file for chunk in batch},
+                )
+                upsert_future.add_done_callback(lambda _: upsert_slots.release())
+
+            for batch in self._chunk_batches():
+                in_flight.append((batch, embed_pool.submit(_embed_batch, [c.embed_text for c in batch])))
+                if len(in_flight) >= max_embed_in_flight:
+                    drain_one()
+
+            while in_flight:
+                drain_one()
+
+        self._flush_deletes()
+
+        # Files with failed writes must be retried on the next run: a placeholder entry makes it
+        # clear all their points first (or delete them if the file is gone by then)
+        for source_file in self._failed_files:
+            self.manifest.set(source_file, "", {})
+
+        return {
+            "stages": self.stats,
+            "failed_upserts": self.failed.items,
+            "skipped_files": self.skipped_files.items,
+            "skipped_chunks": self.skipped_chunks.items,
+            "wall_seconds": time.perf_counter() - wall_start,
+        }
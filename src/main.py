@@ -1,12 +1,46 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from src.core.config import settings
+from src.core.log import RequestIdMiddleware, shutdown_logging
+from agents_wrapper import configure_credentials, close_openai_client
+from src.database.connection import pool_status
+from src.services.health_monitor import get_config_validator
+from src.services.job_queue import get_job_queue
+from src.services.metrics import CONTENT_TYPE_LATEST, MetricsMiddleware, render_metrics
+from src.services.warmup import get_readiness, warm_up
 from src.api.chat import router as chat_router
 from src.api.personalization import router as personalization_router
 from src.api.translation import router as translation_router
 from src.api.profile import router as profile_router
+from src.api.jobs import router as jobs_router
 
-app = FastAPI(title=settings.PROJECT_NAME)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Set up OpenAI credentials and the shared connection pool once
+    configure_credentials()
+    # Load Qdrant, the embedding model and the LLM agent in parallel; /ready reports progress
+    warmup_task = asyncio.create_task(warm_up())
+    # Connectivity checks run in the background; /api/v1/config/check serves the latest results
+    validator = get_config_validator()
+    validator.start()
+    # Background translation / personalization jobs
+    await get_job_queue().start()
+    yield
+    warmup_task.cancel()
+    await get_job_queue().stop()
+    await validator.stop()
+    await close_openai_client()
+    shutdown_logging()
+
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
+
+# Per-route request counts and latency for /metrics
+app.add_middleware(MetricsMiddleware)
 
 # Configure CORS
 app.add_middleware(
@@ -17,58 +51,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Correlation id (X-Request-ID) on every log record of a request; added last so it wraps the rest
+app.add_middleware(RequestIdMiddleware)
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok", "message": "FastAPI is running!"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness (distinct from /health liveness): 200 once warm-up has loaded every component."""
+    readiness = get_readiness()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
 @app.get("/api/v1/config/check")
-async def check_config():
-    """Check if OpenAI API key is configured (without exposing the key)."""
-    from src.core.config import settings
-    
+async def check_config(refresh: bool = False):
+    """
+    Report OpenAI / Qdrant / Neon configuration and connectivity (without exposing the key).
+    Results come from the background validator; ?refresh=true re-runs the checks first.
+    """
+    validator = get_config_validator()
+    results = await validator.refresh() if refresh else validator.results
+
     has_openai_key = bool(settings.OPENAI_API_KEY)
     key_preview = None
-    key_valid = False
-    key_error = None
-    
     if has_openai_key:
         key = settings.OPENAI_API_KEY
         key_preview = key[:8] + "..." + key[-4:] if len(key) > 12 else "***"
-        
-        # Test the API key using openai-agents
-        try:
-            from agents import Agent, Runner
-            import os
-            os.environ["OPENAI_API_KEY"] = settings.OPENAI_API_KEY
-            
-            test_agent = Agent(
-                name="Test Agent",
-                instructions="You are a test agent.",
-                model="gpt-3.5-turbo"
-            )
-            runner = Runner(test_agent)
-            # Run a minimal test
-            result = runner.run("test")
-            key_valid = True
-        except Exception as e:
-            key_error = str(e)
-            if "401" in str(e) or "invalid" in str(e).lower():
-                key_error = "Invalid API key"
-            elif "429" in str(e) or "quota" in str(e).lower():
-                key_error = "Quota exceeded or rate limited"
-            else:
-                key_error = f"Error: {str(e)[:100]}"
-    
+
+    openai_check = results.get("openai")
     return {
         "openai_configured": has_openai_key,
         "key_preview": key_preview,
-        "key_valid": key_valid,
-        "key_error": key_error,
+        "key_valid": bool(openai_check and openai_check["ok"]),
+        "key_error": openai_check["error"] if openai_check else None,
         "qdrant_configured": bool(settings.QDRANT_API_KEY),
         "neon_db_configured": bool(settings.NEON_DB_URL),
+        "checks": results,
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint."""
+    body = render_metrics()
+    if body is None:
+        return JSONResponse(status_code=404, content={"detail": "Metrics disabled (METRICS_ENABLED or prometheus-client missing)"})
+    return Response(content=body, media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/api/v1/db/pool")
+async def db_pool_status():
+    """Postgres pool occupancy (checked out, overflow) and checkout wait times."""
+    return pool_status()
+
 app.include_router(chat_router, prefix="/api/v1", tags=["Chat"])
 app.include_router(personalization_router, prefix="/api/v1", tags=["Personalization"])
 app.include_router(translation_router, prefix="/api/v1", tags=["Translation"])
 app.include_router(profile_router, prefix="/api/v1", tags=["Profile"])
+app.include_router(jobs_router, prefix="/api/v1", tags=["Jobs"])
@@ -1,18 +1,35 @@
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class Message(BaseModel):
     role: str  # "user" or "assistant"
     content: str
 
+class Source(BaseModel):
+    source_file: str
+    chunk_index: int
+
 class ChatRequest(BaseModel):
     query: str
     selected_text: Optional[str] = None
     current_page: Optional[str] = None  # Current page path
     user_id: Optional[str] = None
-    conversation_history: Optional[List[Message]] = None  # Previous messages
+    conversation_id: Optional[str] = Field(None, max_length=64)  # Continue a server-side conversation
+    conversation_history: Optional[List[Message]] = None  # Deprecated: legacy clients sending the full transcript
+    mode: Optional[str] = None  # "retrieval" or "direct"; defaults to RAG_MODE
+    hybrid: Optional[bool] = None  # Fuse dense + BM25 retrieval; defaults to RAG_HYBRID_ENABLED
 
 class ChatResponse(BaseModel):
     answer: str
-    sources: List[str]
-    conversation_history: List[Message]  # Full history including this response
+    sources: List[Source]
+    conversation_id: str
+    turn: List[Message]  # This turn only: the user query and the assistant answer
+    conversation_history: Optional[List[Message]] = None  # Only echoed to legacy clients
+
+class ConversationResponse(BaseModel):
+    conversation_id: str
+    summary: str  # Rolling summary of older turns
+    messages: List[Message]  # Recent turns, not yet summarized
+
+class PagePrefetchRequest(BaseModel):
+    current_page: str  # Page path or URL the reader just opened
@@ -0,0 +1,25 @@
+import uuid
+from typing import Any, List, Literal, Optional
+from pydantic import BaseModel
+
+class TranslationJobRequest(BaseModel):
+    chapter_content: str
+    target_language: str = "Urdu"
+
+class DocsJobRequest(BaseModel):
+    operation: Literal["translate", "personalize"] = "translate"
+    target_language: str = "Urdu"  # For operation="translate"
+    user_id: Optional[uuid.UUID] = None  # For operation="personalize"
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str  # "translate", "personalize" or "docs"
+    status: str  # "queued", "running", "succeeded", "failed" or "cancelled"
+    done: int  # Paragraphs (translate), sections (personalize) or files (docs) finished
+    total: int
+    partial: List[Any] = []  # Output so far while running: adapted sections or finished files
+    result: Optional[Any] = None  # Set once succeeded
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 
@@ -6,8 +6,14 @@ class User(BaseModel):
     username: str
     email: Optional[str] = None
     full_name: Optional[str] = None
+    # Free-text backgrounds used to personalize chapters (see content_adaptor.profile_bucket)
+    software_background: Optional[str] = None
+    hardware_background: Optional[str] = None
 
 
 class UserProfileUpdate(BaseModel):
-    full_name: Optional[str] = None
-
+    """Fields to change; fields left out are kept."""
+    email: Optional[str] = Field(default=None, max_length=100)
+    full_name: Optional[str] = Field(default=None, max_length=100)
+    software_background: Optional[str] = Field(default=None, max_length=2000)
+    hardware_background: Optional[str] = Field(default=None, max_length=2000)
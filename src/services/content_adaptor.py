@@ -1,6 +1,105 @@
-from agents import Agent, Runner
+from agents_wrapper import Agent, Runner
 from src.core.config import settings
-from src.models.user import UserInDB
+from src.models.user import User
+from src.services.metrics import span
+from collections import OrderedDict
+from typing import AsyncIterator, List, Optional
+import asyncio
+import hashlib
+import re
+
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+_FRONTMATTER_RE = re.compile(r"^---\n.*\n---$", re.DOTALL)
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+
+# Checked in this order; the first level with a matching keyword wins (seniority words
+# are rarely incidental, while "student" or "basic" often are)
+_LEVEL_KEYWORDS = (
+    ("advanced", ("advanced", "expert", "senior", "professional", "years of experience", "researcher")),
+    ("beginner", ("beginner", "novice", "basic", "new to", "no experience", "student", "none")),
+)
+_SKILL_TAGS = (
+    "python", "c++", "javascript", "ros", "linux", "machine learning", "deep learning",
+    "computer vision", "arduino", "raspberry pi", "jetson", "electronics", "mechanical",
+    "embedded", "simulation", "unity", "isaac",
+)
+
+
+def _word_re(phrase: str) -> "re.Pattern":
+    # Whole words only ("ros" not in "across", "basic" not in "basically"); lookarounds
+    # instead of \b so terms ending in symbols ("c++") match too
+    return re.compile(r"(?<!\w)" + re.escape(phrase) + r"(?!\w)")
+
+
+_LEVEL_PATTERNS = [(level, [_word_re(word) for word in words]) for level, words in _LEVEL_KEYWORDS]
+_SKILL_PATTERNS = [(tag, _word_re(tag)) for tag in _SKILL_TAGS]
+
+
+def split_sections(chapter_content: str) -> List[str]:
+    """
+    Split a markdown chapter into sections at headings (ignoring '#' lines inside
+    fenced code). Frontmatter, if present, stays its own section.
+    """
+    lines = chapter_content.splitlines(keepends=True)
+    sections, current = [], []
+    in_fence = False
+    start = 0
+
+    if lines and lines[0].strip() == "---":
+        for i in range(1, len(lines)):
+            if lines[i].strip() == "---":
+                sections.append("".join(lines[: i + 1]))
+                start = i + 1
+                break
+
+    for line in lines[start:]:
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        if not in_fence and _HEADING_RE.match(line) and "".join(current).strip():
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+    if "".join(current).strip():
+        sections.append("".join(current))
+    return sections
+
+
+def _normalize_background(text: Optional[str]) -> str:
+    """Map free-text background to a coarse bucket: '<level>:<sorted skill tags>'."""
+    text = " ".join((text or "").lower().split())
+    if not text or text in ("n/a", "na", "none"):
+        return "none:"
+    level = "intermediate"
+    for name, patterns in _LEVEL_PATTERNS:
+        if any(pattern.search(text) for pattern in patterns):
+            level = name
+            break
+    tags = sorted(tag for tag, pattern in _SKILL_PATTERNS if pattern.search(text))
+    return f"{level}:{','.join(tags)}"
+
+
+def profile_bucket(user_profile: User) -> str:
+    software = _normalize_background(getattr(user_profile, "software_background", None))
+    hardware = _normalize_background(getattr(user_profile, "hardware_background", None))
+    return f"sw={software}|hw={hardware}"
+
+
+def _describe_bucket(bucket: str) -> str:
+    """Human-readable background built only from the bucket, so cached output fits everyone in it."""
+    parts = dict(part.split("=", 1) for part in bucket.split("|"))
+
+    def describe(value: str) -> str:
+        level, _, tags = value.partition(":")
+        if level == "none":
+            return "N/A"
+        return f"{level}" + (f" (familiar with {tags.replace(',', ', ')})" if tags else "")
+
+    return f"Software Background: {describe(parts['sw'])}. Hardware Background: {describe(parts['hw'])}."
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 
 class ContentAdaptor:
     def __init__(self):
@@ -8,18 +107,70 @@ class ContentAdaptor:
             name="Content Adaptor",
             instructions="You are an AI assistant that personalizes textbook content for a user.",
             model="gpt-4o",
+            service="personalization",
         )
+        # (chapter hash, section hash, profile bucket) -> adapted section
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
 
-    async def personalize_content(self, chapter_content: str, user_profile: UserInDB) -> str:
-        user_background_info = f"Software Background: {user_profile.software_background or 'N/A'}. Hardware Background: {user_profile.hardware_background or 'N/A'}."
+    async def personalize_content(self, chapter_content: str, user_profile: User) -> str:
+        with span("personalize.content"):
+            parts = [part async for part in self.stream_personalized_content(chapter_content, user_profile)]
+        return "\n\n".join(parts)
+
+    async def stream_personalized_content(self, chapter_content: str, user_profile: User) -> AsyncIterator[str]:
+        """
+        Adapt the chapter section by section. Sections run concurrently (bounded by
+        the personalization service's LLM limits) and are yielded in document order.
+        """
+        sections = split_sections(chapter_content)
+        if not sections:
+            return
+
+        bucket = profile_bucket(user_profile)
+        chapter_hash = _hash(chapter_content)
+        tasks = [
+            asyncio.ensure_future(self._adapt_section_timed(chapter_hash, section, bucket))
+            for section in sections
+        ]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Retrieve every outcome, so failed sections don't log "Task exception was never retrieved"
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _adapt_section_timed(self, chapter_hash: str, section: str, bucket: str) -> str:
+        with span("personalize.section"):
+            return await self._adapt_section(chapter_hash, section, bucket)
+
+    async def _adapt_section(self, chapter_hash: str, section: str, bucket: str) -> str:
+        # Frontmatter and whitespace-only sections pass through unchanged
+        if not section.strip() or _FRONTMATTER_RE.match(section.strip()):
+            return section.strip()
+
+        key = (chapter_hash, _hash(section), bucket)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
 
         input_text = f"""
-Adapt the following chapter content for a user with the following background:
-{user_background_info}
+Adapt the following section of a textbook chapter for a user with the following background:
+{_describe_bucket(bucket)}
+
+Keep the section's headings and code blocks. Return only the adapted section.
 
-Original Chapter Content: {chapter_content}
+Original Section:
+{section}
 
-Personalized Content:
+Personalized Section:
 """
         result = await Runner.run(self.agent, input=input_text)
-        return str(result.final_output)
\ No newline at end of file
+        adapted = str(result.final_output).strip()
+
+        self._cache[key] = adapted
+        while len(self._cache) > settings.PERSONALIZATION_CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+        return adapted
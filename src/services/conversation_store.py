@@ -0,0 +1,343 @@
+"""
+Server-side chat conversation state.
+Clients send a conversation_id instead of the full transcript; the store keeps
+the most recent messages and compacts older turns into a rolling summary so
+the prompt stays the same size however long the conversation gets.
+
+Conversations live in an in-memory LRU; with CONVERSATION_STORE=postgres they
+are also written through to the `conversations` table (see init_db.py) and
+read back after eviction or a restart.
+"""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from src.core.config import settings
+from src.core.log import get_logger
+
+log = get_logger("conversations")
+
+_summarizer_agent = None
+
+
+class ConversationNotFound(LookupError):
+    """The conversation does not exist for this user (or belongs to someone else)."""
+
+
+def _get_summarizer_agent():
+    """Lazy-init the agent that folds old turns into the rolling summary."""
+    global _summarizer_agent
+    if _summarizer_agent is not None:
+        return _summarizer_agent
+    if not settings.OPENAI_API_KEY:
+        return None
+    try:
+        from agents_wrapper import Agent
+
+        _summarizer_agent = Agent(
+            name="Conversation Summarizer",
+            instructions=(
+                "You maintain a running summary of a tutoring conversation about the "
+                "'Physical AI & Humanoid Robotics' textbook. Given the current summary and "
+                "older messages, return an updated summary that keeps the topics discussed, "
+                "what the student asked, what was explained, and any open questions or stated "
+                "preferences (e.g. language). Write plain prose, in the conversation's language, "
+                f"at most {settings.CONVERSATION_SUMMARY_MAX_TOKENS * 3 // 4} words. Return only the summary."
+            ),
+            model="gpt-4o-mini",
+            service="chat",
+        )
+        return _summarizer_agent
+    except Exception as e:
+        log.warning("Could not initialize conversation summarizer: %s", e)
+        return None
+
+
+def _format_messages(messages: List[dict]) -> str:
+    return "\n".join(
+        f"{'User' if m.get('role') == 'user' else 'Assistant'}: {m.get('content', '')}"
+        for m in messages
+    )
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the tail of `text` within ~max_tokens (~4 characters per token)."""
+    limit = max_tokens * 4
+    return text if len(text) <= limit else "..." + text[-limit:]
+
+
+@dataclass
+class Conversation:
+    id: str
+    user_id: Optional[str] = None
+    summary: str = ""
+    messages: List[dict] = field(default_factory=list)  # recent, not yet summarized
+    summarized_messages: int = 0
+    updated_at: float = field(default_factory=time.time)
+
+    def add_turn(self, query: str, answer: str):
+        self.messages.append({"role": "user", "content": query})
+        self.messages.append({"role": "assistant", "content": answer})
+        self.updated_at = time.time()
+
+
+class ConversationStore:
+    """
+    LRU of conversations (with TTL) and optional Postgres write-through.
+    Turns of one conversation are serialized with a per-conversation lock.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 86400.0,
+        recent_messages: int = 6,
+        summary_max_tokens: int = 200,
+        use_postgres: bool = False,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.recent_messages = max(2, recent_messages)
+        self.summary_max_tokens = summary_max_tokens
+        self.use_postgres = use_postgres
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._compacting: set = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.db_errors = 0
+        self.compactions = 0
+
+    def lock(self, conversation_id: str) -> asyncio.Lock:
+        lock = self._locks.get(conversation_id)
+        if lock is None:
+            lock = self._locks[conversation_id] = asyncio.Lock()
+        return lock
+
+    # --- Lookup / persistence ---------------------------------------------
+
+    async def get(self, conversation_id: str) -> Optional[Conversation]:
+        conversation = self._conversations.get(conversation_id)
+        if conversation is not None and time.time() - conversation.updated_at < self.ttl_seconds:
+            self._conversations.move_to_end(conversation_id)
+            self.hits += 1
+            return conversation
+        if conversation is not None:
+            self._forget(conversation_id)
+        self.misses += 1
+
+        conversation = await self._db_load(conversation_id)
+        if conversation is not None:
+            self._remember(conversation)
+        return conversation
+
+    async def get_for_user(self, conversation_id: str, user_id: Optional[str]) -> Conversation:
+        """The conversation if `user_id` owns it; ConversationNotFound otherwise."""
+        conversation = await self.get(conversation_id)
+        if conversation is None or conversation.user_id != user_id:
+            raise ConversationNotFound(conversation_id)
+        return conversation
+
+    async def resolve(
+        self,
+        conversation_id: Optional[str],
+        user_id: Optional[str] = None,
+        seed_messages: Optional[List[dict]] = None,
+    ) -> Conversation:
+        """
+        The conversation to continue. Ids are only minted here: unknown or
+        expired ids start a fresh conversation under a new id, and without an
+        id a new one is seeded with a legacy client-sent history if given.
+        Raises ConversationNotFound when `user_id` does not own the conversation.
+        """
+        if conversation_id:
+            conversation = await self.get(conversation_id)
+            if conversation is not None:
+                if conversation.user_id != user_id:
+                    raise ConversationNotFound(conversation_id)
+                return conversation
+            log.info("Unknown conversation id; starting a new one")
+        conversation = Conversation(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            messages=list(seed_messages or []),
+        )
+        self._remember(conversation)
+        return conversation
+
+    async def save(self, conversation: Conversation):
+        self._remember(conversation)
+        await self._db_save(conversation)
+
+    def _remember(self, conversation: Conversation):
+        self._conversations[conversation.id] = conversation
+        self._conversations.move_to_end(conversation.id)
+        while len(self._conversations) > self.max_entries:
+            oldest, _ = self._conversations.popitem(last=False)
+            lock = self._locks.get(oldest)
+            if lock is not None and not lock.locked():
+                del self._locks[oldest]
+
+    def _forget(self, conversation_id: str):
+        self._conversations.pop(conversation_id, None)
+        lock = self._locks.get(conversation_id)
+        if lock is not None and not lock.locked():
+            del self._locks[conversation_id]
+
+    def _session_factory(self):
+        if not self.use_postgres:
+            return None
+        from src.database import connection
+
+        connection._init_db_if_needed()
+        return connection.AsyncSessionLocal
+
+    async def _db_load(self, conversation_id: str) -> Optional[Conversation]:
+        session_factory = self._session_factory()
+        if session_factory is None:
+            return None
+        from src.database.models import Conversation as ConversationRow
+
+        try:
+            async with session_factory() as session:
+                row = await session.get(ConversationRow, conversation_id)
+        except Exception as e:
+            self.db_errors += 1
+            log.warning("Conversation load failed: %s: %s", type(e).__name__, e)
+            return None
+        if row is None:
+            return None
+        return Conversation(
+            id=row.id,
+            user_id=row.user_id,
+            summary=row.summary or "",
+            messages=list(row.messages or []),
+            summarized_messages=row.summarized_messages or 0,
+            updated_at=row.updated_at.timestamp(),
+        )
+
+    async def _db_save(self, conversation: Conversation):
+        session_factory = self._session_factory()
+        if session_factory is None:
+            return
+        from src.database.models import Conversation as ConversationRow
+
+        try:
+            async with session_factory() as session:
+                await session.merge(ConversationRow(
+                    id=conversation.id,
+                    user_id=conversation.user_id,
+                    summary=conversation.summary,
+                    messages=conversation.messages,
+                    summarized_messages=conversation.summarized_messages,
+                    updated_at=datetime.fromtimestamp(conversation.updated_at, tz=timezone.utc),
+                ))
+                await session.commit()
+        except Exception as e:
+            # The in-memory copy still serves this process
+            self.db_errors += 1
+            log.warning("Conversation save failed: %s: %s", type(e).__name__, e)
+
+    # --- Rolling summary ----------------------------------------------------
+
+    def schedule_compaction(self, conversation_id: str):
+        """Fold messages beyond the recent window into the summary, off the request path."""
+        conversation = self._conversations.get(conversation_id)
+        if (
+            conversation is None
+            or len(conversation.messages) <= self.recent_messages
+            or conversation_id in self._compacting
+        ):
+            return
+        self._compacting.add(conversation_id)
+
+        async def run():
+            try:
+                await self.compact(conversation_id)
+            except Exception as e:
+                log.warning("Conversation compaction failed: %s: %s", type(e).__name__, e)
+            finally:
+                self._compacting.discard(conversation_id)
+
+        asyncio.ensure_future(run())
+
+    async def compact(self, conversation_id: str):
+        async with self.lock(conversation_id):
+            conversation = await self.get(conversation_id)
+            if conversation is None or len(conversation.messages) <= self.recent_messages:
+                return
+            overflow = conversation.messages[: len(conversation.messages) - self.recent_messages]
+            previous_summary = conversation.summary
+            version = conversation.summarized_messages
+
+        # Summarize without holding the lock so the next turn isn't blocked on it
+        summary = await self._summarize(previous_summary, overflow)
+
+        async with self.lock(conversation_id):
+            conversation = await self.get(conversation_id)
+            if conversation is None or conversation.summarized_messages != version:
+                return
+            conversation.summary = summary
+            conversation.messages = conversation.messages[len(overflow):]
+            conversation.summarized_messages += len(overflow)
+            await self.save(conversation)
+            self.compactions += 1
+
+    async def _summarize(self, previous_summary: str, messages: List[dict]) -> str:
+        agent = _get_summarizer_agent()
+        if agent is not None:
+            from agents_wrapper import Runner
+
+            try:
+                result = await Runner.run(
+                    agent,
+                    input=(
+                        f"Current summary:\n{previous_summary or '(none)'}\n\n"
+                        f"Older messages:\n{_format_messages(messages)}\n\n"
+                        "Updated summary:"
+                    ),
+                )
+                summary = str(result.final_output).strip()
+                if summary:
+                    return _truncate_to_tokens(summary, self.summary_max_tokens)
+            except Exception as e:
+                log.warning("Summarizer failed, keeping an extractive summary: %s: %s", type(e).__name__, e)
+        # No LLM: keep the most recent part of the older transcript
+        text = "\n".join(p for p in (previous_summary, _format_messages(messages)) if p)
+        return _truncate_to_tokens(text, self.summary_max_tokens)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "postgres" if self.use_postgres else "memory",
+            "conversations": len(self._conversations),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "compactions": self.compactions,
+            "db_errors": self.db_errors,
+        }
+
+
+# Singleton instance
+_conversation_store = None
+
+
+def get_conversation_store() -> ConversationStore:
+    """Get the shared conversation store"""
+    global _conversation_store
+    if _conversation_store is None:
+        _conversation_store = ConversationStore(
+            max_entries=settings.CONVERSATION_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.CONVERSATION_TTL_SECONDS,
+            recent_messages=settings.CONVERSATION_RECENT_MESSAGES,
+            summary_max_tokens=settings.CONVERSATION_SUMMARY_MAX_TOKENS,
+            use_postgres=settings.CONVERSATION_STORE.lower() == "postgres",
+        )
+    return _conversation_store
@@ -0,0 +1,160 @@
+"""
+Shared embedding worker: one process owns the FastEmbed model and serves
+embeddings to API worker processes over a Unix socket.
+
+    python -m src.services.embedding_server --socket /tmp/book-backend-embed.sock
+
+Wire format (both directions): 4-byte big-endian length + UTF-8 JSON.
+Request {"texts": [str, ...]} -> response {"vectors": [[float, ...], ...]} or {"error": str}.
+Requests from all connections are micro-batched into shared TextEmbedding.embed calls.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import struct
+import threading
+from typing import Iterable, List, Union
+
+import numpy as np
+
+from src.core.log import get_logger
+
+log = get_logger("embedding_server")
+
+_HEADER = struct.Struct("!I")
+
+
+def _encode(message: dict) -> bytes:
+    body = json.dumps(message).encode("utf-8")
+    return _HEADER.pack(len(body)) + body
+
+
+# --- Server ----------------------------------------------------------------
+
+
+async def _read_message(reader: asyncio.StreamReader):
+    try:
+        header = await reader.readexactly(_HEADER.size)
+        (length,) = _HEADER.unpack(header)
+        return json.loads(await reader.readexactly(length))
+    except asyncio.IncompleteReadError:
+        return None
+
+
+class EmbeddingServer:
+    def __init__(self, socket_path: str, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        from fastembed import TextEmbedding
+        from src.services.embedding_service import QueryEmbeddingBatcher
+
+        self.socket_path = socket_path
+        log.info("Loading FastEmbed model (BAAI/bge-small-en-v1.5)")
+        self.model = TextEmbedding(model_name="BAAI/bge-small-en-v1.5")
+        self.batcher = QueryEmbeddingBatcher(self.model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        log.info("Embedding worker model loaded")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                message = await _read_message(reader)
+                if message is None:
+                    break
+                try:
+                    vectors = await asyncio.gather(*(self.batcher.embed(t) for t in message["texts"]))
+                    response = {"vectors": vectors}
+                except Exception as e:
+                    response = {"error": f"{type(e).__name__}: {e}"}
+                writer.write(_encode(response))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        log.info("Embedding worker listening on %s", self.socket_path)
+        async with server:
+            await server.serve_forever()
+
+
+# --- Client ----------------------------------------------------------------
+
+
+class RemoteEmbedder:
+    """
+    Drop-in replacement for TextEmbedding.embed() that calls the shared embedding
+    worker. Thread-safe: each thread keeps its own socket connection.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.settimeout(self.timeout)
+            conn.connect(self.socket_path)
+            self._local.conn = conn
+        return conn
+
+    def _reset(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    @staticmethod
+    def _recv_exact(conn: socket.socket, size: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < size:
+            part = conn.recv(size - len(buf))
+            if not part:
+                raise ConnectionError("Embedding worker closed the connection")
+            buf.extend(part)
+        return bytes(buf)
+
+    def _request(self, texts: List[str]) -> List[List[float]]:
+        conn = self._connection()
+        conn.sendall(_encode({"texts": texts}))
+        (length,) = _HEADER.unpack(self._recv_exact(conn, _HEADER.size))
+        response = json.loads(self._recv_exact(conn, length))
+        if "error" in response:
+            raise RuntimeError(f"Embedding worker error: {response['error']}")
+        return response["vectors"]
+
+    def embed(self, documents: Union[str, Iterable[str]], batch_size: int = 256, **kwargs) -> List[np.ndarray]:
+        texts = [documents] if isinstance(documents, str) else list(documents)
+        try:
+            vectors = self._request(texts)
+        except (OSError, ConnectionError):
+            # Stale connection (e.g. worker restarted): reconnect once
+            self._reset()
+            vectors = self._request(texts)
+        return [np.asarray(v, dtype=np.float32) for v in vectors]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared FastEmbed worker on a Unix socket.")
+    parser.add_argument("--socket", required=True, help="Unix socket path to listen on")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    server = EmbeddingServer(args.socket, args.max_batch_size, args.max_wait_ms)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
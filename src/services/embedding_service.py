@@ -0,0 +1,183 @@
+"""
+Query embedding service.
+Owns the FastEmbed model calls on a dedicated worker thread, groups concurrent
+requests into dynamic batches, sheds load when its queue is full and caches
+embeddings of repeated query strings.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from src.core.config import settings
+
+
+class EmbeddingQueueFull(RuntimeError):
+    """Raised when the embedding queue is at capacity (caller should back off)."""
+
+
+class QueryEmbeddingBatcher:
+    """
+    Collects query strings from concurrent requests and embeds them together.
+
+    A batch is flushed when it reaches `max_batch_size` or when the oldest
+    pending query has waited `max_wait_ms`, whichever comes first. Identical
+    queries waiting in the same batch share one embedding, and recent results
+    are served from an LRU cache without touching the model. When queued plus
+    in-flight queries reach `max_queue_size`, new queries are rejected with
+    EmbeddingQueueFull instead of piling up.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 1024,
+        cache_size: int = 10000,
+        worker_threads: int = 1,
+    ):
+        self._embedder = embedder
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_queue_size = max(1, max_queue_size)
+        self.cache_size = max(0, cache_size)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, worker_threads), thread_name_prefix="embed")
+
+        # text -> futures waiting for it (insertion order = arrival order)
+        self._pending: "OrderedDict[str, List[asyncio.Future]]" = OrderedDict()
+        self._in_flight = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+
+        # Metrics
+        self.batches = 0
+        self.embedded = 0
+        self.max_batch_seen = 0
+        self.batch_seconds = 0.0
+        self.max_depth_seen = 0
+        self.rejected = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending) + self._in_flight
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed a single query, sharing the model call with concurrent callers."""
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._cache.move_to_end(text)
+            self.cache_hits += 1
+            return cached
+        self.cache_misses += 1
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiters = self._pending.get(text)
+        if waiters is not None:
+            waiters.append(future)
+        else:
+            if self.queue_depth >= self.max_queue_size:
+                self.rejected += 1
+                raise EmbeddingQueueFull(
+                    f"Embedding queue full ({self.queue_depth}/{self.max_queue_size})"
+                )
+            self._pending[text] = [future]
+            self.max_depth_seen = max(self.max_depth_seen, self.queue_depth)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, OrderedDict()
+        self._in_flight += len(batch)
+        asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: Dict[str, List[asyncio.Future]]):
+        texts = list(batch.keys())
+        start = time.perf_counter()
+        try:
+            vectors = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._embed_sync, texts
+            )
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        finally:
+            self._in_flight -= len(texts)
+
+        self.batches += 1
+        self.embedded += len(texts)
+        self.max_batch_seen = max(self.max_batch_seen, len(texts))
+        self.batch_seconds += time.perf_counter() - start
+
+        for text, vector in zip(texts, vectors):
+            self._cache_put(text, vector)
+            for future in batch[text]:
+                if not future.done():
+                    future.set_result(vector)
+
+    def _cache_put(self, text: str, vector: List[float]):
+        if not self.cache_size:
+            return
+        self._cache[text] = vector
+        self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _embed_sync(self, texts: List[str]) -> List[List[float]]:
+        return [vector.tolist() for vector in self._embedder.embed(texts, batch_size=len(texts))]
+
+    def stats(self) -> dict:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth_seen": self.max_depth_seen,
+            "max_queue_size": self.max_queue_size,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "embedded": self.embedded,
+            "avg_batch_size": round(self.embedded / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size_seen": self.max_batch_seen,
+            "avg_batch_ms": round(self.batch_seconds / self.batches * 1000, 2) if self.batches else 0.0,
+            "cache_entries": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+_query_batcher = None
+
+
+def get_query_batcher() -> QueryEmbeddingBatcher:
+    """Get the shared query embedding service"""
+    global _query_batcher
+    if _query_batcher is None:
+        from src.services.rag_service import _get_embedder
+
+        _query_batcher = QueryEmbeddingBatcher(
+            _get_embedder(),
+            max_batch_size=settings.EMBED_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBED_BATCH_MAX_WAIT_MS,
+            max_queue_size=settings.EMBED_QUEUE_MAX_SIZE,
+            cache_size=settings.EMBED_CACHE_MAX_ENTRIES,
+            worker_threads=settings.EMBED_WORKER_THREADS,
+        )
+    return _query_batcher
@@ -0,0 +1,135 @@
+"""
+Background connectivity checks for OpenAI, Qdrant and Neon.
+Results are refreshed on a schedule and served from memory by /api/v1/config/check.
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from src.core.config import settings
+from src.core.log import get_logger
+
+log = get_logger("health")
+
+CHECK_TIMEOUT_SECONDS = 10.0
+
+
+def _describe_openai_error(e: Exception) -> str:
+    message = str(e)
+    if "401" in message or "invalid" in message.lower():
+        return "Invalid API key"
+    if "429" in message or "quota" in message.lower():
+        return "Quota exceeded or rate limited"
+    return f"Error: {message[:100]}"
+
+
+async def check_openai() -> None:
+    """Validate the API key by listing models (no completion tokens are spent)."""
+    from agents_wrapper import get_openai_client
+
+    try:
+        await get_openai_client().models.list()
+    except Exception as e:
+        raise RuntimeError(_describe_openai_error(e)) from e
+
+
+async def check_qdrant() -> None:
+    from src.services.rag_service import QDRANT_COLLECTION_NAME, _get_qdrant
+
+    def probe():
+        _get_qdrant().get_collection(QDRANT_COLLECTION_NAME)
+
+    await asyncio.to_thread(probe)
+
+
+async def check_neon() -> None:
+    from sqlalchemy import text
+    from src.database import connection
+
+    connection._init_db_if_needed()
+    if connection.engine is None:
+        raise RuntimeError("Database engine not initialized")
+    async with connection.engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+class ConfigValidator:
+    """Runs connectivity checks periodically and keeps the latest results."""
+
+    def __init__(self, interval_seconds: float = 300.0):
+        self.interval_seconds = interval_seconds
+        self.results: Dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._refresh: Optional[asyncio.Task] = None
+
+    def _checks(self) -> Dict[str, Callable[[], Awaitable[None]]]:
+        from src.services.rag_service import qdrant_configured
+
+        checks = {}
+        if settings.OPENAI_API_KEY:
+            checks["openai"] = check_openai
+        if qdrant_configured():
+            checks["qdrant"] = check_qdrant
+        if settings.NEON_DB_URL:
+            checks["neon"] = check_neon
+        return checks
+
+    async def _run_one(self, name: str, check: Callable[[], Awaitable[None]]):
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), timeout=CHECK_TIMEOUT_SECONDS)
+            ok, error = True, None
+        except asyncio.TimeoutError:
+            ok, error = False, f"Timed out after {CHECK_TIMEOUT_SECONDS:.0f}s"
+        except Exception as e:
+            ok, error = False, str(e) or type(e).__name__
+        self.results[name] = {
+            "ok": ok,
+            "error": error,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    async def refresh(self) -> Dict[str, dict]:
+        """Run all checks now; concurrent callers share the same run."""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._run_all())
+        await asyncio.shield(self._refresh)
+        return self.results
+
+    async def _run_all(self):
+        await asyncio.gather(*(self._run_one(name, check) for name, check in self._checks().items()))
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                log.warning("Config check failed: %s", e)
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instance
+_config_validator = None
+
+
+def get_config_validator() -> ConfigValidator:
+    """Get the shared background config validator"""
+    global _config_validator
+    if _config_validator is None:
+        _config_validator = ConfigValidator(interval_seconds=settings.CONFIG_CHECK_INTERVAL_SECONDS)
+    return _config_validator
@@ -0,0 +1,340 @@
+"""
+In-process async job queue for long LLM runs (translation, personalization,
+whole-docs batches).
+
+Submitting returns a job id right away; a fixed pool of worker tasks
+(JOB_WORKERS) runs queued jobs, handlers report progress (paragraphs or
+sections done) and partial output as they go, and the final result stays
+retrievable for JOB_RESULT_TTL_SECONDS so a client that lost its connection
+can poll it again.
+
+With JOB_STORE=sqlite, jobs are also written to JOB_STORE_PATH: results
+survive a restart and jobs that were queued or running are re-queued on
+start-up (work already done is mostly served from the translation cache).
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.core.config import settings
+from src.core.log import get_logger, reset_request_id, set_request_id
+
+log = get_logger("jobs")
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+_FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: dict
+    status: str = QUEUED
+    done: int = 0
+    total: int = 0
+    partial: List[Any] = field(default_factory=list)  # output so far (sections, file names)
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED
+
+    def report(self, done: int, total: Optional[int] = None, partial: Any = None):
+        """Progress callback for handlers."""
+        self.done = done
+        if total is not None:
+            self.total = total
+        if partial is not None:
+            self.partial.append(partial)
+
+
+# handler(job) -> result; reads job.params and calls job.report(...) as it goes
+JobHandler = Callable[[Job], Awaitable[Any]]
+
+
+class _SqliteJobStore:
+    """Jobs as JSON rows in SQLite; calls run in a worker thread."""
+
+    def __init__(self, db_path: Path):
+        self._db_path = Path(db_path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self._db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _save_sync(self, job: Job):
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, data, updated_at) VALUES (?, ?, ?, ?)",
+                (job.id, job.status, json.dumps(asdict(job), ensure_ascii=False), time.time()),
+            )
+            conn.commit()
+
+    def _load_sync(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._db().execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(**json.loads(row[0])) if row else None
+
+    def _unfinished_sync(self) -> List[Job]:
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT data FROM jobs WHERE status IN (?, ?) ORDER BY updated_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [Job(**json.loads(row[0])) for row in rows]
+
+    def _purge_sync(self, older_than: float):
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?, ?) AND updated_at < ?", (*_FINISHED, older_than)
+            )
+            conn.commit()
+
+    async def save(self, job: Job):
+        await asyncio.to_thread(self._save_sync, job)
+
+    async def load(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self._load_sync, job_id)
+
+    async def unfinished(self) -> List[Job]:
+        return await asyncio.to_thread(self._unfinished_sync)
+
+    async def purge(self, older_than: float):
+        await asyncio.to_thread(self._purge_sync, older_than)
+
+
+class JobQueue:
+    """
+    Bounded pool of worker tasks over an asyncio.Queue of job ids. Jobs are kept
+    in memory (LRU of finished jobs) and optionally persisted to SQLite.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_pending: int = 100,
+        max_jobs: int = 1000,
+        result_ttl_seconds: float = 86400.0,
+        store: Optional[_SqliteJobStore] = None,
+    ):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.max_jobs = max(1, max_jobs)
+        self.result_ttl_seconds = result_ttl_seconds
+        self._store = store
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancel_requested: set = set()
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def register(self, kind: str, handler: JobHandler):
+        self._handlers[kind] = handler
+
+    # --- Lifecycle ------------------------------------------------------------
+
+    async def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        if self._store is not None:
+            await self._store.purge(time.time() - self.result_ttl_seconds)
+            for job in await self._store.unfinished():
+                log.info("Re-queueing %s job %s interrupted by a restart", job.kind, job.id)
+                job.status, job.started_at = QUEUED, None
+                self._remember(job)
+                self._queue.put_nowait(job.id)
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    # --- Submission / lookup --------------------------------------------------
+
+    async def submit(self, kind: str, params: dict) -> Job:
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        if self._queue is None:
+            await self.start()
+        if self._queue.qsize() >= self.max_pending:
+            raise JobQueueFull(f"{self._queue.qsize()} jobs already waiting")
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=params)
+        self._remember(job)
+        await self._save(job)
+        self._queue.put_nowait(job.id)
+        self.submitted += 1
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None and self._store is not None:
+            job = await self._store.load(job_id)
+        if job is None:
+            return None
+        if job.finished and time.time() - (job.finished_at or job.created_at) > self.result_ttl_seconds:
+            self._jobs.pop(job_id, None)
+            return None
+        return job
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        job = await self.get(job_id)
+        if job is None or job.finished:
+            return job
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancel_requested.add(job_id)
+            task.cancel()  # the worker records the cancellation
+        else:
+            self._finish(job, CANCELLED)
+            await self._save(job)
+        return job
+
+    # --- Workers --------------------------------------------------------------
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is None or job.status != QUEUED:
+                    continue
+                await self._run(job)
+            except Exception as e:
+                log.exception("Job worker %d error: %s", index, e)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status, job.started_at = RUNNING, time.time()
+        await self._save(job)
+        log.info("%s job started", job.kind, extra={"job_id": job.id})
+        # Log records of the job carry its id as their correlation id
+        token = set_request_id(f"job-{job.id}")
+        try:
+            task = asyncio.ensure_future(self._handlers[job.kind](job))
+        finally:
+            reset_request_id(token)
+        self._running[job.id] = task
+        try:
+            # Shielded so stopping the worker doesn't look like a user cancellation
+            job.result = await asyncio.shield(task)
+            self._finish(job, SUCCEEDED)
+            self.completed += 1
+        except asyncio.CancelledError:
+            if job.id not in self._cancel_requested:
+                # The worker itself is being stopped: leave the job for the next start-up
+                task.cancel()
+                raise
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            self._finish(job, FAILED)
+            self.failed += 1
+        finally:
+            self._running.pop(job.id, None)
+            self._cancel_requested.discard(job.id)
+        await self._save(job)
+        log.info("%s job %s", job.kind, job.status, extra={
+            "job_id": job.id, "seconds": round(job.finished_at - job.started_at, 3), "error": job.error,
+        })
+
+    # --- Internals ------------------------------------------------------------
+
+    @staticmethod
+    def _finish(job: Job, status: str):
+        job.status, job.finished_at = status, time.time()
+        if status == SUCCEEDED:
+            job.partial = []  # the result supersedes the partial output
+
+    def _remember(self, job: Job):
+        self._jobs[job.id] = job
+        self._jobs.move_to_end(job.id)
+        if len(self._jobs) > self.max_jobs:
+            # Drop the oldest finished jobs (persisted ones stay loadable from SQLite)
+            for job_id in [i for i, j in self._jobs.items() if j.finished][: len(self._jobs) - self.max_jobs]:
+                del self._jobs[job_id]
+
+    async def _save(self, job: Job):
+        if self._store is None:
+            return
+        try:
+            await self._store.save(job)
+        except Exception as e:
+            log.warning("Could not persist job %s: %s: %s", job.id, type(e).__name__, e)
+
+    def stats(self) -> dict:
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "store": "sqlite" if self._store is not None else "memory",
+            "workers": self.workers,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "running": len(self._running),
+            "jobs": statuses,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+class JobQueueFull(Exception):
+    """Raised when JOB_MAX_PENDING jobs are already waiting."""
+
+
+# Singleton instance
+_job_queue = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get the shared job queue"""
+    global _job_queue
+    if _job_queue is None:
+        store = None
+        if settings.JOB_STORE.lower() == "sqlite":
+            store = _SqliteJobStore(Path(settings.JOB_STORE_PATH))
+        _job_queue = JobQueue(
+            workers=settings.JOB_WORKERS,
+            max_pending=settings.JOB_MAX_PENDING,
+            max_jobs=settings.JOB_MAX_JOBS,
+            result_ttl_seconds=settings.JOB_RESULT_TTL_SECONDS,
+            store=store,
+        )
+    return _job_queue
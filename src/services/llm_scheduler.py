@@ -0,0 +1,105 @@
+"""
+Shared LLM call scheduler: a global concurrency limit plus a token-bucket rate limiter.
+All requests that go through the same scheduler share both limits; there is one
+scheduler per service (chat, translation, personalization).
+"""
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, TypeVar
+
+from src.core.config import settings
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class LLMScheduler:
+    """Runs LLM calls under a shared semaphore and token bucket."""
+
+    def __init__(self, max_concurrency: int, requests_per_minute: float):
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        rate = requests_per_minute / 60.0
+        # Allow a burst of up to one concurrency window
+        self._bucket = TokenBucket(rate=rate, capacity=self.max_concurrency)
+        self.in_flight = 0
+
+    async def acquire_slot(self):
+        """Take one concurrency slot; pair with release_slot() in a finally."""
+        await self._semaphore.acquire()
+        try:
+            await self._bucket.acquire()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        self.in_flight += 1
+
+    def release_slot(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one concurrency slot for the duration of the block."""
+        await self.acquire_slot()
+        try:
+            yield
+        finally:
+            self.release_slot()
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        async with self.slot():
+            return await call()
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+# Per-service limits: (max concurrency, requests per minute)
+def _service_limits() -> Dict[str, tuple]:
+    return {
+        "chat": (settings.CHAT_MAX_CONCURRENCY, settings.CHAT_REQUESTS_PER_MINUTE),
+        "translation": (settings.TRANSLATION_MAX_CONCURRENCY, settings.TRANSLATION_REQUESTS_PER_MINUTE),
+        "personalization": (settings.PERSONALIZATION_MAX_CONCURRENCY, settings.PERSONALIZATION_REQUESTS_PER_MINUTE),
+    }
+
+
+# Singleton instances, one per service
+_schedulers: Dict[str, LLMScheduler] = {}
+
+
+def get_scheduler(service: str) -> LLMScheduler:
+    """Scheduler shared by all LLM calls of one service"""
+    scheduler = _schedulers.get(service)
+    if scheduler is None:
+        max_concurrency, requests_per_minute = _service_limits().get(
+            service, (settings.CHAT_MAX_CONCURRENCY, settings.CHAT_REQUESTS_PER_MINUTE)
+        )
+        scheduler = LLMScheduler(max_concurrency, requests_per_minute)
+        _schedulers[service] = scheduler
+    return scheduler
@@ -0,0 +1,133 @@
+"""
+Prometheus metrics: per-route request latency, per-stage spans, in-flight
+gauges, LLM token counts and errors by type. Served on GET /metrics.
+
+    with span("rag.llm"):
+        result = await Runner.run(agent, input=prompt)
+
+A span observes its wall time (awaits included) into
+`stage_duration_seconds{stage=...}`, holds `stage_in_flight{stage=...}` up while
+it runs and counts exceptions in `errors_total{stage=..., type=...}`. Label
+children are cached per stage, so a span costs a few microseconds (see
+benchmarks/bench_metrics.py). With prometheus_client not installed or
+METRICS_ENABLED=false, spans and the middleware do nothing.
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from src.core.config import settings
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+except ImportError:
+    Counter = Gauge = Histogram = generate_latest = None
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+METRICS_ENABLED = settings.METRICS_ENABLED and Histogram is not None
+
+# Seconds; LLM stages run into tens of seconds, cache and DB stages are sub-millisecond
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+if METRICS_ENABLED:
+    HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+    HTTP_DURATION = Histogram(
+        "http_request_duration_seconds", "HTTP request latency (until the response body is sent)",
+        ["method", "route"], buckets=_BUCKETS,
+    )
+    HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being handled")
+    STAGE_DURATION = Histogram("stage_duration_seconds", "Latency of request stages", ["stage"], buckets=_BUCKETS)
+    STAGE_IN_FLIGHT = Gauge("stage_in_flight", "Stages currently running", ["stage"])
+    ERRORS = Counter("errors_total", "Exceptions raised inside instrumented stages", ["stage", "type"])
+    LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens used", ["service", "model", "kind"])
+
+# stage -> (histogram child, gauge child)
+_stage_children: Dict[str, tuple] = {}
+
+
+def _children(stage: str) -> tuple:
+    children = _stage_children.get(stage)
+    if children is None:
+        children = _stage_children[stage] = (STAGE_DURATION.labels(stage), STAGE_IN_FLIGHT.labels(stage))
+    return children
+
+
+@contextmanager
+def span(stage: str):
+    """Time a stage of request handling (usable around awaits)."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    duration, in_flight = _children(stage)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    except GeneratorExit:
+        # A consumer stopped iterating a generator stage early; not an error
+        raise
+    except BaseException as e:
+        ERRORS.labels(stage, type(e).__name__).inc()
+        raise
+    finally:
+        duration.observe(time.perf_counter() - start)
+        in_flight.dec()
+
+
+def record_error(stage: str, error: BaseException):
+    """Count an error that was handled without leaving a span (e.g. a fallback path)."""
+    if METRICS_ENABLED:
+        ERRORS.labels(stage, type(error).__name__).inc()
+
+
+def record_llm_usage(service: str, model: str, usage) -> None:
+    """Count prompt / completion / cached prompt tokens from an OpenAI usage object."""
+    if not METRICS_ENABLED or usage is None:
+        return
+    LLM_TOKENS.labels(service, model, "prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.labels(service, model, "completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) if details is not None else 0
+    if cached:
+        LLM_TOKENS.labels(service, model, "cached").inc(cached)
+
+
+def render_metrics() -> Optional[bytes]:
+    """Prometheus text exposition of all metrics (None when metrics are disabled)."""
+    return generate_latest() if METRICS_ENABLED else None
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware (not BaseHTTPMiddleware, which buffers streaming responses)
+    recording per-route request counts and latency. Routes are labeled by their
+    path template, so /jobs/{job_id} is one series, and unmatched paths share one.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_DURATION.labels(method, path).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, path, str(status)).inc()
@@ -0,0 +1,202 @@
+"""
+Per-page chunk cache for page-aware retrieval.
+When a reader opens a page, the chunks of that page and its neighbors (pages in
+the same section) are fetched from Qdrant once, with their vectors, so questions
+asked on the page are searched in memory.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.core.config import settings
+from src.core.log import get_logger
+from src.ingestion.pages import page_section
+
+log = get_logger("page_cache")
+
+
+class PageContext:
+    """Chunks of one page plus its neighbors, with a normalized vector matrix."""
+
+    def __init__(self, page_path: str, chunks: List[dict], vectors: List[List[float]]):
+        self.page_path = page_path
+        self.chunks = chunks
+        self.loaded_at = time.time()
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(chunks), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self._matrix = matrix / np.where(norms > 0, norms, 1.0)
+
+    def search(self, vector, limit: int) -> List[dict]:
+        """Top `limit` chunks by cosine similarity."""
+        if not self.chunks:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        scores = self._matrix @ (query / norm if norm > 0 else query)
+        top = np.argsort(-scores)[:limit]
+        return [
+            {**self.chunks[i], "score": float(scores[i]), "similarity": float(scores[i])}
+            for i in top
+        ]
+
+
+def _dense_vector(vector):
+    # Collections with a named sparse vector return {"": dense, "bm25": sparse}
+    return vector.get("") if isinstance(vector, dict) else vector
+
+
+def load_page_context(qdrant_client, collection_name: str, page_path: str, max_chunks: int) -> PageContext:
+    """Scroll the page's chunks, then its section neighbors, up to max_chunks."""
+    from qdrant_client import models
+
+    def scroll(query_filter, limit: int):
+        if limit <= 0:
+            return []
+        points, _ = qdrant_client.scroll(
+            collection_name=collection_name,
+            scroll_filter=query_filter,
+            limit=limit,
+            with_payload=["content", "source_file", "chunk_index", "page_path"],
+            with_vectors=True,
+        )
+        return points
+
+    same_page = models.FieldCondition(key="page_path", match=models.MatchValue(value=page_path))
+    points = scroll(models.Filter(must=[same_page]), max_chunks)
+    points += scroll(
+        models.Filter(
+            must=[models.FieldCondition(key="page_section", match=models.MatchValue(value=page_section(page_path)))],
+            must_not=[same_page],
+        ),
+        max_chunks - len(points),
+    )
+
+    chunks, vectors = [], []
+    for point in points:
+        vector = _dense_vector(point.vector)
+        if vector is None:
+            continue
+        payload = point.payload or {}
+        chunks.append({
+            "content": payload.get("content", ""),
+            "source_file": payload.get("source_file", ""),
+            "chunk_index": payload.get("chunk_index", 0),
+            "page_path": payload.get("page_path", ""),
+        })
+        vectors.append(vector)
+    return PageContext(page_path, chunks, vectors)
+
+
+class PageCache:
+    """
+    LRU of PageContext by page path, with a TTL so re-ingested content shows up.
+    Concurrent prefetches of the same page share one Qdrant round trip.
+    """
+
+    def __init__(self, loader: Callable[[str], PageContext], max_pages: int = 256, ttl_seconds: float = 600.0):
+        self._loader = loader
+        self.max_pages = max(1, max_pages)
+        self.ttl_seconds = ttl_seconds
+        self._pages: "OrderedDict[str, PageContext]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.load_errors = 0
+        self.load_seconds = 0.0
+
+    def get(self, page_path: str) -> Optional[PageContext]:
+        context = self._pages.get(page_path)
+        if context is not None and time.time() - context.loaded_at < self.ttl_seconds:
+            self._pages.move_to_end(page_path)
+            self.hits += 1
+            return context
+        if context is not None:
+            del self._pages[page_path]
+        self.misses += 1
+        return None
+
+    async def prefetch(self, page_path: str) -> PageContext:
+        """Load the page into the cache (or join a load already in progress)."""
+        future = self._inflight.get(page_path)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[page_path] = future
+        start = time.perf_counter()
+        try:
+            context = await asyncio.to_thread(self._loader, page_path)
+        except Exception as e:
+            self.load_errors += 1
+            future.set_exception(e)
+            # Mark retrieved so an unawaited future doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(page_path, None)
+        self.loads += 1
+        self.load_seconds += time.perf_counter() - start
+
+        self._pages[page_path] = context
+        self._pages.move_to_end(page_path)
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        future.set_result(context)
+        return context
+
+    def schedule_prefetch(self, page_path: str) -> bool:
+        """Start a background prefetch unless the page is cached or already loading."""
+        if not page_path or page_path in self._inflight:
+            return False
+        context = self._pages.get(page_path)
+        if context is not None and time.time() - context.loaded_at < self.ttl_seconds:
+            return False
+
+        async def run():
+            try:
+                await self.prefetch(page_path)
+            except Exception as e:
+                log.warning("Page prefetch failed for %r: %s: %s", page_path, type(e).__name__, e)
+
+        asyncio.ensure_future(run())
+        return True
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "pages": len(self._pages),
+            "max_pages": self.max_pages,
+            "loading": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "loads": self.loads,
+            "load_errors": self.load_errors,
+            "avg_load_ms": round(self.load_seconds / self.loads * 1000, 2) if self.loads else 0.0,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+# Singleton instance
+_page_cache = None
+
+
+def get_page_cache() -> PageCache:
+    """Get the shared per-page chunk cache"""
+    global _page_cache
+    if _page_cache is None:
+        from src.services.rag_service import QDRANT_COLLECTION_NAME, _get_qdrant
+
+        _page_cache = PageCache(
+            lambda page_path: load_page_context(
+                _get_qdrant(), QDRANT_COLLECTION_NAME, page_path, settings.PAGE_PREFETCH_MAX_CHUNKS
+            ),
+            max_pages=settings.PAGE_CACHE_MAX_PAGES,
+            ttl_seconds=settings.PAGE_CACHE_TTL_SECONDS,
+        )
+    return _page_cache
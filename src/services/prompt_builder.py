@@ -0,0 +1,237 @@
+"""
+Prompt builder for the RAG chat agent.
+
+Counts tokens (tiktoken when installed, ~4 characters per token otherwise),
+fits every prompt section into its own budget (PROMPT_BUDGET_* settings), trims a long
+selected_text to the sentences most similar to the query (embedding its
+sentences in one batch), and logs the per-section token breakdown of each request.
+
+Provider-side prompt caching matches on an exact prefix, so the system
+instructions are a module constant (byte-identical on every call) and the user
+message puts the parts that change least first: conversation summary and
+history (stable across turns of one conversation), then retrieved context,
+selected text and finally the query.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.config import settings
+from src.core.log import get_logger
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+log = get_logger("prompt")
+
+# Static system prompt of the RAG agent. Never interpolate per-request values
+# into it: any change breaks the provider's prompt-cache prefix match.
+RAG_INSTRUCTIONS = (
+    "You are a specialized AI assistant and expert tutor for the 'Physical AI & Humanoid Robotics' textbook. "
+    "Your primary goal is to help users understand the book's content by providing clear, concise, and friendly explanations.\n\n"
+    "**Core Persona:**\n"
+    "- **Friendly Tutor:** Act as a patient, encouraging, and knowledgeable guide.\n"
+    "- **Expert:** You have a deep understanding of all topics covered in the book, including ROS2, Isaac Sim, digital twins, and general robotics concepts.\n"
+    "- **Focused:** Your knowledge is strictly limited to the content of this textbook.\n\n"
+    "**Rules of Engagement:**\n\n"
+    "1.  **Scope of Knowledge:**\n"
+    "    - **DO:** Only answer questions that can be answered using the content of the 'Physical AI & Humanoid Robotics' textbook. All your responses must be grounded in the provided textbook excerpts (context).\n"
+    "    - **DO NOT:** Answer questions about any other topic, book, or general knowledge. If a user asks an out-of-scope question (e.g., about politics, movies, or another technical subject), politely decline and steer the conversation back to the textbook. For example, say: \"My expertise is limited to the 'Physical AI & Humanoid Robotics' textbook. I can help you with topics like ROS2, digital twins, or any other concept from the book.\"\n\n"
+    "2.  **Language and Communication:**\n"
+    "    - **DO:** Detect the user's language and respond in the **same language**. If the user asks a question in Urdu, you must provide the full answer in Urdu. If they ask in English, answer in English.\n"
+    "    - **DO:** Maintain a conversational, natural, and easy-to-understand tone. Avoid overly technical jargon unless it's a specific term from the book that you are explaining.\n"
+    "    - **DO:** Write short, clear, human-like answers. Aim for 2-5 sentences for most explanations to keep it digestible.\n"
+    "    - **DO NOT:** Use raw markdown, code snippets, or file headings from the source material in your answer. Explain the concepts in your own words.\n\n"
+    "3.  **Answering and Explanation Flow:**\n"
+    "    - **DO:** When a user asks a question, use the provided context from the textbook to formulate your answer.\n"
+    "    - **DO:** If the user expresses confusion or asks for clarification (e.g., \"I don't understand,\" \"explain again,\" \"what does that mean?\"), re-explain the concept in even simpler terms. Maintain the same language they are using.\n"
+    "    - **DO:** If the provided context is insufficient to answer the question, state that you couldn't find specific information on that topic within the textbook.\n\n"
+    "4.  **Greeting:**\n"
+    "    - **DO:** If the user starts with a simple greeting (e.g., \"Hi\", \"Hello\", \"Salam\"), respond with a welcoming message that introduces yourself and your purpose. For example: \"Hi! I'm your AI assistant for the 'Physical AI & Humanoid Robotics' textbook. How can I help you with ROS2, Isaac Sim, or other robotics topics from the book today?\""
+)
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Tokens of `text` for the chat model (approximate without tiktoken)."""
+    global _encoding
+    if not text:
+        return 0
+    if tiktoken is not None:
+        if _encoding is None:
+            try:
+                _encoding = tiktoken.encoding_for_model("gpt-4o-mini")
+            except Exception:
+                _encoding = tiktoken.get_encoding("o200k_base")
+        return len(_encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def truncate_tokens(text: str, max_tokens: int, keep: str = "head") -> str:
+    """Cut `text` to ~max_tokens, keeping its head or tail."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if tiktoken is not None and _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        kept = tokens[:max_tokens] if keep == "head" else tokens[-max_tokens:]
+        text = _encoding.decode(kept)
+    else:
+        text = text[: max_tokens * 4] if keep == "head" else text[-max_tokens * 4:]
+    return text + " ..." if keep == "head" else "... " + text
+
+
+def section_budgets() -> Dict[str, int]:
+    return {
+        "summary": settings.CONVERSATION_SUMMARY_MAX_TOKENS,
+        "history": settings.PROMPT_BUDGET_HISTORY,
+        "context": settings.RAG_CONTEXT_TOKEN_BUDGET,
+        "selected_text": settings.PROMPT_BUDGET_SELECTED_TEXT,
+        "query": settings.PROMPT_BUDGET_QUERY,
+    }
+
+
+@dataclass
+class BuiltPrompt:
+    text: str
+    used_chunks: List[dict]
+    tokens: Dict[str, int] = field(default_factory=dict)
+
+    def log_fields(self) -> dict:
+        return {f"tokens_{name}": count for name, count in self.tokens.items()}
+
+
+def pack_context(chunks: List[dict], token_budget: int) -> Tuple[str, List[dict]]:
+    """
+    Pack retrieved chunks (best first) into a context block under the token budget.
+    Returns the context text and the chunks that made it in.
+    """
+    parts = []
+    used = []
+    remaining = token_budget
+    for chunk in chunks:
+        content = chunk["content"].strip()
+        if not content:
+            continue
+        cost = count_tokens(content)
+        if cost > remaining:
+            if used:
+                break
+            # Always keep (a truncated) top chunk so the answer has some grounding
+            content = truncate_tokens(content, remaining)
+            cost = remaining
+        parts.append(f"[{len(used) + 1}] ({chunk['source_file']})\n{content}")
+        used.append(chunk)
+        remaining -= cost
+        if remaining <= 0:
+            break
+    return "\n\n".join(parts), used
+
+
+def fit_history(messages: List[dict], token_budget: int) -> str:
+    """Most recent messages (oldest first) that fit the budget; a long message is cut to its head."""
+    lines: List[str] = []
+    remaining = token_budget
+    for m in reversed(messages):
+        prefix = "User" if m.get("role", "user") == "user" else "Assistant"
+        line = f"{prefix}: {m.get('content', '')}"
+        cost = count_tokens(line)
+        if cost > remaining:
+            if remaining > 32:
+                lines.insert(0, truncate_tokens(line, remaining))
+            break
+        lines.insert(0, line)
+        remaining -= cost
+    return "\n".join(lines)
+
+
+async def trim_selected_text(selected_text: str, query_vector, token_budget: int, embed) -> str:
+    """
+    Keep the sentences of `selected_text` most similar to the query, in their
+    original order, within the budget (gaps marked with "..."). `embed` is an
+    async list-of-texts -> vectors function, called once for all sentences.
+    Without a query vector, past PROMPT_SELECTED_TEXT_MAX_SENTENCES sentences
+    or on embedding errors the head of the text is kept.
+    """
+    if count_tokens(selected_text) <= token_budget:
+        return selected_text
+    sentences = [s.strip() for s in _SENTENCE_RE.split(selected_text) if s.strip()]
+    if query_vector is None or not 2 <= len(sentences) <= settings.PROMPT_SELECTED_TEXT_MAX_SENTENCES:
+        return truncate_tokens(selected_text, token_budget)
+    try:
+        vectors = await embed(sentences)
+    except Exception as e:
+        log.warning("Could not embed selected text, keeping its head: %s: %s", type(e).__name__, e)
+        return truncate_tokens(selected_text, token_budget)
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    scores = matrix @ (query / max(float(np.linalg.norm(query)), 1e-12))
+
+    chosen, remaining = [], token_budget
+    for i in np.argsort(-scores):
+        cost = count_tokens(sentences[i])
+        if cost <= remaining:
+            chosen.append(int(i))
+            remaining -= cost
+    if not chosen:
+        return truncate_tokens(sentences[int(np.argmax(scores))], token_budget)
+
+    parts, previous = [], -1
+    for i in sorted(chosen):
+        if previous >= 0 and i != previous + 1:
+            parts.append("...")
+        parts.append(sentences[i])
+        previous = i
+    return " ".join(parts)
+
+
+async def build_prompt(
+    query: str,
+    query_vector,
+    chunks: List[dict],
+    selected_text: Optional[str],
+    conversation_history: Optional[List[dict]],
+    conversation_summary: Optional[str],
+    embed,
+) -> BuiltPrompt:
+    """Assemble the user message for the RAG agent, each section within its budget."""
+    budgets = section_budgets()
+
+    summary = truncate_tokens(conversation_summary or "", budgets["summary"], keep="tail")
+    history = fit_history(conversation_history or [], budgets["history"])
+    context_text, used = pack_context(chunks, budgets["context"])
+    selected = ""
+    if selected_text:
+        selected = await trim_selected_text(selected_text, query_vector, budgets["selected_text"], embed)
+    query = truncate_tokens(query, budgets["query"])
+
+    sections = []
+    if summary:
+        sections.append(f"Earlier in this conversation (summary):\n{summary}")
+    sections.append(f"Conversation History:\n{history}")
+    if context_text:
+        sections.append(f"Textbook Context:\n{context_text}")
+    if selected:
+        sections.append(f"User selected text:\n'''{selected}'''\n\nPlease explain or answer based on this text.")
+    sections.append(f"User: {query}\n\nAssistant:")
+    text = "\n\n".join(sections)
+
+    tokens = {
+        "system": count_tokens(RAG_INSTRUCTIONS),
+        "summary": count_tokens(summary),
+        "history": count_tokens(history),
+        "context": count_tokens(context_text),
+        "selected_text": count_tokens(selected),
+        "query": count_tokens(query),
+    }
+    tokens["total"] = tokens["system"] + count_tokens(text)
+    return BuiltPrompt(text, used, tokens)
@@ -1,25 +1,37 @@
 """
-RAG Service - Pure Qdrant-based chatbot
-Search textbook, return relevant sections. Simple. Clean. No bloat.
+RAG Service - Qdrant-grounded chatbot
+Search textbook, pack relevant sections into the prompt, answer with the LLM.
 """
+import asyncio
 import os
-from typing import List, Optional, Tuple
-import os
-from qdrant_client import QdrantClient
+import time
+from typing import AsyncIterator, List, Optional, Tuple
+from qdrant_client import QdrantClient, models
 from fastembed import TextEmbedding
 from src.core.config import settings
+from src.core.log import get_logger
+from src.ingestion.pages import normalize_page_path, page_section
+from src.ingestion.pipeline import SPARSE_MODEL_NAME, SPARSE_VECTOR_NAME
+from src.services.embedding_service import EmbeddingQueueFull, get_query_batcher
+from src.services.metrics import record_error, span
+from src.services.page_cache import get_page_cache
+from src.services.prompt_builder import RAG_INSTRUCTIONS, build_prompt
+from src.services.semantic_cache import get_semantic_cache, make_context_key
 
 # Global state
 _qdrant_client = None
 _embedding_model = None
+_sparse_embedding_model = None
 
 # Optional: LLM agent for human-style answers
 _llm_agent = None
 
+log = get_logger("rag")
+
 
 def _get_llm_agent():
     """
-    Lazy-init OpenAI 'Agent' (via openai-agents) to rewrite RAG chunks
+    Lazy-init OpenAI 'Agent' (via agents_wrapper) to rewrite RAG chunks
     into short, human-style answers.
     """
     global _llm_agent
@@ -27,51 +39,32 @@ def _get_llm_agent():
         return _llm_agent
 
     try:
-        from agents import Agent  # type: ignore
+        from agents_wrapper import Agent
 
         if not settings.OPENAI_API_KEY:
-            print("[RAG] OPENAI_API_KEY not set; running in pure-RAG mode")
+            log.warning("OPENAI_API_KEY not set; running in pure-RAG mode")
             return None
 
-        # Ensure env var is set for openai-agents
-        os.environ["OPENAI_API_KEY"] = settings.OPENAI_API_KEY
-
         _llm_agent = Agent(
             name="RAG Answer Rewriter",
-            instructions=(
-                "You are a specialized AI assistant and expert tutor for the 'Physical AI & Humanoid Robotics' textbook. "
-                "Your primary goal is to help users understand the book's content by providing clear, concise, and friendly explanations.\n\n"
-                "**Core Persona:**\n"
-                "- **Friendly Tutor:** Act as a patient, encouraging, and knowledgeable guide.\n"
-                "- **Expert:** You have a deep understanding of all topics covered in the book, including ROS2, Isaac Sim, digital twins, and general robotics concepts.\n"
-                "- **Focused:** Your knowledge is strictly limited to the content of this textbook.\n\n"
-                "**Rules of Engagement:**\n\n"
-                "1.  **Scope of Knowledge:**\n"
-                "    - **DO:** Only answer questions that can be answered using the content of the 'Physical AI & Humanoid Robotics' textbook. All your responses must be grounded in the provided textbook excerpts (context).\n"
-                "    - **DO NOT:** Answer questions about any other topic, book, or general knowledge. If a user asks an out-of-scope question (e.g., about politics, movies, or another technical subject), politely decline and steer the conversation back to the textbook. For example, say: \"My expertise is limited to the 'Physical AI & Humanoid Robotics' textbook. I can help you with topics like ROS2, digital twins, or any other concept from the book.\"\n\n"
-                "2.  **Language and Communication:**\n"
-                "    - **DO:** Detect the user's language and respond in the **same language**. If the user asks a question in Urdu, you must provide the full answer in Urdu. If they ask in English, answer in English.\n"
-                "    - **DO:** Maintain a conversational, natural, and easy-to-understand tone. Avoid overly technical jargon unless it's a specific term from the book that you are explaining.\n"
-                "    - **DO:** Write short, clear, human-like answers. Aim for 2-5 sentences for most explanations to keep it digestible.\n"
-                "    - **DO NOT:** Use raw markdown, code snippets, or file headings from the source material in your answer. Explain the concepts in your own words.\n\n"
-                "3.  **Answering and Explanation Flow:**\n"
-                "    - **DO:** When a user asks a question, use the provided context from the textbook to formulate your answer.\n"
-                "    - **DO:** If the user expresses confusion or asks for clarification (e.g., \"I don't understand,\" \"explain again,\" \"what does that mean?\"), re-explain the concept in even simpler terms. Maintain the same language they are using.\n"
-                "    - **DO:** If the provided context is insufficient to answer the question, state that you couldn't find specific information on that topic within the textbook.\n\n"
-                "4.  **Greeting:**\n"
-                "    - **DO:** If the user starts with a simple greeting (e.g., \"Hi\", \"Hello\", \"Salam\"), respond with a welcoming message that introduces yourself and your purpose. For example: \"Hi! I'm your AI assistant for the 'Physical AI & Humanoid Robotics' textbook. How can I help you with ROS2, Isaac Sim, or other robotics topics from the book today?\""
-            ),
+            instructions=RAG_INSTRUCTIONS,
             model="gpt-4o-mini",
+            service="chat",
         )
-        print("[OK] LLM agent initialized for RAG answers")
+        log.info("LLM agent initialized for RAG answers")
         return _llm_agent
     except Exception as e:
-        print(f"[WARN] Could not initialize LLM agent, falling back to raw RAG text: {e}")
+        log.warning("Could not initialize LLM agent, falling back to raw RAG text: %s", e)
         return None
 
 QDRANT_COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME", "textbook_chunks")
 
 
+def qdrant_configured() -> bool:
+    """QDRANT_URL or QDRANT_HOST is set (otherwise _get_qdrant falls back to localhost)."""
+    return bool(settings.QDRANT_URL or settings.QDRANT_HOST)
+
+
 def _get_qdrant():
     """Initialize Qdrant client once"""
     global _qdrant_client
@@ -79,8 +72,11 @@ def _get_qdrant():
         return _qdrant_client
     
     try:
-        if settings.QDRANT_URL:
-            print("[RAG] Initializing Qdrant Cloud client...")
+        if settings.QDRANT_URL == ":memory:":
+            log.info("Initializing in-memory Qdrant client")
+            _qdrant_client = QdrantClient(":memory:")
+        elif settings.QDRANT_URL:
+            log.info("Initializing Qdrant Cloud client")
             _qdrant_client = QdrantClient(
                 url=settings.QDRANT_URL,
                 api_key=settings.QDRANT_API_KEY,
@@ -88,18 +84,18 @@ def _get_qdrant():
                 prefer_grpc=False,
                 check_compatibility=False,
             )
-            print("[OK] Qdrant Cloud connected")
+            log.info("Qdrant Cloud connected")
         else:
-            print("[RAG] Initializing local Qdrant client...")
+            log.info("Initializing local Qdrant client")
             _qdrant_client = QdrantClient(
-                host=os.getenv("QDRANT_HOST", "localhost"),
-                port=int(os.getenv("QDRANT_PORT", "6333")),
+                host=settings.QDRANT_HOST or "localhost",
+                port=settings.QDRANT_PORT,
                 timeout=10.0,
             )
-            print("[OK] Local Qdrant connected")
+            log.info("Local Qdrant connected")
         return _qdrant_client
     except Exception as e:
-        print(f"[ERROR] Qdrant error: {e}")
+        log.error("Qdrant error: %s", e)
         raise
 
 
@@ -110,37 +106,356 @@ def _get_embedder():
         return _embedding_model
     
     try:
-        print("[RAG] Loading FastEmbed model (BAAI/bge-small-en-v1.5)...")
+        if settings.EMBEDDING_SOCKET_PATH:
+            # Multi-worker mode (serve.py): one shared embedding worker owns the model
+            from src.services.embedding_server import RemoteEmbedder
+
+            log.info("Using shared embedding worker at %s", settings.EMBEDDING_SOCKET_PATH)
+            _embedding_model = RemoteEmbedder(settings.EMBEDDING_SOCKET_PATH)
+            return _embedding_model
+
+        log.info("Loading FastEmbed model (BAAI/bge-small-en-v1.5)")
         _embedding_model = TextEmbedding(model_name="BAAI/bge-small-en-v1.5")
-        print("[OK] Embedder loaded")
+        log.info("Embedder loaded")
         return _embedding_model
     except Exception as e:
-        print(f"[ERROR] Embedder error: {e}")
+        log.error("Embedder error: %s", e)
+        raise
+
+
+async def _embed_passages(texts: List[str]) -> List[List[float]]:
+    """Embed `texts` in one batch off the event loop (bypasses the query batcher and its cache)."""
+    def encode():
+        return [vector.tolist() for vector in _get_embedder().embed(texts, batch_size=len(texts))]
+
+    return await asyncio.to_thread(encode)
+
+
+def _get_sparse_embedder():
+    """Initialize the BM25 sparse query encoder once (tokenizer + stemmer, no ONNX model)"""
+    global _sparse_embedding_model
+    if _sparse_embedding_model is not None:
+        return _sparse_embedding_model
+
+    try:
+        from fastembed import SparseTextEmbedding
+
+        log.info("Loading sparse model (%s)", SPARSE_MODEL_NAME)
+        _sparse_embedding_model = SparseTextEmbedding(model_name=SPARSE_MODEL_NAME)
+        log.info("Sparse embedder loaded")
+        return _sparse_embedding_model
+    except Exception as e:
+        log.error("Sparse embedder error: %s", e)
         raise
 
 
+def _rrf_fuse(result_lists: List[List[dict]], k: int, limit: int) -> List[dict]:
+    """
+    Reciprocal rank fusion: score(chunk) = sum over lists of 1 / (k + rank).
+    Chunks are identified by (source_file, chunk_index); the fused score replaces
+    the retriever score, while the dense cosine is kept as "similarity".
+    """
+    fused = {}
+    for results in result_lists:
+        for rank, chunk in enumerate(results, start=1):
+            key = (chunk["source_file"], chunk["chunk_index"])
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {**chunk, "score": 0.0}
+            elif entry.get("similarity") is None:
+                entry["similarity"] = chunk.get("similarity")
+            entry["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda c: c["score"], reverse=True)[:limit]
+
+
+def _log_cached_tokens(usage):
+    """Log how much of the prompt the provider served from its prompt cache."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    if usage is None or details is None:
+        return
+    cached = getattr(details, "cached_tokens", 0) or 0
+    log.info("Prompt cache", extra={"cached_tokens": cached, "prompt_tokens": usage.prompt_tokens})
+
+
+def _dense_search_params() -> models.SearchParams:
+    """
+    Oversample on quantized vectors and rescore on the originals (ignored by
+    Qdrant for collections without quantization).
+    """
+    return models.SearchParams(
+        hnsw_ef=settings.QDRANT_HNSW_EF or None,
+        quantization=models.QuantizationSearchParams(
+            rescore=settings.QDRANT_RESCORE,
+            oversampling=settings.QDRANT_OVERSAMPLING,
+        ),
+    )
+
+
+def _merge_chunks(first: List[dict], second: List[dict], limit: int) -> List[dict]:
+    """Chunks of `first` followed by unseen chunks of `second`, up to limit."""
+    seen = set()
+    merged = []
+    for chunk in first + second:
+        key = (chunk["source_file"], chunk["chunk_index"])
+        if key not in seen:
+            seen.add(key)
+            merged.append(chunk)
+    return merged[:limit]
+
+
+def _page_filter(page_path: str):
+    """The page itself or any page in its section."""
+    return models.Filter(should=[
+        models.FieldCondition(key="page_path", match=models.MatchValue(value=page_path)),
+        models.FieldCondition(key="page_section", match=models.MatchValue(value=page_section(page_path))),
+    ])
+
+
+def _retrieval_key(mode: str, hybrid: bool, page_path: str = "") -> str:
+    """
+    Cache partition for answers: hybrid vs dense retrieval and the reader's page
+    (page-aware retrieval) can ground answers differently.
+    """
+    if mode != "retrieval":
+        return mode
+    return f"{mode}{'+hybrid' if hybrid else ''}{'@' + page_path if page_path else ''}"
+
+
 class RAGService:
     """Pure RAG Service - Search Qdrant, return results"""
     
     def __init__(self):
         self.qdrant = _get_qdrant()
         self.embedder = _get_embedder()
+
+    async def _embed_query(self, query: str, mode: str) -> Optional[List[float]]:
+        """
+        Embed the query (micro-batched) when retrieval or the semantic cache needs it.
+        Returns None if neither does or embedding fails.
+        """
+        if mode != "retrieval" and not settings.SEMANTIC_CACHE_ENABLED:
+            return None
+        try:
+            with span("rag.embed"):
+                return await get_query_batcher().embed(query)
+        except EmbeddingQueueFull:
+            # Load shedding: let the endpoint answer 503 instead of queueing more work
+            raise
+        except Exception as e:
+            log.warning("Query embedding failed: %s: %s", type(e).__name__, e)
+            return None
+
+    def _cache_lookup(self, query_vector, context_key: str) -> Optional[dict]:
+        if query_vector is None or not settings.SEMANTIC_CACHE_ENABLED:
+            return None
+        with span("rag.cache_lookup"):
+            return get_semantic_cache().lookup(query_vector, context_key)
+
+    def _cache_store(self, query_vector, context_key: str, result: dict):
+        if query_vector is None or not settings.SEMANTIC_CACHE_ENABLED or not result.get("answer"):
+            return
+        get_semantic_cache().store(query_vector, context_key, {
+            "answer": result["answer"],
+            "sources": result["sources"],
+            "search_used": result["search_used"],
+        })
+
+    async def _search(self, query, limit: int, using: Optional[str] = None, query_filter=None) -> List[dict]:
+        """Run one Qdrant query (dense vector, or sparse vector via `using`)."""
+        with span("rag.qdrant"):
+            response = await asyncio.to_thread(
+                self.qdrant.query_points,
+                collection_name=QDRANT_COLLECTION_NAME,
+                query=query,
+                using=using,
+                query_filter=query_filter,
+                search_params=_dense_search_params() if using is None else None,
+                limit=limit,
+                with_payload=True,
+            )
+
+        chunks = []
+        for point in response.points:
+            payload = point.payload or {}
+            chunks.append({
+                "content": payload.get("content", ""),
+                "source_file": payload.get("source_file", ""),
+                "chunk_index": payload.get("chunk_index", 0),
+                "page_path": payload.get("page_path", ""),
+                "score": point.score,
+                # Dense cosine similarity (comparable across queries); BM25 scores are not
+                "similarity": point.score if using is None else None,
+            })
+        return chunks
+
+    async def _sparse_search(self, query: str, limit: int, query_filter=None) -> List[dict]:
+        def encode():
+            return next(iter(_get_sparse_embedder().query_embed(query)))
+
+        embedding = await asyncio.to_thread(encode)
+        vector = models.SparseVector(
+            indices=embedding.indices.tolist(),
+            values=embedding.values.tolist(),
+        )
+        return await self._search(vector, limit, using=SPARSE_VECTOR_NAME, query_filter=query_filter)
+
+    async def _retrieve(
+        self,
+        query: str,
+        query_vector: List[float],
+        limit: int,
+        hybrid: bool,
+        query_filter=None,
+        page_context=None,
+    ) -> List[dict]:
+        """
+        Search Qdrant for the top chunks for an embedded query.
+
+        With `hybrid`, dense and BM25 searches run concurrently and are fused with
+        RRF; if the sparse side fails (e.g. collection ingested without --sparse)
+        the dense results are used alone.
+
+        `query_filter` restricts both searches; with a cached `page_context`
+        (matching that filter) the dense side is searched in memory instead.
+        """
+        candidates = limit * max(1, settings.RAG_HYBRID_CANDIDATES) if hybrid else limit
+
+        async def dense_search():
+            if page_context is not None:
+                return page_context.search(query_vector, candidates)
+            return await self._search(query_vector, candidates, query_filter=query_filter)
+
+        if not hybrid:
+            return await dense_search()
+
+        dense, sparse = await asyncio.gather(
+            dense_search(),
+            self._sparse_search(query, candidates, query_filter=query_filter),
+            return_exceptions=True,
+        )
+        if isinstance(dense, BaseException):
+            raise dense
+        if isinstance(sparse, BaseException):
+            log.warning("Sparse search failed, using dense results only: %s: %s", type(sparse).__name__, sparse)
+            return dense[:limit]
+        return _rrf_fuse([dense, sparse], settings.RAG_RRF_K, limit)
+
+    async def _retrieve_for_page(
+        self,
+        query: str,
+        query_vector: List[float],
+        limit: int,
+        hybrid: bool,
+        page_path: str,
+    ) -> Tuple[List[dict], str]:
+        """
+        Search the reader's page and its section first; widen to the whole
+        collection when the best page match is below RAG_PAGE_MIN_SCORE or the
+        page has fewer than `limit` chunks. Returns (chunks, scope).
+
+        The page's chunks are served from the per-page cache when prefetched;
+        otherwise Qdrant is queried with a page filter and a prefetch is started
+        for the reader's next question.
+        """
+        page_cache = get_page_cache()
+        page_context = page_cache.get(page_path)
+        if page_context is None:
+            page_cache.schedule_prefetch(page_path)
+
+        try:
+            scoped = await self._retrieve(
+                query, query_vector, limit, hybrid,
+                query_filter=_page_filter(page_path), page_context=page_context,
+            )
+        except Exception as e:
+            log.warning("Page-scoped search failed, searching whole collection: %s: %s", type(e).__name__, e)
+            scoped = []
+
+        similarities = [c["similarity"] for c in scoped if c.get("similarity") is not None]
+        confident = bool(similarities) and max(similarities) >= settings.RAG_PAGE_MIN_SCORE
+        if confident and len(scoped) >= limit:
+            return scoped, "page"
+
+        widened = await self._retrieve(query, query_vector, limit, hybrid)
+        if confident:
+            # Keep the good page matches, fill the rest from the whole collection
+            return _merge_chunks(scoped, widened, limit), "page+collection"
+        return widened, "collection"
     
+    async def _build_prompt(
+        self,
+        query: str,
+        query_vector: Optional[List[float]],
+        selected_text: Optional[str],
+        conversation_history: Optional[List[dict]],
+        limit: int,
+        mode: str,
+        hybrid: bool = False,
+        page_path: str = "",
+        conversation_summary: Optional[str] = None,
+    ) -> Tuple[str, List[dict], str]:
+        """
+        Retrieve textbook context (in "retrieval" mode) and build the agent prompt.
+        Returns (prompt, sources, search_used).
+        """
+        # 1. Retrieve textbook context
+        chunks: List[dict] = []
+        search_used = "direct_llm"
+        if mode == "retrieval" and query_vector is not None:
+            try:
+                with span("rag.retrieve"):
+                    if page_path:
+                        chunks, scope = await self._retrieve_for_page(query, query_vector, limit, hybrid, page_path)
+                    else:
+                        chunks, scope = await self._retrieve(query, query_vector, limit, hybrid), "collection"
+                search_used = "hybrid" if hybrid else "retrieval"
+                log.debug("Retrieved %d chunks", len(chunks), extra={"search_used": search_used, "scope": scope})
+            except Exception as e:
+                log.warning("Retrieval failed, falling back to direct LLM: %s: %s", type(e).__name__, e)
+
+        # 2. Build the prompt, every section within its token budget
+        history = (conversation_history or [])[-settings.CONVERSATION_RECENT_MESSAGES:]
+        with span("rag.prompt"):
+            built = await build_prompt(
+                query, query_vector, chunks, selected_text, history, conversation_summary,
+                embed=_embed_passages,
+            )
+        sources = [
+            {"source_file": c["source_file"], "chunk_index": c["chunk_index"]}
+            for c in built.used_chunks
+        ]
+        log.info("Prompt tokens", extra=built.log_fields())
+        return built.text, sources, search_used
+
     async def generate_response(
         self,
         query: str,
         selected_text: Optional[str] = None,
         current_page: Optional[str] = None,
         conversation_history: Optional[List[dict]] = None,
-        limit: int = 3
+        limit: int = 3,
+        mode: Optional[str] = None,
+        hybrid: Optional[bool] = None,
+        conversation_summary: Optional[str] = None,
     ) -> dict:
         """
-        Direct LLM Chatbot - No RAG, No Qdrant.
-        Just passes the query (and history) to the OpenAI Agent.
+        Answer a question with the OpenAI Agent.
+
+        In "retrieval" mode the query is embedded, the top `limit` chunks are
+        fetched from Qdrant and packed into the prompt under
+        RAG_CONTEXT_TOKEN_BUDGET (other prompt sections have their own budgets,
+        see prompt_builder.py). In "direct" mode the query (and history) is
+        passed to the agent without context. `mode` defaults to settings.RAG_MODE.
+        `hybrid` (default settings.RAG_HYBRID_ENABLED) fuses dense and BM25 results.
+        `current_page` scopes retrieval to the reader's page and section first
+        (RAG_PAGE_AWARE_ENABLED). `conversation_summary` is the rolling summary
+        of turns older than `conversation_history` (see conversation_store.py).
         """
+        mode = (mode or settings.RAG_MODE).lower()
+        hybrid = settings.RAG_HYBRID_ENABLED if hybrid is None else hybrid
+        page_path = normalize_page_path(current_page) if settings.RAG_PAGE_AWARE_ENABLED else ""
         try:
-            print("[RAG] generate_response() start - DIRECT LLM MODE")
-            print(f"[RAG] Raw query: {query!r}")
+            log.debug("generate_response() start", extra={"mode": mode, "query_chars": len(query)})
 
             # 1. Get the Agent
             agent = _get_llm_agent()
@@ -151,37 +466,29 @@ class RAGService:
                     "search_used": "error"
                 }
 
-            from agents import Runner  # type: ignore
+            from agents_wrapper import Runner
 
-            # 2. Build Prompt
-            # We include conversation history and the current query.
-            # We also include selected_text if present, as context.
-            
-            history_text = ""
-            if conversation_history:
-                last_msgs = conversation_history[-6:] # Keep last 6 messages
-                parts = []
-                for m in last_msgs:
-                    role = m.get("role", "user")
-                    prefix = "User" if role == "user" else "Assistant"
-                    parts.append(f"{prefix}: {m.get('content', '')}")
-                history_text = "\n".join(parts)
-
-            context_instruction = ""
-            if selected_text:
-                context_instruction = f"\n\nUser selected text:\n'''{selected_text}'''\n\nPlease explain or answer based on this text."
-
-            prompt = (
-                f"Conversation History:\n{history_text}\n\n"
-                f"User: {query}"
-                f"{context_instruction}\n\n"
-                "Assistant:"
+            # 2. Semantic cache (keyed on query embedding + selected_text/history)
+            query_vector = await self._embed_query(query, mode)
+            context_key = make_context_key(
+                selected_text, conversation_history, _retrieval_key(mode, hybrid, page_path), conversation_summary
             )
+            cached = self._cache_lookup(query_vector, context_key)
+            if cached is not None:
+                log.debug("Semantic cache hit")
+                return {**cached, "cache_hit": True}
 
-            # 3. Run Agent
-            print("[RAG] Calling LLM...")
+            # 3. Retrieve context and build prompt
+            prompt, sources, search_used = await self._build_prompt(
+                query, query_vector, selected_text, conversation_history, limit, mode, hybrid, page_path,
+                conversation_summary,
+            )
+
+            # 4. Run Agent
             # Use await as per translator.py pattern
-            llm_answer = await Runner.run(agent, input=prompt)
+            with span("rag.llm"):
+                llm_answer = await Runner.run(agent, input=prompt)
+            _log_cached_tokens(getattr(llm_answer, "usage", None))
             
             # Extract text from RunResult
             final_answer = ""
@@ -210,22 +517,123 @@ class RAGService:
                  else:
                      final_answer = raw_str
 
-            return {
+            result = {
                 "answer": final_answer,
-                "sources": [], # No sources since no RAG
-                "search_used": "direct_llm",
+                "sources": sources,
+                "search_used": search_used,
             }
+            self._cache_store(query_vector, context_key, result)
+            return result
 
+        except EmbeddingQueueFull:
+            raise
         except Exception as e:
-            import traceback
-            trace = traceback.format_exc()
-            print(f"[ERROR] LLM error: {type(e).__name__}: {e}\n{trace}")
+            log.exception("LLM error: %s: %s", type(e).__name__, e)
+            record_error("rag.generate", e)
             return {
                 "answer": f"Error: {type(e).__name__}: {str(e)}",
                 "sources": [],
                 "search_used": "error",
             }
 
+    async def stream_response(
+        self,
+        query: str,
+        selected_text: Optional[str] = None,
+        current_page: Optional[str] = None,
+        conversation_history: Optional[List[dict]] = None,
+        limit: int = 3,
+        mode: Optional[str] = None,
+        hybrid: Optional[bool] = None,
+        conversation_summary: Optional[str] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Streaming variant of generate_response.
+
+        Yields {"type": "token", "delta": str} events while the LLM generates,
+        then one {"type": "final", ...} event with the full answer, sources and
+        timings (time-to-first-token and total latency, in ms). On failure a
+        {"type": "error", "message": str} event is yielded instead of "final".
+
+        A {"type": "ready"} event comes first, once the query is embedded: up to
+        there EmbeddingQueueFull is raised (load shedding, like generate_response),
+        so callers can answer 503 before starting the response.
+        """
+        mode = (mode or settings.RAG_MODE).lower()
+        hybrid = settings.RAG_HYBRID_ENABLED if hybrid is None else hybrid
+        page_path = normalize_page_path(current_page) if settings.RAG_PAGE_AWARE_ENABLED else ""
+        start = time.perf_counter()
+        try:
+            log.debug("stream_response() start", extra={"mode": mode, "query_chars": len(query)})
+
+            agent = _get_llm_agent()
+            if not agent:
+                yield {"type": "error", "message": "LLM Agent not initialized. Please check OPENAI_API_KEY."}
+                return
+
+            from agents_wrapper import Runner
+
+            query_vector = await self._embed_query(query, mode)
+            yield {"type": "ready"}
+            context_key = make_context_key(
+                selected_text, conversation_history, _retrieval_key(mode, hybrid, page_path), conversation_summary
+            )
+            cached = self._cache_lookup(query_vector, context_key)
+            if cached is not None:
+                total_ms = (time.perf_counter() - start) * 1000
+                yield {"type": "token", "delta": cached["answer"]}
+                yield {
+                    "type": "final",
+                    **cached,
+                    "cache_hit": True,
+                    "timings": {"prompt_ms": None, "ttft_ms": round(total_ms, 1), "total_ms": round(total_ms, 1)},
+                }
+                return
+
+            prompt, sources, search_used = await self._build_prompt(
+                query, query_vector, selected_text, conversation_history, limit, mode, hybrid, page_path,
+                conversation_summary,
+            )
+            prompt_ms = (time.perf_counter() - start) * 1000
+
+            parts = []
+            ttft_ms = None
+            deltas = Runner.stream(agent, input=prompt)
+            with span("rag.llm"):
+                try:
+                    async for delta in deltas:
+                        if ttft_ms is None:
+                            ttft_ms = (time.perf_counter() - start) * 1000
+                        parts.append(delta)
+                        yield {"type": "token", "delta": delta}
+                finally:
+                    # A client that goes away mid-answer frees the LLM slot right away
+                    await deltas.aclose()
+
+            answer = "".join(parts)
+            total_ms = (time.perf_counter() - start) * 1000
+            log.info("Stream complete", extra={"ttft_ms": round(ttft_ms or 0), "total_ms": round(total_ms)})
+            self._cache_store(query_vector, context_key, {
+                "answer": answer, "sources": sources, "search_used": search_used,
+            })
+            yield {
+                "type": "final",
+                "answer": answer,
+                "sources": sources,
+                "search_used": search_used,
+                "timings": {
+                    "prompt_ms": round(prompt_ms, 1),
+                    "ttft_ms": round(ttft_ms, 1) if ttft_ms is not None else None,
+                    "total_ms": round(total_ms, 1),
+                },
+            }
+        except EmbeddingQueueFull:
+            raise
+        except Exception as e:
+            log.error("LLM stream error: %s: %s", type(e).__name__, e)
+            record_error("rag.stream", e)
+            yield {"type": "error", "message": f"{type(e).__name__}: {str(e)}"}
+
 
 # Singleton instance
 _rag_service = None
@@ -0,0 +1,160 @@
+"""
+Semantic answer cache for the chat LLM call.
+Near-identical questions (by embedding cosine similarity) reuse a stored answer.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from src.core.config import settings
+
+
+def make_context_key(
+    selected_text: Optional[str] = None,
+    conversation_history: Optional[List[dict]] = None,
+    mode: str = "",
+    conversation_summary: str = "",
+) -> str:
+    """
+    Hash of everything besides the query that shapes the answer.
+    Only entries with the same context key can match each other.
+    """
+    history = [
+        {"role": m.get("role", "user"), "content": m.get("content", "")}
+        for m in (conversation_history or [])[-settings.CONVERSATION_RECENT_MESSAGES:]
+    ]
+    raw = json.dumps([mode, selected_text or "", history, conversation_summary or ""], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SemanticCache:
+    """
+    In-process vector index of (query embedding -> answer).
+
+    Embeddings live in a preallocated float32 matrix; a lookup is one
+    matrix-vector product. Entries expire after `ttl_seconds` and the least
+    recently used entry is evicted when the cache is full.
+    """
+
+    def __init__(
+        self,
+        dim: int = 384,
+        max_entries: int = 2000,
+        ttl_seconds: float = 3600.0,
+        threshold: float = 0.95,
+    ):
+        self.dim = dim
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+
+        self._vectors = np.zeros((self.max_entries, dim), dtype=np.float32)
+        self._active = np.zeros(self.max_entries, dtype=bool)
+        self._context_keys: List[Optional[str]] = [None] * self.max_entries
+        self._expires_at = np.zeros(self.max_entries, dtype=np.float64)
+        self._values: List[Optional[dict]] = [None] * self.max_entries
+        self._lru: "OrderedDict[int, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm > 0 else v
+
+    def lookup(self, vector, context_key: str) -> Optional[dict]:
+        """Return the cached value for the most similar query above threshold, or None."""
+        query = self._normalize(vector)
+        now = time.time()
+        with self._lock:
+            candidates = np.flatnonzero(self._active & (self._expires_at > now))
+            if candidates.size:
+                same_context = np.array(
+                    [self._context_keys[i] == context_key for i in candidates], dtype=bool
+                )
+                candidates = candidates[same_context]
+            if candidates.size:
+                scores = self._vectors[candidates] @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    slot = int(candidates[best])
+                    self._lru.move_to_end(slot)
+                    self.hits += 1
+                    return self._values[slot]
+            self.misses += 1
+            return None
+
+    def store(self, vector, context_key: str, value: dict):
+        now = time.time()
+        with self._lock:
+            slot = self._free_slot(now)
+            self._vectors[slot] = self._normalize(vector)
+            self._active[slot] = True
+            self._context_keys[slot] = context_key
+            self._expires_at[slot] = now + self.ttl_seconds
+            self._values[slot] = value
+            self._lru[slot] = None
+            self._lru.move_to_end(slot)
+
+    def _free_slot(self, now: float) -> int:
+        # Reclaim expired entries first, then fall back to LRU eviction
+        expired = np.flatnonzero(self._active & (self._expires_at <= now))
+        for slot in expired:
+            self._release(int(slot))
+        inactive = np.flatnonzero(~self._active)
+        if inactive.size:
+            return int(inactive[0])
+        slot, _ = self._lru.popitem(last=False)
+        self.evictions += 1
+        self._release(slot)
+        return slot
+
+    def _release(self, slot: int):
+        self._active[slot] = False
+        self._context_keys[slot] = None
+        self._values[slot] = None
+        self._lru.pop(slot, None)
+
+    def clear(self):
+        with self._lock:
+            for slot in np.flatnonzero(self._active):
+                self._release(int(slot))
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": settings.SEMANTIC_CACHE_ENABLED,
+            "entries": int(self._active.sum()),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+# Singleton instance
+_semantic_cache = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get the shared semantic answer cache"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache(
+            max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        )
+    return _semantic_cache
@@ -0,0 +1,173 @@
+"""
+Content-addressed translation cache.
+Paragraph translations keyed by (paragraph hash, target language, model), with an
+in-memory LRU tier in front of a persistent SQLite tier.
+"""
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.core.config import settings
+from src.core.log import get_logger
+
+log = get_logger("translation_cache")
+
+CacheKey = Tuple[str, str, str]  # (paragraph_hash, target_language, model)
+
+
+def paragraph_hash(paragraph: str) -> str:
+    return hashlib.sha256(paragraph.strip().encode("utf-8")).hexdigest()
+
+
+def make_key(paragraph: str, target_language: str, model: str) -> CacheKey:
+    return (paragraph_hash(paragraph), target_language.lower(), model)
+
+
+class TranslationCache:
+    """
+    Two-tier cache: an OrderedDict LRU in memory, backed by SQLite on disk.
+    SQLite calls run in a worker thread so lookups never block the event loop.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, memory_max_entries: int = 5000):
+        self.memory_max_entries = max(1, memory_max_entries)
+        self._memory: "OrderedDict[CacheKey, str]" = OrderedDict()
+        self._db_path = Path(db_path) if db_path else None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self._db_path is None:
+            return None
+        if self._conn is None:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self._db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS translations (
+                    paragraph_hash TEXT NOT NULL,
+                    target_language TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    translated TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (paragraph_hash, target_language, model)
+                )
+                """
+            )
+            self._conn.commit()
+        return self._conn
+
+    # --- Memory tier ---
+
+    def _memory_get(self, key: CacheKey) -> Optional[str]:
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+        return value
+
+    def _memory_put(self, key: CacheKey, value: str):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+
+    # --- Disk tier (sync, called via asyncio.to_thread) ---
+
+    def _disk_get_many(self, keys: List[CacheKey]) -> Dict[CacheKey, str]:
+        with self._db_lock:
+            conn = self._db()
+            if conn is None:
+                return {}
+            found = {}
+            for h, lang, model in keys:
+                row = conn.execute(
+                    "SELECT translated FROM translations "
+                    "WHERE paragraph_hash = ? AND target_language = ? AND model = ?",
+                    (h, lang, model),
+                ).fetchone()
+                if row:
+                    found[(h, lang, model)] = row[0]
+            return found
+
+    def _disk_put_many(self, items: Dict[CacheKey, str]):
+        with self._db_lock:
+            conn = self._db()
+            if conn is None:
+                return
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations "
+                "(paragraph_hash, target_language, model, translated, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(h, lang, model, value, now) for (h, lang, model), value in items.items()],
+            )
+            conn.commit()
+
+    # --- Public API ---
+
+    async def get_many(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, str]:
+        """Return cached translations for the given keys (missing keys are absent)."""
+        found: Dict[CacheKey, str] = {}
+        missing: List[CacheKey] = []
+        for key in dict.fromkeys(keys):
+            value = self._memory_get(key)
+            if value is not None:
+                found[key] = value
+                self.memory_hits += 1
+            else:
+                missing.append(key)
+
+        if missing:
+            try:
+                from_disk = await asyncio.to_thread(self._disk_get_many, missing)
+            except Exception as e:
+                log.warning("Translation cache read failed: %s", e)
+                from_disk = {}
+            for key, value in from_disk.items():
+                self._memory_put(key, value)
+            found.update(from_disk)
+            self.disk_hits += len(from_disk)
+            self.misses += len(missing) - len(from_disk)
+        return found
+
+    async def put_many(self, items: Dict[CacheKey, str]):
+        if not items:
+            return
+        for key, value in items.items():
+            self._memory_put(key, value)
+        try:
+            await asyncio.to_thread(self._disk_put_many, items)
+        except Exception as e:
+            log.warning("Translation cache write failed: %s", e)
+
+    def stats(self) -> dict:
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+
+# Singleton instance
+_translation_cache = None
+
+
+def get_translation_cache() -> TranslationCache:
+    """Get the shared translation cache"""
+    global _translation_cache
+    if _translation_cache is None:
+        _translation_cache = TranslationCache(
+            db_path=Path(settings.TRANSLATION_CACHE_PATH) if settings.TRANSLATION_CACHE_PATH else None,
+            memory_max_entries=settings.TRANSLATION_CACHE_MEMORY_ENTRIES,
+        )
+    return _translation_cache
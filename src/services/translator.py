@@ -1,6 +1,25 @@
-from agents import Agent, Runner
+from agents_wrapper import Agent, LLMError, Runner
 from src.core.config import settings
+from src.core.log import get_logger
+from src.services.llm_scheduler import backoff_delay
+from src.services.metrics import span
+from src.services.translation_cache import get_translation_cache, make_key
+from typing import Callable, Optional
 import asyncio
+import re
+
+log = get_logger("translator")
+
+# Marker line separating paragraphs packed into one LLM call
+_MARKER_RE = re.compile(r"^\s*<<<(\d+)>>>\s*$", re.MULTILINE)
+
+# Paragraph translations currently being produced, shared across concurrent requests
+_inflight = {}
+
+
+class _OwnerCancelled(Exception):
+    """Set on an in-flight future whose owning request was cancelled; waiters take the paragraph over."""
+
 
 class Translator:
     def __init__(self):
@@ -8,22 +27,193 @@ class Translator:
             name="Translator",
             instructions="You are a professional translator. Translate the following text accurately.",
             model="gpt-4o-mini",  # Using a faster model for chunked translation
+            service="translation",
         )
+        self.cache = get_translation_cache()
 
-    async def translate_content(self, chapter_content: str, target_language: str = "Urdu") -> str:
+    async def translate_content(
+        self,
+        chapter_content: str,
+        target_language: str = "Urdu",
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> str:
         """
         Translates content by chunking it and processing chunks concurrently.
+        Paragraphs already in the translation cache are not sent to the model,
+        and paragraphs another request is already translating are awaited, not re-sent.
+        `progress(done, total)` is called as unique paragraphs complete.
         """
         # 1. Split the content into chunks (e.g., by paragraph)
         chunks = [p.strip() for p in chapter_content.split('\n\n') if p.strip()]
-        
+
         if not chunks:
             return ""
 
-        # 2. Create a list of translation tasks
-        tasks = []
-        for chunk in chunks:
-            input_text = f"""
+        # 2. Look up cached translations; only unique, uncached paragraphs go to the LLM
+        keys = [make_key(chunk, target_language, self.agent.model) for chunk in chunks]
+        translations = await self.cache.get_many(keys)
+
+        chunk_by_key = dict(zip(keys, chunks))
+        missing = {key: chunk for key, chunk in chunk_by_key.items() if key not in translations}
+
+        total = len(set(keys))
+        done = total - len(missing)
+
+        def advance(count: int):
+            nonlocal done
+            done += count
+            if progress is not None:
+                progress(done, total)
+
+        advance(0)
+
+        # 3. Claim paragraphs nobody is translating yet; wait on the rest. A paragraph
+        # whose owner was cancelled is claimed again (by one of its waiters)
+        while missing:
+            owned, waiting = self._claim(missing)
+            await self._translate_owned(owned, target_language, advance, translations)
+
+            missing = {}
+            for key, future in waiting.items():
+                try:
+                    # Shielded: a cancelled waiter must not cancel the owner's future
+                    translations[key] = await asyncio.shield(future)
+                    advance(1)
+                except _OwnerCancelled:
+                    missing[key] = chunk_by_key[key]
+
+        # 4. Stitch the translated chunks back together
+        return "\n\n".join(translations[key] for key in keys)
+
+    @staticmethod
+    def _claim(missing: dict) -> tuple:
+        """Split {key: paragraph} into ones this request now owns and {key: future} owned by others."""
+        loop = asyncio.get_running_loop()
+        owned, waiting = {}, {}
+        for key, chunk in missing.items():
+            future = _inflight.get(key)
+            if future is None:
+                future = _inflight[key] = loop.create_future()
+                # Nobody may be waiting: don't log "exception was never retrieved"
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+                owned[key] = chunk
+            else:
+                waiting[key] = future
+        return owned, waiting
+
+    async def _translate_owned(self, owned: dict, target_language: str, advance, translations: dict):
+        """Translate the claimed paragraphs and publish the results to waiting requests."""
+        if not owned:
+            return
+        try:
+            results = await self._translate_many(owned, target_language, advance)
+            for key, (translated, _) in results.items():
+                if not _inflight[key].done():
+                    _inflight[key].set_result(translated)
+                translations[key] = translated
+            await self.cache.put_many({key: text for key, (text, ok) in results.items() if ok and text})
+        finally:
+            for key in owned:
+                future = _inflight.pop(key)
+                if not future.done():
+                    # Cancelled (e.g. a cancelled job): waiters retry instead of getting a failure text
+                    future.set_exception(_OwnerCancelled())
+
+    async def _translate_many(
+        self, chunks: dict, target_language: str, on_translated: Optional[Callable[[int], None]] = None
+    ) -> dict:
+        """
+        Translate {key: paragraph} and return {key: (text, ok)}.
+
+        The first attempt packs small adjacent paragraphs into token-budgeted
+        batches; paragraphs that fail (call error or unparsable batch output)
+        are retried one by one with jittered backoff, unless the error cannot
+        go away on a retry (e.g. a 400 or 401 from the API). `on_translated(n)`
+        is called as each batch finishes with the number of paragraphs it produced.
+        """
+
+        async def translate_batch(batch: list) -> tuple:
+            outcome = await self._translate_batch(batch, target_language)
+            if on_translated is not None and outcome[0]:
+                on_translated(len(outcome[0]))
+            return outcome
+
+        results = {}
+        pending = list(chunks.items())
+        errors = {}
+        failed = []
+        for attempt in range(settings.TRANSLATION_MAX_RETRIES + 1):
+            if not pending:
+                break
+            if attempt:
+                await asyncio.sleep(backoff_delay(attempt - 1))
+            batches = self._pack(pending) if attempt == 0 else [[item] for item in pending]
+            outcomes = await asyncio.gather(
+                *(translate_batch(batch) for batch in batches)
+            )
+
+            pending = []
+            for batch, (translated, error, retryable) in zip(batches, outcomes):
+                for key, chunk in batch:
+                    if key in translated:
+                        results[key] = (translated[key], True)
+                    else:
+                        (pending if retryable else failed).append((key, chunk))
+                        errors[key] = error
+
+        pending += failed
+        for key, _ in pending:
+            log.warning("A translation chunk failed: %s", errors[key])
+            results[key] = (f"[Translation for this section failed: {errors[key]}]", False)
+        if pending and on_translated is not None:
+            on_translated(len(pending))
+        return results
+
+    @staticmethod
+    def _pack(items: list) -> list:
+        """Group adjacent paragraphs into batches under the token and size budgets."""
+        budget = settings.TRANSLATION_BATCH_TOKEN_BUDGET
+        max_items = settings.TRANSLATION_BATCH_MAX_PARAGRAPHS
+        batches, current, used = [], [], 0
+        for key, chunk in items:
+            cost = max(1, len(chunk) // 4)  # ~4 characters per token
+            if current and (used + cost > budget or len(current) >= max_items):
+                batches.append(current)
+                current, used = [], 0
+            current.append((key, chunk))
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _translate_batch(self, batch: list, target_language: str) -> tuple:
+        """
+        Returns ({key: translation} for parsed pieces, error message for the rest,
+        whether retrying the rest can help).
+        """
+        try:
+            if len(batch) == 1:
+                key, chunk = batch[0]
+                return {key: await self._translate_chunk(self._build_input(chunk, target_language))}, None, True
+
+            output = await self._translate_chunk(self._build_batch_input(batch, target_language))
+            parts = _MARKER_RE.split(output)
+            pieces = {int(num): text.strip() for num, text in zip(parts[1::2], parts[2::2])}
+            translated = {
+                key: pieces[i]
+                for i, (key, _) in enumerate(batch, 1)
+                if pieces.get(i)
+            }
+            error = None if len(translated) == len(batch) else "batch output could not be split"
+            return translated, error, True
+        except LLMError as e:
+            return {}, str(e), e.retryable
+        except Exception as e:
+            return {}, str(e), True
+
+    @staticmethod
+    def _build_input(chunk: str, target_language: str) -> str:
+        return f"""
 Translate the following English text into {target_language}.
 Do not add any extra commentary, just the translation.
 
@@ -34,26 +224,28 @@ English Text:
 
 {target_language} Translation:
 """
-            # Create a coroutine for each translation task
-            tasks.append(self._translate_chunk(input_text))
 
-        # 3. Run all translation tasks concurrently
-        translated_chunks = await asyncio.gather(*tasks)
+    @staticmethod
+    def _build_batch_input(batch: list, target_language: str) -> str:
+        sections = "\n".join(f"<<<{i}>>>\n{chunk}" for i, (_, chunk) in enumerate(batch, 1))
+        return f"""
+Translate each English section below into {target_language}.
+Keep every marker line (such as <<<1>>>) exactly as-is on its own line, followed by the translation of that section.
+Do not add any extra commentary, just the marker lines and translations.
 
-        # 4. Stitch the translated chunks back together
-        return "\n\n".join(translated_chunks)
+English Sections:
+{sections}
+
+{target_language} Translation:
+"""
 
     async def _translate_chunk(self, input_text: str) -> str:
         """
-        Sends a single chunk to the LLM for translation.
+        Sends a single prompt to the LLM (limited by the shared translation scheduler).
         """
-        try:
-            # Runner.run is an async static method
+        # Runner.run is an async static method
+        with span("translate.chunk"):
             result = await Runner.run(self.agent, input=input_text)
-            
-            # Ensure we return a string, even if the agent output is unexpected
-            return str(result.final_output).strip() if result and result.final_output else ""
-        except Exception as e:
-            print(f"Warning: A translation chunk failed. Error: {e}")
-            # Return an error message or the original text for the failed chunk
-            return f"[Translation for this section failed: {str(e)}]"
\ No newline at end of file
+
+        # Ensure we return a string, even if the agent output is unexpected
+        return str(result.final_output).strip() if result and result.final_output else ""
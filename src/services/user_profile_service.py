@@ -1,34 +1,176 @@
-from uuid import UUID
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from src.models.user import User, UserCreate, UserProfileUpdate
+"""
+User profiles (the `users` table) behind an in-process read-through cache.
+
+Personalization looks a profile up on every call, so profiles are kept in an
+LRU with a TTL: a hit costs no database round trip, concurrent misses for the
+same user share one query, and unknown users are cached too (as None).
+Updates write to Postgres first and then replace the cached entry. Other worker
+processes see an update once their entry expires (PROFILE_CACHE_TTL_SECONDS).
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from src.core.config import settings
+from src.core.log import get_logger
+from src.models.user import User, UserProfileUpdate
+
+log = get_logger("profiles")
+
+
+class _OwnerCancelled(Exception):
+    """Set on an in-flight lookup whose owning request was cancelled; a waiter takes it over."""
+
+
+def _to_model(row) -> User:
+    return User(
+        username=row.username,
+        email=row.email,
+        full_name=row.full_name,
+        software_background=row.software_background,
+        hardware_background=row.hardware_background,
+    )
+
 
 class UserProfileService:
-    def __init__(self, db: AsyncSession):
-        self.db = db
-
-    async def create_user(self, user_data: dict) -> User:
-        new_user = User(**user_data)
-        self.db.add(new_user)
-        await self.db.commit()
-        await self.db.refresh(new_user)
-        return new_user
-
-    async def get_user_by_email(self, email: str) -> User | None:
-        result = await self.db.execute(select(User).filter(User.email == email))
-        return result.scalars().first()
-
-    async def get_user_by_id(self, user_id: UUID) -> User | None:
-        result = await self.db.execute(select(User).filter(User.id == user_id))
-        return result.scalars().first()
-
-    async def update_user_profile(self, user_id: UUID, profile_update: UserProfileUpdate) -> User | None:
-        user = await self.get_user_by_id(user_id)
-        if user:
-            if profile_update.software_background is not None:
-                user.software_background = profile_update.software_background
-            if profile_update.hardware_background is not None:
-                user.hardware_background = profile_update.hardware_background
-            await self.db.commit()
-            await self.db.refresh(user)
-        return user
\ No newline at end of file
+    """Profile lookups and updates with a TTL/LRU read-through cache."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300.0):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        # username -> (profile or None for "no such user", cached at)
+        self._cache: "OrderedDict[str, Tuple[Optional[User], float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Bumped on every write so a load that raced with it isn't cached
+        self._versions: Dict[str, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.db_errors = 0
+
+    # --- Reads ----------------------------------------------------------------
+
+    async def get_profile(self, username: str) -> Optional[User]:
+        """The user's profile, or None if there is no such user."""
+        entry = self._cache.get(username)
+        if entry is not None and time.time() - entry[1] < self.ttl_seconds:
+            self._cache.move_to_end(username)
+            self.hits += 1
+            return entry[0]
+        if entry is not None:
+            del self._cache[username]
+        self.misses += 1
+
+        while username in self._inflight:
+            try:
+                return await asyncio.shield(self._inflight[username])
+            except _OwnerCancelled:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[username] = future
+        version = self._versions.get(username, 0)
+        try:
+            profile = await self._db_load(username)
+        except Exception as e:
+            self.db_errors += 1
+            future.set_exception(e)
+            # Mark retrieved so an unawaited future doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        else:
+            if self._versions.get(username, 0) == version:
+                self._remember(username, profile)
+            future.set_result(profile)
+            return profile
+        finally:
+            if not future.done():
+                # Owner cancelled (CancelledError isn't an Exception): wake the waiters
+                future.set_exception(_OwnerCancelled())
+                future.exception()
+            self._inflight.pop(username, None)
+
+    async def get_profile_or_default(self, username: str) -> User:
+        """
+        Profile for personalization: a bare profile (no backgrounds) when the
+        user is unknown or the database is unavailable.
+        """
+        try:
+            profile = await self.get_profile(username)
+        except Exception as e:
+            log.warning("Profile lookup failed for %r: %s: %s", username, type(e).__name__, e)
+            profile = None
+        return profile or User(username=username)
+
+    # --- Writes ---------------------------------------------------------------
+
+    async def update_profile(self, username: str, profile_update: UserProfileUpdate) -> User:
+        """Create or update the user's profile (only fields that are set) and refresh the cache."""
+        from src.database.connection import db_session
+        from src.database.models import User as UserRow
+
+        self._versions[username] = self._versions.get(username, 0) + 1
+        changes = profile_update.model_dump(exclude_unset=True)
+        async with db_session() as session:
+            row = await session.get(UserRow, username)
+            if row is None:
+                row = UserRow(username=username)
+                session.add(row)
+            for field_name, value in changes.items():
+                setattr(row, field_name, value)
+            await session.commit()
+            profile = _to_model(row)
+        self._remember(username, profile)
+        return profile
+
+    def invalidate(self, username: str):
+        self._versions[username] = self._versions.get(username, 0) + 1
+        self._cache.pop(username, None)
+
+    # --- Internals ------------------------------------------------------------
+
+    async def _db_load(self, username: str) -> Optional[User]:
+        if not settings.NEON_DB_URL:
+            # No profile store configured: everyone personalizes as an unknown user
+            return None
+        from src.database.connection import db_session
+        from src.database.models import User as UserRow
+
+        async with db_session() as session:
+            row = await session.get(UserRow, username)
+            return _to_model(row) if row is not None else None
+
+    def _remember(self, username: str, profile: Optional[User]):
+        self._cache[username] = (profile, time.time())
+        self._cache.move_to_end(username)
+        while len(self._cache) > self.max_entries:
+            oldest, _ = self._cache.popitem(last=False)
+            self._versions.pop(oldest, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "profiles": len(self._cache),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "db_errors": self.db_errors,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+# Singleton instance
+_user_profile_service = None
+
+
+def get_user_profile_service() -> UserProfileService:
+    """Get the shared profile service"""
+    global _user_profile_service
+    if _user_profile_service is None:
+        _user_profile_service = UserProfileService(
+            max_entries=settings.PROFILE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.PROFILE_CACHE_TTL_SECONDS,
+        )
+    return _user_profile_service
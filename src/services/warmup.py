@@ -0,0 +1,86 @@
+"""
+Eager model / client warm-up at application startup.
+Qdrant (client plus one round trip), the FastEmbed model (plus a dummy embedding to warm the ONNX session),
+the LLM agent and (when NEON_DB_URL is set) the first pooled Postgres connections
+are initialized in parallel so the first requests don't pay for them.
+"""
+import asyncio
+import time
+from typing import Callable, Dict
+
+from src.core.config import settings
+from src.core.log import get_logger
+from src.database.connection import warm_pool
+from src.services.rag_service import (
+    QDRANT_COLLECTION_NAME,
+    _get_embedder,
+    _get_llm_agent,
+    _get_qdrant,
+    get_rag_service,
+)
+
+# component -> {"status": "pending" | "ok" | "error", "seconds": float, "error": str}
+_components: Dict[str, dict] = {}
+_finished = False
+
+log = get_logger("startup")
+
+
+def _warm_qdrant():
+    # Constructing the client opens no connection; one request resolves DNS, opens the
+    # pooled connection and fails readiness if the server or collection is unreachable
+    _get_qdrant().get_collection(QDRANT_COLLECTION_NAME)
+
+
+def _warm_embedder():
+    embedder = _get_embedder()
+    # Run one embedding so the ONNX session is allocated and its kernels are warm
+    list(embedder.embed(["warm up"]))
+
+
+def _init_llm_agent():
+    if _get_llm_agent() is None:
+        raise RuntimeError("LLM agent not available (check OPENAI_API_KEY)")
+
+
+async def _warm_component(name: str, init: Callable):
+    _components[name] = {"status": "pending", "seconds": None, "error": None}
+    start = time.perf_counter()
+    try:
+        if asyncio.iscoroutinefunction(init):
+            await init()
+        else:
+            await asyncio.to_thread(init)
+        _components[name].update(status="ok")
+    except Exception as e:
+        _components[name].update(status="error", error=f"{type(e).__name__}: {e}")
+    _components[name]["seconds"] = round(time.perf_counter() - start, 3)
+    status = _components[name]["status"]
+    if status == "error":
+        log.warning("%s failed to warm up", name, extra=dict(_components[name]))
+    else:
+        log.info("%s warmed up", name, extra={"seconds": _components[name]["seconds"]})
+
+
+async def warm_up():
+    """Initialize all heavy components in parallel and record per-component timings."""
+    global _finished
+    start = time.perf_counter()
+    components = [
+        _warm_component("qdrant", _warm_qdrant),
+        _warm_component("embedder", _warm_embedder),
+        _warm_component("llm_agent", _init_llm_agent),
+    ]
+    if settings.NEON_DB_URL:
+        components.append(_warm_component("database", warm_pool))
+    await asyncio.gather(*components)
+    if all(c["status"] == "ok" for c in _components.values()):
+        # Build the service singleton now that its dependencies are loaded
+        get_rag_service()
+    _finished = True
+    log.info("Warm-up finished", extra={"seconds": round(time.perf_counter() - start, 3)})
+
+
+def get_readiness() -> dict:
+    ready = _finished and all(c["status"] == "ok" for c in _components.values())
+    return {"ready": ready, "warmup_finished": _finished, "components": _components}
@@ -0,0 +1,64 @@
+"""Token budgets, overlap and structure handling in the markdown chunker."""
+from src.ingestion.chunker import chunk_markdown, count_tokens, parse_blocks
+
+
+def doc(*sections):
+    return "---\ntitle: Robots\n---\n\n" + "\n\n".join(sections)
+
+
+def prose(sentences, word="robot"):
+    return " ".join(f"The {word} moves {i} joints along the planned path." for i in range(sentences))
+
+
+def test_blocks_carry_their_heading_path():
+    blocks = parse_blocks(doc("## Sensors", "Paragraph one.", "### LiDAR", "- item a\n- item b", "```bash\nls\n```"))
+
+    assert [(b.kind, b.headings) for b in blocks] == [
+        ("heading", ["Robots", "Sensors"]),
+        ("paragraph", ["Robots", "Sensors"]),
+        ("heading", ["Robots", "Sensors", "LiDAR"]),
+        ("list", ["Robots", "Sensors", "LiDAR"]),
+        ("code", ["Robots", "Sensors", "LiDAR"]),
+    ]
+
+
+def test_chunks_stay_within_the_token_budget():
+    chunks = chunk_markdown(doc("## Motion", prose(200)), max_tokens=64, overlap_tokens=8)
+
+    assert len(chunks) > 1
+    assert all(chunk.tokens <= 64 and count_tokens(chunk.text) <= 64 for chunk in chunks)
+
+
+def test_consecutive_chunks_of_a_section_overlap():
+    chunks = chunk_markdown(doc("## Motion", prose(40)), max_tokens=64, overlap_tokens=16)
+
+    last_sentence = chunks[0].text.rsplit(". ", 1)[-1]
+    assert last_sentence in chunks[1].text
+
+
+def test_oversized_code_block_is_split_inside_reopened_fences():
+    code = "```python\n" + "\n".join(f"value_{i} = compute({i})" for i in range(200)) + "\n```"
+
+    chunks = chunk_markdown(doc("## Code", code), max_tokens=64, overlap_tokens=0)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        body = chunk.text.split("\n\n")[-1]
+        assert body.startswith("```python\n") and body.endswith("\n```")
+        assert count_tokens(chunk.text) <= 64
+
+
+def test_unbreakable_text_is_cut_on_token_boundaries():
+    url = "https://example.com/" + "/".join("a.b-c" for _ in range(300))
+    cjk = "机器人" * 400
+    for text in (url, cjk, "x" * 5000):
+        chunks = chunk_markdown(doc("## Links", text), max_tokens=64, overlap_tokens=0)
+
+        assert all(count_tokens(chunk.text) <= 64 for chunk in chunks)
+
+
+def test_small_trailing_section_joins_the_previous_chunk():
+    chunks = chunk_markdown(doc("## Intro", prose(5), "## Tiny", "Short."), max_tokens=300, min_tokens=48)
+
+    assert len(chunks) == 1
+    assert "Short." in chunks[0].text
@@ -0,0 +1,97 @@
+"""Ownership, server-minted ids, LRU eviction and compaction in ConversationStore."""
+import asyncio
+
+import pytest
+
+from src.services import conversation_store as conversation_store_module
+from src.services.conversation_store import ConversationNotFound, ConversationStore
+
+
+def test_new_conversations_get_server_ids():
+    async def scenario():
+        store = ConversationStore()
+        fresh = await store.resolve(None, "ada", [{"role": "user", "content": "hi"}])
+        unknown = await store.resolve("client-chosen-id", "ada")
+        return fresh, unknown
+
+    fresh, unknown = asyncio.run(scenario())
+
+    assert fresh.user_id == "ada"
+    assert fresh.messages == [{"role": "user", "content": "hi"}]
+    assert unknown.id != "client-chosen-id"
+
+
+def test_owner_continues_and_others_are_rejected():
+    async def scenario():
+        store = ConversationStore()
+        conversation = await store.resolve(None, "ada")
+        same = await store.resolve(conversation.id, "ada")
+        with pytest.raises(ConversationNotFound):
+            await store.resolve(conversation.id, "mallory")
+        with pytest.raises(ConversationNotFound):
+            await store.resolve(conversation.id, None)
+        with pytest.raises(ConversationNotFound):
+            await store.get_for_user(conversation.id, "mallory")
+        return conversation, same, await store.get_for_user(conversation.id, "ada")
+
+    conversation, same, fetched = asyncio.run(scenario())
+
+    assert same is conversation
+    assert fetched is conversation
+
+
+def test_eviction_keeps_locks_that_are_held():
+    async def scenario():
+        store = ConversationStore(max_entries=1)
+        first = await store.resolve(None, "ada")
+        lock = store.lock(first.id)
+        async with lock:
+            second = await store.resolve(None, "bob")  # evicts the first conversation
+            assert first.id not in store._conversations
+            assert store.lock(first.id) is lock
+        store.lock(second.id)
+        await store.resolve(None, "cy")  # evicts the second; its lock is free
+        return store, second
+
+    store, second = asyncio.run(scenario())
+
+    assert second.id not in store._locks
+
+
+def test_expired_conversations_are_not_returned(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(conversation_store_module.time, "time", lambda: now[0])
+
+    async def scenario():
+        store = ConversationStore(ttl_seconds=60)
+        conversation = await store.resolve(None, "ada")
+        conversation.updated_at = now[0]
+        fresh = await store.get(conversation.id)
+        now[0] += 61
+        return fresh, await store.get(conversation.id)
+
+    fresh, expired = asyncio.run(scenario())
+
+    assert fresh is not None
+    assert expired is None
+
+
+def test_compaction_folds_old_messages_into_the_summary(monkeypatch):
+    async def summarize(previous_summary, messages):
+        return f"{len(messages)} older messages"
+
+    async def scenario():
+        store = ConversationStore(recent_messages=2)
+        monkeypatch.setattr(store, "_summarize", summarize)
+        conversation = await store.resolve(None, "ada")
+        for i in range(3):
+            conversation.add_turn(f"q{i}", f"a{i}")
+        await store.compact(conversation.id)
+        return store, conversation
+
+    store, conversation = asyncio.run(scenario())
+
+    assert conversation.summary == "4 older messages"
+    assert [m["content"] for m in conversation.messages] == ["q2", "a2"]
+    assert conversation.summarized_messages == 4
+    assert store.compactions == 1
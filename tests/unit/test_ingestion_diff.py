@@ -0,0 +1,168 @@
+"""Manifest-driven incremental ingestion: chunk diffs, vanished files and failed deletes."""
+import pytest
+
+from src.ingestion import pipeline as pipeline_module
+from src.ingestion.manifest import IngestManifest
+from src.ingestion.pipeline import IngestionPipeline, chunk_file, point_id
+
+
+class FakeQdrant:
+    """Records deletes and payload updates; deletes fail while `fail_deletes` is set."""
+
+    def __init__(self):
+        self.deleted_ids = []
+        self.deleted_files = []
+        self.payload_updates = 0
+        self.fail_deletes = False
+
+    def delete(self, collection_name, points_selector):
+        if self.fail_deletes:
+            raise ConnectionError("qdrant down")
+        if hasattr(points_selector, "points"):
+            self.deleted_ids.extend(points_selector.points)
+        else:
+            self.deleted_files.append(points_selector.filter.must[0].match.value)
+
+    def batch_update_points(self, collection_name, update_operations):
+        self.payload_updates += len(update_operations)
+
+
+def sections(*names):
+    """One heading section per name, each large enough (~60 tokens) to be a chunk of its own."""
+    return "\n\n".join(
+        f"## {name}\n\n" + " ".join(f"The {name} robot moves joint {i} smoothly." for i in range(8))
+        for name in names
+    ) + "\n"
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(pipeline_module.time, "sleep", lambda seconds: None)
+
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / "docs"
+    root.mkdir()
+    return root
+
+
+def ingest(client, docs, manifest, stale_files=()):
+    """Run the diff and delete stages (no embedding); return the chunks that would be embedded."""
+    pipeline = IngestionPipeline(
+        client, "test", docs, workers=1, manifest=manifest, stale_files=stale_files,
+        chunk_tokens=100, chunk_overlap=0,
+    )
+    changed = [chunk for batch in pipeline._chunk_batches() for chunk in batch]
+    pipeline._flush_deletes()
+    for source_file in pipeline._failed_files:
+        manifest.set(source_file, "", {})
+    return changed
+
+
+def test_unchanged_files_are_skipped(docs):
+    (docs / "a.md").write_text(sections("alpha", "beta"))
+    client, manifest = FakeQdrant(), IngestManifest("test")
+
+    first = ingest(client, docs, manifest)
+    second = ingest(client, docs, manifest)
+
+    assert len(first) == 2
+    assert client.deleted_files == ["a.md"]  # never ingested before: clear legacy points
+    assert second == []
+
+
+def test_only_changed_chunks_are_embedded_and_removed_ones_deleted(docs):
+    (docs / "a.md").write_text(sections("kept", "old"))
+    client, manifest = FakeQdrant(), IngestManifest("test")
+    ingest(client, docs, manifest)
+    old_keys = set(manifest.get("a.md")["chunks"])
+
+    (docs / "a.md").write_text(sections("kept", "new"))
+    changed = ingest(client, docs, manifest)
+
+    assert [chunk.headings[-1] for chunk in changed] == ["new"]
+    removed = old_keys - set(manifest.get("a.md")["chunks"])
+    assert removed
+    assert client.deleted_ids == [point_id("a.md", key) for key in removed]
+
+
+def test_moved_chunks_get_their_index_updated(docs):
+    (docs / "a.md").write_text(sections("alpha", "beta"))
+    client, manifest = FakeQdrant(), IngestManifest("test")
+    ingest(client, docs, manifest)
+
+    (docs / "a.md").write_text(sections("inserted", "alpha", "beta"))
+    changed = ingest(client, docs, manifest)
+
+    assert [chunk.headings[-1] for chunk in changed] == ["inserted"]
+    assert client.payload_updates == 2
+
+
+def test_vanished_files_are_deleted_and_forgotten(docs):
+    (docs / "a.md").write_text(sections("alpha"))
+    (docs / "b.md").write_text(sections("beta"))
+    client, manifest = FakeQdrant(), IngestManifest("test")
+    ingest(client, docs, manifest)
+
+    (docs / "b.md").unlink()
+    ingest(client, docs, manifest)
+
+    assert client.deleted_files[-1] == "b.md"
+    assert manifest.get("b.md") is None
+
+
+def test_failed_vanished_delete_is_retried_next_run(docs):
+    (docs / "b.md").write_text(sections("beta"))
+    client, manifest = FakeQdrant(), IngestManifest("test")
+    ingest(client, docs, manifest)
+
+    (docs / "b.md").unlink()
+    client.fail_deletes = True
+    ingest(client, docs, manifest)
+    assert manifest.get("b.md") == {"hash": "", "chunks": {}}  # placeholder
+
+    client.fail_deletes = False
+    ingest(client, docs, manifest)
+    assert client.deleted_files[-1] == "b.md"
+    assert manifest.get("b.md") is None
+
+
+def test_failed_chunk_delete_resets_the_file(docs):
+    (docs / "a.md").write_text(sections("old"))
+    client, manifest = FakeQdrant(), IngestManifest("test")
+    ingest(client, docs, manifest)
+
+    (docs / "a.md").write_text(sections("new"))
+    client.fail_deletes = True
+    ingest(client, docs, manifest)
+
+    assert manifest.get("a.md") == {"hash": "", "chunks": {}}
+
+
+def test_stale_files_outside_the_manifest_are_deleted(docs):
+    (docs / "a.md").write_text(sections("alpha"))
+    client = FakeQdrant()
+
+    ingest(client, docs, IngestManifest("test"), stale_files=["a.md", "gone.md"])
+
+    assert "gone.md" in client.deleted_files
+
+
+def test_outdated_manifest_is_ignored_but_its_files_are_kept(tmp_path):
+    path = tmp_path / "manifest.json"
+    IngestManifest("test", {"a.md": {"hash": "h", "chunks": {}}}, layout="dense").save(path)
+
+    assert IngestManifest.load(path, "test", layout="dense").files
+    assert IngestManifest.load(path, "test", layout="dense+bm25").files == {}
+    assert IngestManifest.stored_files(path) == ["a.md"]
+
+
+def test_chunk_keys_change_with_the_page_path():
+    body = sections("same")
+
+    old = chunk_file("intro.md", "---\nslug: /old\n---\n\n" + body)
+    new = chunk_file("intro.md", "---\nslug: /new\n---\n\n" + body)
+
+    assert old[0].content == new[0].content
+    assert old[0].key != new[0].key
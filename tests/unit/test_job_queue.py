@@ -0,0 +1,165 @@
+"""Running, cancelling and persisting jobs in JobQueue (SQLite store in a temp dir)."""
+import asyncio
+
+import pytest
+
+from src.services.job_queue import (
+    CANCELLED,
+    FAILED,
+    RUNNING,
+    SUCCEEDED,
+    JobQueue,
+    JobQueueFull,
+    _SqliteJobStore,
+)
+
+
+async def wait_finished(queue, job_id, timeout=1.0):
+    async def poll():
+        while True:
+            job = await queue.get(job_id)
+            if job.finished:
+                return job
+            await asyncio.sleep(0.001)
+
+    return await asyncio.wait_for(poll(), timeout)
+
+
+async def echo(job):
+    job.report(1, total=1, partial="half")
+    return {"echo": job.params["text"]}
+
+
+async def broken(job):
+    raise ValueError("bad input")
+
+
+def test_job_runs_to_completion_with_progress():
+    async def scenario():
+        queue = JobQueue(workers=1)
+        queue.register("echo", echo)
+        job = await queue.submit("echo", {"text": "hi"})
+        finished = await wait_finished(queue, job.id)
+        await queue.stop()
+        return finished
+
+    job = asyncio.run(scenario())
+
+    assert job.status == SUCCEEDED
+    assert job.result == {"echo": "hi"}
+    assert (job.done, job.total) == (1, 1)
+    assert job.partial == []  # the result supersedes the partial output
+
+
+def test_failing_handler_marks_job_failed():
+    async def scenario():
+        queue = JobQueue(workers=1)
+        queue.register("broken", broken)
+        job = await queue.submit("broken", {})
+        finished = await wait_finished(queue, job.id)
+        await queue.stop()
+        return queue, finished
+
+    queue, job = asyncio.run(scenario())
+
+    assert job.status == FAILED
+    assert job.error == "ValueError: bad input"
+    assert queue.failed == 1
+
+
+def test_unknown_kind_and_full_queue_are_rejected():
+    started = None
+
+    async def blocking(job):
+        started.set()
+        await asyncio.Event().wait()
+
+    async def scenario():
+        nonlocal started
+        started = asyncio.Event()
+        queue = JobQueue(workers=1, max_pending=1)
+        queue.register("blocking", blocking)
+        with pytest.raises(ValueError):
+            await queue.submit("nope", {})
+        await queue.submit("blocking", {})
+        await started.wait()  # the only worker is busy
+        await queue.submit("blocking", {})
+        with pytest.raises(JobQueueFull):
+            await queue.submit("blocking", {})
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_running_job_can_be_cancelled():
+    started = None
+
+    async def forever(job):
+        started.set()
+        await asyncio.Event().wait()
+
+    async def scenario():
+        nonlocal started
+        started = asyncio.Event()
+        queue = JobQueue(workers=1)
+        queue.register("forever", forever)
+        job = await queue.submit("forever", {})
+        await started.wait()
+        await queue.cancel(job.id)
+        finished = await wait_finished(queue, job.id)
+        await queue.stop()
+        return finished
+
+    assert asyncio.run(scenario()).status == CANCELLED
+
+
+def test_results_survive_a_restart(tmp_path):
+    async def scenario():
+        first = JobQueue(workers=1, store=_SqliteJobStore(tmp_path / "jobs.db"))
+        first.register("echo", echo)
+        job = await first.submit("echo", {"text": "hi"})
+        await wait_finished(first, job.id)
+        await first.stop()
+
+        second = JobQueue(workers=1, store=_SqliteJobStore(tmp_path / "jobs.db"))
+        loaded = await second.get(job.id)
+        return job.id, loaded
+
+    job_id, loaded = asyncio.run(scenario())
+
+    assert loaded.id == job_id
+    assert loaded.status == SUCCEEDED
+    assert loaded.result == {"echo": "hi"}
+
+
+def test_interrupted_jobs_are_requeued_on_start(tmp_path):
+    started = release = None
+
+    async def gated(job):
+        started.set()
+        await release.wait()
+        return "done"
+
+    async def scenario():
+        nonlocal started, release
+        started, release = asyncio.Event(), asyncio.Event()
+        first = JobQueue(workers=1, store=_SqliteJobStore(tmp_path / "jobs.db"))
+        first.register("gated", gated)
+        job = await first.submit("gated", {})
+        await started.wait()  # the "running" state is saved before the handler starts
+        await first.stop()  # "restart" while the job is running
+        interrupted = (await first._store.load(job.id)).status
+
+        second = JobQueue(workers=1, store=_SqliteJobStore(tmp_path / "jobs.db"))
+        second.register("gated", gated)
+        release.set()
+        await second.start()
+        finished = await wait_finished(second, job.id)
+        await second.stop()
+        return interrupted, finished
+
+    interrupted, finished = asyncio.run(scenario())
+
+    assert interrupted == RUNNING
+    assert finished.status == SUCCEEDED
+    assert finished.result == "done"
@@ -0,0 +1,38 @@
+"""Reciprocal rank fusion of dense and BM25 results in the RAG service."""
+import pytest
+
+pytest.importorskip("fastembed")  # rag_service loads the embedding model class at import
+
+from src.services.rag_service import _rrf_fuse  # noqa: E402
+
+
+def hit(source_file, chunk_index, similarity=None):
+    return {"source_file": source_file, "chunk_index": chunk_index, "content": "", "similarity": similarity}
+
+
+def test_chunks_found_by_both_retrievers_rank_first():
+    dense = [hit("a.md", 0, 0.9), hit("b.md", 0, 0.8), hit("c.md", 0, 0.7)]
+    sparse = [hit("c.md", 0), hit("d.md", 0), hit("a.md", 0)]
+
+    fused = _rrf_fuse([dense, sparse], k=60, limit=10)
+
+    assert [(c["source_file"], c["chunk_index"]) for c in fused[:2]] == [("a.md", 0), ("c.md", 0)]
+    assert fused[0]["score"] == pytest.approx(1 / 61 + 1 / 63)
+    assert len(fused) == 4
+
+
+def test_dense_similarity_is_kept_when_the_sparse_hit_comes_first():
+    sparse = [hit("a.md", 1)]
+    dense = [hit("a.md", 1, 0.75)]
+
+    fused = _rrf_fuse([sparse, dense], k=60, limit=10)
+
+    assert fused[0]["similarity"] == 0.75
+
+
+def test_same_file_different_chunks_stay_separate_and_limit_applies():
+    dense = [hit("a.md", i, 0.9 - i / 10) for i in range(5)]
+
+    fused = _rrf_fuse([dense, []], k=60, limit=3)
+
+    assert [c["chunk_index"] for c in fused] == [0, 1, 2]
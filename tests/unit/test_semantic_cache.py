@@ -0,0 +1,67 @@
+"""Similarity lookups, context keys, TTL and LRU eviction in SemanticCache."""
+import numpy as np
+
+from src.services import semantic_cache as semantic_cache_module
+from src.services.semantic_cache import SemanticCache, make_context_key
+
+
+def unit(*components):
+    vector = np.zeros(4, dtype=np.float32)
+    vector[: len(components)] = components
+    return vector
+
+
+def make_cache(**kwargs):
+    return SemanticCache(dim=4, **{"max_entries": 2, "ttl_seconds": 60.0, "threshold": 0.9, **kwargs})
+
+
+def test_similar_query_hits_and_dissimilar_misses():
+    cache = make_cache()
+    cache.store(unit(1.0, 0.0), "ctx", {"answer": "a"})
+
+    assert cache.lookup(unit(1.0, 0.1), "ctx") == {"answer": "a"}
+    assert cache.lookup(unit(0.0, 1.0), "ctx") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_only_match_their_context_key():
+    cache = make_cache()
+    cache.store(unit(1.0), "ctx-a", {"answer": "a"})
+
+    assert cache.lookup(unit(1.0), "ctx-b") is None
+
+
+def test_expired_entries_miss_and_are_reclaimed(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache_module.time, "time", lambda: now[0])
+    cache = make_cache(max_entries=1)
+    cache.store(unit(1.0), "ctx", {"answer": "old"})
+
+    now[0] += 61
+    assert cache.lookup(unit(1.0), "ctx") is None
+
+    cache.store(unit(0.0, 1.0), "ctx", {"answer": "new"})
+    assert cache.evictions == 0  # the expired slot was reused, nothing evicted
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = make_cache()
+    cache.store(unit(1.0), "ctx", {"answer": "a"})
+    cache.store(unit(0.0, 1.0), "ctx", {"answer": "b"})
+    cache.lookup(unit(1.0), "ctx")  # "a" is now the most recently used
+
+    cache.store(unit(0.0, 0.0, 1.0), "ctx", {"answer": "c"})
+
+    assert cache.evictions == 1
+    assert cache.lookup(unit(1.0), "ctx") == {"answer": "a"}
+    assert cache.lookup(unit(0.0, 1.0), "ctx") is None
+
+
+def test_context_key_depends_on_history_mode_and_selection():
+    history = [{"role": "user", "content": "hi"}]
+    base = make_context_key(None, history, "retrieval")
+
+    assert make_context_key(None, history, "retrieval") == base
+    assert make_context_key("selected", history, "retrieval") != base
+    assert make_context_key(None, history + [{"role": "assistant", "content": "hello"}], "retrieval") != base
+    assert make_context_key(None, history, "direct") != base
@@ -0,0 +1,150 @@
+"""Batch packing, <<<n>>> marker splitting, retries and in-flight sharing in Translator."""
+import asyncio
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from agents_wrapper import LLMError
+from src.services import translator as translator_module
+from src.services.translator import Translator, _inflight
+
+_SECTION_RE = re.compile(r"^<<<(\d+)>>>\n(.*?)$", re.MULTILINE)
+
+
+class FakeCache:
+    def __init__(self):
+        self.stored = {}
+
+    async def get_many(self, keys):
+        return {key: self.stored[key] for key in keys if key in self.stored}
+
+    async def put_many(self, entries):
+        self.stored.update(entries)
+
+
+def make_translator(reply):
+    """Translator whose LLM call is `reply(prompt) -> str` (sync or async)."""
+    translator = Translator.__new__(Translator)
+    translator.agent = SimpleNamespace(model="test-model")
+    translator.cache = FakeCache()
+    translator.prompts = []
+
+    async def translate_chunk(prompt):
+        translator.prompts.append(prompt)
+        result = reply(prompt)
+        return await result if asyncio.iscoroutine(result) else result
+
+    translator._translate_chunk = translate_chunk
+    return translator
+
+
+def echo_batch(prompt, drop=()):
+    """Translate every marked section of a batch prompt, leaving out the markers in `drop`."""
+    sections = _SECTION_RE.findall(prompt.split("English Sections:")[1]) if "<<<" in prompt else []
+    if not sections:
+        return "T(" + prompt.split("---")[1].strip() + ")"
+    return "\n".join(f"<<<{n}>>>\nT({text})" for n, text in sections if int(n) not in drop)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(translator_module, "backoff_delay", lambda attempt: 0)
+    monkeypatch.setattr(translator_module.settings, "TRANSLATION_MAX_RETRIES", 2)
+    _inflight.clear()
+
+
+def test_pack_respects_token_budget_and_paragraph_limit(monkeypatch):
+    monkeypatch.setattr(translator_module.settings, "TRANSLATION_BATCH_TOKEN_BUDGET", 10)
+    monkeypatch.setattr(translator_module.settings, "TRANSLATION_BATCH_MAX_PARAGRAPHS", 2)
+    items = [("a", "x" * 16), ("b", "x" * 16), ("c", "x" * 16), ("d", "x" * 80), ("e", "x")]
+
+    batches = Translator._pack(items)
+
+    assert [[key for key, _ in batch] for batch in batches] == [["a", "b"], ["c"], ["d"], ["e"]]
+
+
+def test_batch_output_is_split_on_markers():
+    translator = make_translator(echo_batch)
+    batch = [("k1", "first"), ("k2", "second"), ("k3", "third")]
+
+    translated, error, retryable = asyncio.run(translator._translate_batch(batch, "Urdu"))
+
+    assert translated == {"k1": "T(first)", "k2": "T(second)", "k3": "T(third)"}
+    assert error is None
+
+
+def test_batch_with_missing_marker_keeps_parsed_pieces():
+    translator = make_translator(lambda prompt: echo_batch(prompt, drop={2}))
+    batch = [("k1", "first"), ("k2", "second"), ("k3", "third")]
+
+    translated, error, retryable = asyncio.run(translator._translate_batch(batch, "Urdu"))
+
+    assert translated == {"k1": "T(first)", "k3": "T(third)"}
+    assert error == "batch output could not be split"
+    assert retryable
+
+
+def test_unsplit_paragraphs_are_retried_one_by_one():
+    translator = make_translator(lambda prompt: echo_batch(prompt, drop={2}))
+
+    results = asyncio.run(translator._translate_many({"k1": "first", "k2": "second", "k3": "third"}, "Urdu"))
+
+    assert results == {"k1": ("T(first)", True), "k2": ("T(second)", True), "k3": ("T(third)", True)}
+    assert len(translator.prompts) == 2  # one batch, then "second" alone
+
+
+def test_non_retryable_errors_are_not_retried():
+    def reply(prompt):
+        raise LLMError("Invalid OpenAI API key.", status_code=401, retryable=False)
+
+    translator = make_translator(reply)
+
+    results = asyncio.run(translator._translate_many({"k1": "first"}, "Urdu"))
+
+    assert results["k1"] == ("[Translation for this section failed: Invalid OpenAI API key.]", False)
+    assert len(translator.prompts) == 1
+
+
+def test_retryable_errors_are_retried():
+    calls = []
+
+    def reply(prompt):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise LLMError("rate limited", status_code=429, retryable=True)
+        return echo_batch(prompt)
+
+    translator = make_translator(reply)
+
+    results = asyncio.run(translator._translate_many({"k1": "first"}, "Urdu"))
+
+    assert results["k1"] == ("T(first)", True)
+    assert len(calls) == 2
+
+
+def test_waiter_takes_over_when_owner_is_cancelled():
+    release = None
+
+    async def slow_reply(prompt):
+        await release.wait()
+        return echo_batch(prompt)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        owner = make_translator(slow_reply)
+        waiter = make_translator(slow_reply)
+
+        owner_task = asyncio.create_task(owner.translate_content("shared paragraph"))
+        await asyncio.sleep(0)  # the owner claims the paragraph
+        waiter_task = asyncio.create_task(waiter.translate_content("shared paragraph"))
+        await asyncio.sleep(0)
+
+        owner_task.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await waiter_task
+
+    assert asyncio.run(scenario()) == "T(shared paragraph)"
+    assert not _inflight
@@ -0,0 +1,133 @@
+"""Read-through caching and single-flight lookups in UserProfileService."""
+import asyncio
+
+from src.models.user import User
+from src.services.user_profile_service import UserProfileService
+
+
+def make_service(load):
+    """Service whose database lookup is `load(username)` (async)."""
+    service = UserProfileService(max_entries=2)
+    service.loads = []
+
+    async def db_load(username):
+        service.loads.append(username)
+        return await load(username)
+
+    service._db_load = db_load
+    return service
+
+
+async def found(username):
+    return User(username=username)
+
+
+def test_hits_are_served_from_cache():
+    async def scenario():
+        service = make_service(found)
+        first = await service.get_profile("ada")
+        second = await service.get_profile("ada")
+        return service, first, second
+
+    service, first, second = asyncio.run(scenario())
+
+    assert first is second
+    assert service.loads == ["ada"]
+    assert (service.hits, service.misses) == (1, 1)
+
+
+def test_concurrent_misses_share_one_lookup():
+    async def slow(username):
+        await asyncio.sleep(0.01)
+        return User(username=username)
+
+    async def scenario():
+        service = make_service(slow)
+        results = await asyncio.gather(*(service.get_profile("ada") for _ in range(5)))
+        return service, results
+
+    service, results = asyncio.run(scenario())
+
+    assert service.loads == ["ada"]
+    assert all(result is results[0] for result in results)
+
+
+def test_failed_lookup_is_raised_to_waiters_and_not_cached():
+    async def broken(username):
+        await asyncio.sleep(0)
+        raise ConnectionError("db down")
+
+    async def scenario():
+        service = make_service(broken)
+        results = await asyncio.gather(*(service.get_profile("ada") for _ in range(2)), return_exceptions=True)
+        return service, results
+
+    service, results = asyncio.run(scenario())
+
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert service.db_errors == 1
+    assert "ada" not in service._cache and not service._inflight
+
+
+def test_waiter_takes_over_when_owner_is_cancelled():
+    release = None
+
+    async def gated(username):
+        await release.wait()
+        return User(username=username)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        service = make_service(gated)
+
+        owner = asyncio.create_task(service.get_profile("ada"))
+        await asyncio.sleep(0)  # the owner starts the lookup
+        waiter = asyncio.create_task(service.get_profile("ada"))
+        await asyncio.sleep(0)
+
+        owner.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return service, await asyncio.wait_for(waiter, timeout=1)
+
+    service, profile = asyncio.run(scenario())
+
+    assert profile.username == "ada"
+    assert service.loads == ["ada", "ada"]
+    assert not service._inflight
+
+
+def test_lookup_racing_a_write_is_not_cached():
+    release = None
+
+    async def gated(username):
+        await release.wait()
+        return User(username=username)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        service = make_service(gated)
+        lookup = asyncio.create_task(service.get_profile("ada"))
+        await asyncio.sleep(0)
+        service.invalidate("ada")  # a write lands while the lookup is in flight
+        release.set()
+        return service, await lookup
+
+    service, profile = asyncio.run(scenario())
+
+    assert profile.username == "ada"
+    assert "ada" not in service._cache
+
+
+def test_lru_evicts_oldest_profile():
+    async def scenario():
+        service = make_service(found)
+        for username in ("ada", "bob", "cy"):
+            await service.get_profile(username)
+        return service
+
+    service = asyncio.run(scenario())
+
+    assert list(service._cache) == ["bob", "cy"]
@@ -1,7 +1,7 @@
 import asyncio
 import os
 import sys
-from agents import Agent, Runner
+from agents_wrapper import Agent, Runner
 
 # Mock Agent
 class MockAgent:
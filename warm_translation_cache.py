@@ -0,0 +1,61 @@
+"""
+Pre-translate the docs tree into the translation cache (offline warm-up).
+
+Usage:
+    python warm_translation_cache.py [--language Urdu] [--concurrency 2] [--docs-path PATH]
+
+Every paragraph is translated once and stored in the paragraph-level cache, so
+/api/v1/translate serves these chapters without calling the model. Re-running
+only translates paragraphs that changed since the last warm-up.
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+DOCS_PATH = Path(__file__).parent.parent / "my-ai-book" / "docs"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Warm the translation cache from the docs tree.")
+    parser.add_argument("--language", default="Urdu", help="Target language (default: Urdu)")
+    parser.add_argument("--concurrency", type=int, default=2,
+                        help="Files translated at the same time (default: 2)")
+    parser.add_argument("--docs-path", type=Path, default=DOCS_PATH,
+                        help=f"Docs directory (default: {DOCS_PATH})")
+    return parser.parse_args()
+
+
+async def warm_cache(docs_path: Path, language: str, concurrency: int):
+    from src.ingestion.pipeline import discover_files
+    from src.services.translator import Translator
+
+    translator = Translator()
+    md_files = list(discover_files(docs_path))
+    print(f"Found {len(md_files)} markdown files in {docs_path}")
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    start = time.perf_counter()
+
+    async def warm_file(idx: int, md_file: Path):
+        async with semaphore:
+            content = md_file.read_text(encoding="utf-8")
+            file_start = time.perf_counter()
+            await translator.translate_content(content, target_language=language)
+            print(f"[{idx}/{len(md_files)}] {md_file.relative_to(docs_path)} "
+                  f"({time.perf_counter() - file_start:.1f}s)")
+
+    await asyncio.gather(*(warm_file(i, f) for i, f in enumerate(md_files, 1)))
+
+    stats = translator.cache.stats()
+    print()
+    print("=" * 70)
+    print(f"✓ Warm-up complete in {time.perf_counter() - start:.1f}s")
+    print(f"  Paragraphs already cached: {stats['memory_hits'] + stats['disk_hits']}")
+    print(f"  Paragraphs translated: {stats['misses']}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(warm_cache(args.docs_path, args.language, args.concurrency))